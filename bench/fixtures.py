@@ -0,0 +1,134 @@
+import json
+import math
+import os
+from typing import Optional
+
+import numpy as np
+from stock_concept.schema import CONCEPT_SCHEMA, CONCEPT_STOCK_SCHEMA
+
+PAGE_SIZE = 100
+
+
+def _page(total: int, diff: list) -> dict:
+    """与 clist/get 接口一致的响应结构"""
+    return {"rc": 0, "rt": 6, "svr": 0, "lt": 1, "full": 1, "data": {"total": total, "diff": diff}}
+
+
+def _write(path: str, data: dict):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False)
+
+
+def _rows(schema, n: int, rng: np.random.Generator, missing: float) -> list:
+    """按 schema 的字段代码生成 n 行, 字符串字段取 "{字段名}{序号}", 数值字段按 missing 比例填入 "-" """
+    columns = {}
+    for field in schema.fields:
+        if field.dtype == "str":
+            columns[field.code] = [f"{field.name}{i}" for i in range(n)]
+        elif field.dtype == "int64":
+            columns[field.code] = rng.integers(0, 300, n).tolist()
+        else:
+            values = np.round(rng.normal(0, 5, n), 2).astype(object)
+            values[rng.random(n) < missing] = "-"
+            columns[field.code] = values.tolist()
+    return [dict(zip(columns, values)) for values in zip(*columns.values())]
+
+
+def synthesize(directory: str, n_concepts: int = 400, stocks_per_board: tuple = (10, 400),
+               missing: float = 0.02, seed: int = 0) -> str:
+    """
+    生成与录制数据结构相同的合成数据, 没有录制数据或需要指定数据规模时使用.
+
+    Args:
+        directory (str): 输出目录, 结构见 load_fixtures.
+        n_concepts (int, optional): 概念板块数量. Defaults to 400.
+        stocks_per_board (tuple, optional): 每个板块成分股数量的范围 [low, high). Defaults to (10, 400).
+        missing (float, optional): 数值字段为 "-" (停牌等) 的比例. Defaults to 0.02.
+        seed (int, optional): 随机种子. Defaults to 0.
+    """
+    rng = np.random.default_rng(seed)
+    concepts = _rows(CONCEPT_SCHEMA, n_concepts, rng, missing)
+    # 与接口一致, 概念板块按代码降序排列
+    for i, row in enumerate(concepts):
+        row["f12"] = f"BK{1999 - i:04d}"
+    for page in range(1, math.ceil(n_concepts / PAGE_SIZE) + 1):
+        diff = concepts[(page - 1) * PAGE_SIZE:page * PAGE_SIZE]
+        _write(os.path.join(directory, "concepts", f"{page}.json"), _page(n_concepts, diff))
+
+    for row in concepts:
+        n_stocks = int(rng.integers(*stocks_per_board))
+        stocks = _rows(CONCEPT_STOCK_SCHEMA, n_stocks, rng, missing)
+        for i, stock in enumerate(stocks):
+            stock["f12"] = f"{i:06d}"
+        for page in range(1, max(1, math.ceil(n_stocks / PAGE_SIZE)) + 1):
+            diff = stocks[(page - 1) * PAGE_SIZE:page * PAGE_SIZE]
+            _write(os.path.join(directory, "boards", row["f12"], f"{page}.json"), _page(n_stocks, diff))
+    return directory
+
+
+def record(directory: str, fetcher, n_boards: Optional[int] = 20) -> str:
+    """
+    从东方财富接口录制原始分页响应, 供离线回放. 需要联网, 请求仍受 rate_limit 配置限制.
+
+    Args:
+        directory (str): 输出目录.
+        fetcher (ConceptStockFetcher): 使用其请求参数和 HttpClient.
+        n_boards (int, optional): 录制成分股的板块数量, 为空时录制全部板块. Defaults to 20.
+    """
+    first = fetcher._get_concept_page(1)
+    total = first["data"]["total"]
+    pages = [first] + [fetcher._get_concept_page(page) for page in range(2, math.ceil(total / PAGE_SIZE) + 1)]
+    codes = []
+    for page, data in enumerate(pages, start=1):
+        _write(os.path.join(directory, "concepts", f"{page}.json"), data)
+        codes += [row["f12"] for row in _diff_rows(data)]
+
+    for code in codes[:n_boards]:
+        page = 1
+        while True:
+            data = fetcher._get_concept_stocks_page(code, page, PAGE_SIZE)
+            _write(os.path.join(directory, "boards", code, f"{page}.json"), data)
+            if page * PAGE_SIZE >= data["data"]["total"]:
+                break
+            page += 1
+    return directory
+
+
+def _diff_rows(data: dict) -> list:
+    diff = data["data"]["diff"]
+    return list(diff.values()) if isinstance(diff, dict) else diff
+
+
+def load_fixtures(directory: str) -> dict:
+    """
+    读取录制或合成的分页数据.
+
+    目录结构:
+        directory/
+          concepts/{页码}.json          概念板块列表
+          boards/{板块代码}/{页码}.json  板块成分股
+
+    Returns:
+        dict: {"concepts": {页码: 响应}, "boards": {板块代码: {页码: 响应}}}
+    """
+    def _pages(path):
+        pages = {}
+        for name in os.listdir(path):
+            with open(os.path.join(path, name), "r", encoding="utf-8") as f:
+                pages[int(os.path.splitext(name)[0])] = json.load(f)
+        return pages
+
+    boards_dir = os.path.join(directory, "boards")
+    boards = {}
+    if os.path.isdir(boards_dir):
+        boards = {code: _pages(os.path.join(boards_dir, code)) for code in os.listdir(boards_dir)}
+    return {"concepts": _pages(os.path.join(directory, "concepts")), "boards": boards}
+
+
+def fixture_rows(fixtures: dict) -> tuple:
+    """全部概念板块行和全部成分股行, 用于不经过网络的解析基准"""
+    concepts = [row for _, data in sorted(fixtures["concepts"].items()) for row in _diff_rows(data)]
+    stocks = [row for pages in fixtures["boards"].values() for _, data in sorted(pages.items())
+              for row in _diff_rows(data)]
+    return concepts, stocks
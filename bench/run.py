@@ -0,0 +1,256 @@
+"""
+离线基准测试.
+
+    python -m bench.run                               # 使用合成数据, 结果写入 bench_results.json
+    python -m bench.run --fixtures path/to/recorded   # 回放录制的数据
+    python -m bench.run --latency 0.05 --jitter 0.02  # 模拟网络延迟
+    python -m bench.run --compare old.json            # 与上一次结果对比, 变慢超过阈值时返回非 0
+    python -m bench.run --record path/to/recorded     # 联网录制 clist/get 分页数据
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+from bench.fixtures import fixture_rows, load_fixtures, record, synthesize
+from bench.server import FixtureServer
+from percentage_change.distribution import distribution_matrix
+from percentage_change.percentage_change import count_changes
+from stock_concept.board_index import clear_board_index
+from stock_concept.schema import CONCEPT_STOCK_SCHEMA
+from utils.cache import load_cache, save_cache
+from utils.metrics import get_metrics
+
+BENCHMARKS = ("concepts", "constituents", "parse", "cache", "distribution")
+BINS = [-100, -20, -10, -3, 0, 3, 10, 20, 100]
+LABELS = ["Down >20%", "Down 10%-20%", "Down 3%-10%", "Down 0%-3%", "Up 0%-3%", "Up 3%-10%", "Up 10%-20%", "Up >20%"]
+
+
+def measure(func, repeat: int = 3, setup=None) -> dict:
+    """运行 repeat 次, 返回耗时统计（秒）; setup 在每次运行前调用, 不计入耗时"""
+    runs = []
+    for _ in range(repeat):
+        if setup is not None:
+            setup()
+        start = time.perf_counter()
+        func()
+        runs.append(time.perf_counter() - start)
+    return {"runs": runs, "min": min(runs), "median": statistics.median(runs), "mean": statistics.fmean(runs)}
+
+
+def _result(name: str, params: dict, timing: dict, rows: int = None) -> dict:
+    result = {"name": name, "params": params, **timing}
+    if rows:
+        result["rows"] = rows
+        result["rows_per_sec"] = rows / timing["median"] if timing["median"] > 0 else None
+    return result
+
+
+def _make_fetcher(server_url: str, rate_limit: bool, directory: str):
+    """构造指向替身服务的 ConceptStockFetcher, 关闭缓存, 输出和缓存目录放在 directory 下; rate_limit 为 False 时不限流"""
+    from stock_concept.fetch_stock_concept import ConceptStockFetcher
+
+    return ConceptStockFetcher({
+        "output": {"directory": os.path.join(directory, "output")},
+        "cache": {"enabled": False, "directory": os.path.join(directory, "cache")},
+        "http": {"base_url": server_url, "timeout": 30},
+        "rate_limit": {"enabled": rate_limit},
+    })
+
+
+def bench_concepts(fetcher, repeat: int) -> list:
+    """全部概念板块的拉取, 分别测试逐页和并发翻页"""
+    results = []
+    for concurrent in (False, True):
+        fetcher.request_concurrent = concurrent
+        rows = len(fetcher._fetch_all_concepts())
+        timing = measure(fetcher._fetch_all_concepts, repeat)
+        results.append(_result("concepts", {"concurrent": concurrent}, timing, rows))
+    return results
+
+
+def bench_constituents(fetcher, boards: int, workers: list, repeat: int) -> list:
+    """多个板块成分股的拉取, 比较不同的并发线程数"""
+    clear_board_index()
+    names = fetcher.get_all_concepts(use_cache=False)["板块名称"].tolist()[:boards]
+    results = []
+    for max_workers in workers:
+        def _pull():
+            return sum(len(df) for _, df in fetcher.fetch_many_concept_stocks(names, max_workers=max_workers))
+        rows = _pull()
+        timing = measure(_pull, repeat)
+        results.append(_result("constituents", {"boards": len(names), "max_workers": max_workers}, timing, rows))
+    return results
+
+
+def _resize(rows: list, n: int) -> list:
+    """循环复用录制的行, 得到 n 行"""
+    return [rows[i % len(rows)] for i in range(n)]
+
+
+def bench_parse(stock_rows: list, sizes: list, repeat: int) -> list:
+    """按字段代码解析原始 diff (列名映射 + 类型转换)"""
+    results = []
+    for n in sizes:
+        diff = _resize(stock_rows, n)
+        timing = measure(lambda: CONCEPT_STOCK_SCHEMA.parse(diff), repeat)
+        results.append(_result("parse", {"rows": n}, timing, n))
+    return results
+
+
+def bench_cache(stock_rows: list, sizes: list, repeat: int) -> list:
+    """缓存写入、整表读取和按列读取"""
+    results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        for n in sizes:
+            df = CONCEPT_STOCK_SCHEMA.parse(_resize(stock_rows, n))
+            path = os.path.join(tmp, f"stocks_{n}.pkl")
+            results.append(_result("cache_save", {"rows": n}, measure(lambda: save_cache(path, df), repeat), n))
+            results.append(_result("cache_load", {"rows": n}, measure(lambda: load_cache(path), repeat), n))
+            timing = measure(lambda: load_cache(path, columns=["代码", "涨跌幅"]), repeat)
+            results.append(_result("cache_load_columns", {"rows": n}, timing, n))
+    return results
+
+
+def bench_distribution(sizes: list, repeat: int, days: int = 20) -> list:
+    """涨跌幅分布统计: 单个快照 (与 pd.cut 对比) 和多个快照的长表"""
+    rng = np.random.default_rng(0)
+    results = []
+    for n in sizes:
+        values = rng.normal(0, 5, n)
+        df = pd.DataFrame({"涨跌幅": values})
+        timing = measure(lambda: count_changes(df, BINS, LABELS), repeat)
+        results.append(_result("distribution", {"rows": n}, timing, n))
+        timing = measure(lambda: pd.cut(df["涨跌幅"], bins=BINS, labels=LABELS).value_counts(), repeat)
+        results.append(_result("distribution_pd_cut", {"rows": n}, timing, n))
+
+        long = pd.DataFrame({"日期": np.repeat(np.arange(days), n), "涨跌幅": rng.normal(0, 5, n * days)})
+        timing = measure(lambda: distribution_matrix(long, BINS, LABELS), repeat)
+        results.append(_result("distribution_matrix", {"rows": n, "days": days}, timing, n * days))
+    return results
+
+
+def run_benchmarks(fixture_dir: str, *, latency: float = 0.0, jitter: float = 0.0, sizes=(1000, 10000, 100000),
+                   boards: int = 20, workers=(1, 4), repeat: int = 3, rate_limit: bool = False,
+                   only=BENCHMARKS) -> dict:
+    """运行基准测试, 返回可直接写成 JSON 的结果"""
+    fixtures = load_fixtures(fixture_dir)
+    _, stock_rows = fixture_rows(fixtures)
+    metrics = get_metrics()
+    metrics.reset()
+
+    results = []
+    if "concepts" in only or "constituents" in only:
+        with FixtureServer(fixtures, latency=latency, jitter=jitter) as server, tempfile.TemporaryDirectory() as tmp:
+            fetcher = _make_fetcher(server.url, rate_limit, tmp)
+            try:
+                if "concepts" in only:
+                    results += bench_concepts(fetcher, repeat)
+                if "constituents" in only:
+                    results += bench_constituents(fetcher, boards, list(workers), repeat)
+            finally:
+                fetcher.http.close()
+                clear_board_index()
+    if "parse" in only:
+        results += bench_parse(stock_rows, list(sizes), repeat)
+    if "cache" in only:
+        results += bench_cache(stock_rows, list(sizes), repeat)
+    if "distribution" in only:
+        results += bench_distribution(list(sizes), repeat)
+
+    return {
+        "created_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "environment": {
+            "python": platform.python_version(),
+            "pandas": pd.__version__,
+            "numpy": np.__version__,
+            "platform": platform.platform(),
+        },
+        "params": {"fixtures": fixture_dir, "latency": latency, "jitter": jitter, "sizes": list(sizes),
+                   "boards": boards, "workers": list(workers), "repeat": repeat, "rate_limit": rate_limit},
+        "results": results,
+        "metrics": metrics.snapshot(),
+    }
+
+
+def compare(old: dict, new: dict, threshold: float = 1.2) -> list:
+    """按 (名称, 参数) 对比两次结果的中位数耗时, 返回变慢超过 threshold 倍的条目"""
+    def _key(result):
+        return result["name"], json.dumps(result["params"], sort_keys=True)
+
+    baseline = {_key(r): r for r in old["results"]}
+    regressions = []
+    for result in new["results"]:
+        before = baseline.get(_key(result))
+        if before is None or before["median"] <= 0:
+            continue
+        ratio = result["median"] / before["median"]
+        flag = "  <-- 变慢" if ratio > threshold else ""
+        print(f"{result['name']:<22} {_key(result)[1]:<40} {before['median'] * 1000:9.2f}ms -> "
+              f"{result['median'] * 1000:9.2f}ms  x{ratio:.2f}{flag}")
+        if ratio > threshold:
+            regressions.append({**result, "baseline_median": before["median"], "ratio": ratio})
+    return regressions
+
+
+def _int_list(value: str) -> list:
+    return [int(v) for v in value.split(",") if v]
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="ConceptStockFetcher 与涨跌幅统计的离线基准测试")
+    parser.add_argument("--fixtures", help="录制数据目录, 为空时生成合成数据")
+    parser.add_argument("--concepts", type=int, default=400, help="合成数据的概念板块数量")
+    parser.add_argument("--latency", type=float, default=0.0, help="替身服务每个请求的固定延迟（秒）")
+    parser.add_argument("--jitter", type=float, default=0.0, help="在固定延迟上增加的随机延迟上限（秒）")
+    parser.add_argument("--sizes", type=_int_list, default=[1000, 10000, 100000], help="解析、缓存和分布统计的数据行数")
+    parser.add_argument("--boards", type=int, default=20, help="拉取成分股的板块数量")
+    parser.add_argument("--workers", type=_int_list, default=[1, 4], help="拉取成分股的并发线程数")
+    parser.add_argument("--repeat", type=int, default=3, help="每项重复次数")
+    parser.add_argument("--rate-limit", action="store_true", help="使用 config.yaml 中的限流配置")
+    parser.add_argument("--only", default=",".join(BENCHMARKS), help=f"只运行部分基准, 可选 {','.join(BENCHMARKS)}")
+    parser.add_argument("--output", default="bench_results.json", help="结果文件")
+    parser.add_argument("--compare", help="与之前的结果文件对比")
+    parser.add_argument("--threshold", type=float, default=1.2, help="中位数耗时超过基准的倍数视为变慢")
+    parser.add_argument("--record", metavar="DIR", help="联网录制分页数据到 DIR 后退出")
+    args = parser.parse_args(argv)
+
+    if args.record:
+        from stock_concept.fetch_stock_concept import ConceptStockFetcher
+        record(args.record, ConceptStockFetcher(), n_boards=args.boards)
+        print(f"已录制至 {args.record}")
+        return 0
+
+    with tempfile.TemporaryDirectory() as tmp:
+        fixture_dir = args.fixtures or synthesize(os.path.join(tmp, "fixtures"), n_concepts=args.concepts)
+        results = run_benchmarks(
+            fixture_dir, latency=args.latency, jitter=args.jitter, sizes=args.sizes, boards=args.boards,
+            workers=args.workers, repeat=args.repeat, rate_limit=args.rate_limit, only=args.only.split(","),
+        )
+    if not args.fixtures:
+        results["params"]["fixtures"] = f"synthesized:{args.concepts}"
+
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(results, f, ensure_ascii=False, indent=2, default=str)
+    for result in results["results"]:
+        print(f"{result['name']:<22} {json.dumps(result['params'], ensure_ascii=False):<40} "
+              f"median {result['median'] * 1000:9.2f}ms")
+    print(f"结果已保存至 {args.output}")
+
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as f:
+            regressions = compare(json.load(f), results, args.threshold)
+        if regressions:
+            print(f"{len(regressions)} 项变慢超过 {args.threshold} 倍")
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
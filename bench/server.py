@@ -0,0 +1,75 @@
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+
+class _ReplayHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    # 响应头和响应体分两次发送, 关闭 Nagle 算法避免 keep-alive 连接上的 40ms 延迟确认
+    disable_nagle_algorithm = True
+
+    def do_GET(self):
+        server = self.server
+        if server.latency or server.jitter:
+            time.sleep(server.latency + random.uniform(0, server.jitter))
+
+        params = {k: v[0] for k, v in parse_qs(urlsplit(self.path).query).items()}
+        page = int(params.get("pn", 1))
+        fs = params.get("fs", "")
+        if fs.startswith("b:"):
+            pages = server.fixtures["boards"].get(fs.split()[0][2:], {})
+        else:
+            pages = server.fixtures["concepts"]
+
+        data = pages.get(page)
+        if data is None:
+            # 超出录制范围的页面与接口一致, 返回空的 diff
+            total = next(iter(pages.values()))["data"]["total"] if pages else 0
+            data = {"rc": 0, "data": {"total": total, "diff": []}}
+        body = json.dumps(data, ensure_ascii=False).encode("utf-8")
+
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class FixtureServer:
+    """
+    在本地回放 clist/get 分页数据的替身服务, 每个请求按 latency + random(0, jitter) 秒延迟后返回.
+    配合 HttpClient 的 base_url 使用:
+
+        with FixtureServer(load_fixtures(path), latency=0.05) as server:
+            fetcher.http = HttpClient(base_url=server.url)
+    """
+
+    def __init__(self, fixtures: dict, latency: float = 0.0, jitter: float = 0.0, host: str = "127.0.0.1"):
+        self.httpd = ThreadingHTTPServer((host, 0), _ReplayHandler)
+        self.httpd.daemon_threads = True
+        self.httpd.fixtures = fixtures
+        self.httpd.latency = latency
+        self.httpd.jitter = jitter
+        self.url = f"http://{host}:{self.httpd.server_address[1]}"
+        self._thread = None
+
+    def start(self):
+        self._thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.stop()
@@ -0,0 +1,181 @@
+"""
+统一的命令行入口, 只在子命令真正需要时才导入 pandas / akshare / matplotlib 等重量级模块.
+
+    python cli.py concepts                 # 获取全部概念板块
+    python cli.py constituents 低空经济     # 获取指定板块的成分股, 不传板块名时使用 default_concepts
+    python cli.py constituents --stream    # 逐页写入文件, 不在内存中合并整个板块
+    python cli.py distribution --no-plot   # 统计A股涨跌幅分布
+    python cli.py poll 低空经济 --port 8765  # 盘中轮询指定板块, 只输出变化的行, 并开启本地读取接口
+    python cli.py --timing concepts        # 输出导入耗时和运行耗时
+"""
+import argparse
+import importlib
+import sys
+import time
+
+_START = time.perf_counter()
+
+
+class _Timing:
+    """记录子命令中延迟导入的耗时"""
+
+    def __init__(self):
+        self.import_seconds = 0.0
+
+    def load(self, name: str):
+        start = time.perf_counter()
+        module = importlib.import_module(name)
+        self.import_seconds += time.perf_counter() - start
+        return module
+
+    def report(self, run_start: float):
+        total = time.perf_counter() - _START
+        run = time.perf_counter() - run_start - self.import_seconds
+        print(f"导入耗时 {self.import_seconds * 1000:.0f}ms, 运行耗时 {run * 1000:.0f}ms, "
+              f"总耗时 {total * 1000:.0f}ms, 已加载模块 {len(sys.modules)} 个", file=sys.stderr)
+
+
+def _output_overrides(args) -> dict:
+    output = {}
+    if getattr(args, "format", None):
+        output["format"] = args.format
+    if getattr(args, "consolidate", False):
+        output["consolidate"] = True
+    return {"output": output}
+
+
+def cmd_concepts(args, timing: _Timing) -> int:
+    module = timing.load("stock_concept.fetch_stock_concept")
+    fetcher = module.ConceptStockFetcher(_output_overrides(args))
+    df = fetcher.get_all_concepts(use_cache=not args.refresh)
+    if not args.no_save and fetcher.config.get("output", {}).get("save_all_concepts", False):
+        fetcher.save_df(df, fetcher.config["output"].get("all_concept_file_name", "所有概念板块"))
+    print(f"共 {len(df)} 个概念板块")
+    return 0
+
+
+def cmd_constituents(args, timing: _Timing) -> int:
+    module = timing.load("stock_concept.fetch_stock_concept")
+    fetcher = module.ConceptStockFetcher(_output_overrides(args))
+    names = args.names or fetcher.default_concepts
+    if args.stream:
+        if fetcher.writer.consolidate:
+            print("--stream 逐个板块写文件, 不能与 --consolidate / output.consolidate 同时使用", file=sys.stderr)
+            return 2
+        return _stream_constituents(fetcher, names, args.workers or fetcher.request_max_workers)
+
+    rows = 0
+    failures = {}
+    with fetcher.writer:
+        for concept_name, df in fetcher.fetch_many_concept_stocks(names, max_workers=args.workers, failures=failures):
+            fetcher.writer.submit(df, concept_name)
+            rows += len(df)
+            print(f"{concept_name}: {len(df)} 只股票")
+    print(f"共获取 {rows} 只股票")
+    if failures:
+        print(f"{len(failures)} 个板块获取失败: {', '.join(failures)}", file=sys.stderr)
+        return 1
+    return 0
+
+
+def _stream_constituents(fetcher, names: list, workers: int) -> int:
+    """每个板块在一个线程中边拉取边写文件, 见 ConceptStockFetcher.save_stream"""
+    from concurrent.futures import ThreadPoolExecutor, as_completed
+
+    def _save(concept_name):
+        return fetcher.save_stream(fetcher.iter_concept_stocks(concept_name), concept_name)
+
+    rows = 0
+    failures = []
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        futures = {executor.submit(_save, name): name for name in names}
+        for future in as_completed(futures):
+            concept_name = futures[future]
+            try:
+                n = future.result()
+            except Exception as e:
+                fetcher.logger.error(f"获取板块 {concept_name} 成分股失败: {e}")
+                failures.append(concept_name)
+                continue
+            rows += n
+            print(f"{concept_name}: {n} 只股票")
+    print(f"共获取 {rows} 只股票")
+    if failures:
+        print(f"{len(failures)} 个板块获取失败: {', '.join(failures)}", file=sys.stderr)
+        return 1
+    return 0
+
+
+def cmd_distribution(args, timing: _Timing) -> int:
+    module = timing.load("percentage_change.percentage_change")
+    overrides = {}
+    if args.no_plot:
+        overrides["visualization"] = {"enabled": False}
+    if args.csv:
+        overrides["output"] = {"save_csv": True, "csv_path": args.csv}
+    if args.snapshot:
+        overrides["snapshot_store"] = {"enabled": True}
+    return 0 if module.main(overrides) is not None else 1
+
+
+def cmd_poll(args, timing: _Timing) -> int:
+    module = timing.load("stock_concept.live")
+    overrides = _output_overrides(args)
+    if args.interval or args.port is not None:
+        overrides["poll"] = {}
+        if args.interval:
+            overrides["poll"]["interval"] = args.interval
+        if args.port is not None:
+            overrides["poll"]["http"] = {"enabled": args.port > 0, "port": args.port}
+    module.run_poll(args.names, rounds=args.rounds, overrides=overrides)
+    return 0
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="stock", description="东方财富概念板块与A股涨跌幅统计工具")
+    parser.add_argument("--timing", action="store_true", help="输出导入耗时和运行耗时")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    concepts = subparsers.add_parser("concepts", help="获取全部概念板块")
+    concepts.add_argument("--refresh", action="store_true", help="忽略未过期的缓存")
+    concepts.add_argument("--no-save", action="store_true", help="不保存到输出目录")
+    concepts.add_argument("--format", choices=["csv", "xlsx", "parquet", "feather"], help="覆盖 output.format")
+    concepts.set_defaults(func=cmd_concepts)
+
+    constituents = subparsers.add_parser("constituents", help="获取概念板块成分股")
+    constituents.add_argument("names", nargs="*", help="板块名称, 为空时使用 default_concepts")
+    constituents.add_argument("--workers", type=int, help="并发拉取的板块数, 为空时使用 request.max_workers")
+    constituents.add_argument("--format", choices=["csv", "xlsx", "parquet", "feather"], help="覆盖 output.format")
+    constituents.add_argument("--consolidate", action="store_true", help="所有板块合并写入一个文件")
+    constituents.add_argument("--stream", action="store_true", help="逐页写入文件, 降低大板块的内存占用, 不支持 --consolidate")
+    constituents.set_defaults(func=cmd_constituents)
+
+    distribution = subparsers.add_parser("distribution", help="统计A股涨跌幅分布")
+    distribution.add_argument("--no-plot", action="store_true", help="不绘图, 不导入 matplotlib")
+    distribution.add_argument("--csv", help="统计结果保存为 csv")
+    distribution.add_argument("--snapshot", action="store_true", help="将获取的数据追加到快照存储")
+    distribution.set_defaults(func=cmd_distribution)
+
+    poll = subparsers.add_parser("poll", help="盘中轮询板块成分股, 只输出变化的行")
+    poll.add_argument("names", nargs="*", help="板块名称, 为空时使用 default_concepts 和 poll.boards")
+    poll.add_argument("--interval", type=float, help="覆盖 poll.interval（秒）")
+    poll.add_argument("--port", type=int, help="本地读取接口的端口, 0 表示不开启")
+    poll.add_argument("--rounds", type=int, help="执行指定轮数后退出, 为空时一直运行")
+    poll.add_argument("--format", choices=["csv", "xlsx", "parquet", "feather"], help="覆盖 output.format")
+    poll.set_defaults(func=cmd_poll)
+    return parser
+
+
+def main(argv=None) -> int:
+    args = build_parser().parse_args(argv)
+    timing = _Timing()
+    run_start = time.perf_counter()
+    try:
+        return args.func(args, timing)
+    finally:
+        if args.timing:
+            timing.report(run_start)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,84 @@
+import numpy as np
+import pandas as pd
+
+
+def _bucket_index(values: np.ndarray, bins: np.ndarray) -> np.ndarray:
+    """
+    计算每个值所在的区间下标, 与 pd.cut 的默认行为一致: 区间左开右闭 (a, b],
+    落在 bins 范围之外的值和 NaN 返回 -1.
+    """
+    n_bins = len(bins) - 1
+    idx = np.searchsorted(bins, values, side="left") - 1
+    idx[(idx >= n_bins) | np.isnan(values)] = -1
+    return idx
+
+
+def _convert_percentage(values: np.ndarray, row_ids: np.ndarray, n_rows: int) -> np.ndarray:
+    """按快照判断涨跌幅是否为小数形式 (最大值 < 1), 是则乘以 100"""
+    row_max = np.full(n_rows, -np.inf)
+    np.fmax.at(row_max, row_ids, values)  # fmax 忽略 NaN
+    return np.where(row_max[row_ids] < 1, values * 100, values)
+
+
+def bucket_counts(values, bins, row_ids=None, n_rows=None, convert_percentage: bool = False) -> np.ndarray:
+    """一次性统计多个快照的涨跌幅分布
+
+    Args:
+        values (array-like): 二维数组 (快照数 x 股票数, 不足的位置用 NaN 填充),
+            或与 row_ids 配合使用的一维数组.
+        bins (list): 区间边界, 与 pd.cut 的 bins 相同.
+        row_ids (array-like, optional): 一维 values 中每个值所属的快照编号 (0 ~ n_rows-1). Defaults to None.
+        n_rows (int, optional): 快照数量, 为空时取 row_ids 的最大值 + 1. Defaults to None.
+        convert_percentage (bool, optional): 快照内最大值 < 1 时视为小数并转为百分比. Defaults to False.
+
+    Returns:
+        np.ndarray: 形状为 (快照数, 区间数) 的计数矩阵.
+    """
+    values = np.asarray(values, dtype=np.float64)
+    bins = np.asarray(bins, dtype=np.float64)
+    n_bins = len(bins) - 1
+
+    if row_ids is None:
+        values = np.atleast_2d(values)
+        n_rows = values.shape[0]
+        row_ids = np.repeat(np.arange(n_rows), values.shape[1])
+        values = values.ravel()
+    else:
+        row_ids = np.asarray(row_ids, dtype=np.int64)
+        n_rows = n_rows if n_rows is not None else (int(row_ids.max()) + 1 if len(row_ids) else 0)
+
+    if convert_percentage and len(values):
+        values = _convert_percentage(values, row_ids, n_rows)
+
+    idx = _bucket_index(values, bins)
+    valid = idx >= 0
+    flat = row_ids[valid] * n_bins + idx[valid]
+    return np.bincount(flat, minlength=n_rows * n_bins).reshape(n_rows, n_bins)
+
+
+def distribution_matrix(
+    df: pd.DataFrame,
+    bins: list,
+    labels: list,
+    *,
+    date_column: str = "日期",
+    change_column: str = "涨跌幅",
+    convert_percentage: bool = True,
+) -> pd.DataFrame:
+    """将多个快照的长表数据统计为 日期 x 区间 的分布矩阵
+
+    Args:
+        df (pd.DataFrame): 每行一只股票在某个快照中的数据, 需包含 date_column 和 change_column.
+        bins (list): 区间边界.
+        labels (list): 区间名称, 数量为 len(bins) - 1.
+        date_column (str, optional): 快照标识列, 可以是日期或时间戳. Defaults to "日期".
+        change_column (str, optional): 涨跌幅列. Defaults to "涨跌幅".
+        convert_percentage (bool, optional): 快照内最大值 < 1 时视为小数并转为百分比. Defaults to True.
+
+    Returns:
+        pd.DataFrame: 行为快照 (按时间排序), 列为区间名称, 值为股票数量.
+    """
+    row_ids, dates = pd.factorize(df[date_column], sort=True)
+    values = pd.to_numeric(df[change_column], errors="coerce").to_numpy(dtype=np.float64)
+    counts = bucket_counts(values, bins, row_ids=row_ids, n_rows=len(dates), convert_percentage=convert_percentage)
+    return pd.DataFrame(counts, index=pd.Index(dates, name=date_column), columns=labels)
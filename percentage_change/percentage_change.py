@@ -1,11 +1,104 @@
 from datetime import datetime
-import akshare as ak
-import matplotlib.pyplot as plt
 import os
+import warnings
+import numpy as np
 import pandas as pd
 
-from typing import Optional
-from utils.config_loader import load_config
+from typing import Callable, Optional
+from percentage_change.distribution import bucket_counts
+from utils.config_loader import load_config, merge_config
+from utils.metrics import export_metrics, timed
+
+CONFIG_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "config.yaml")
+
+# config.yaml 的 schema, 加载时校验, 拼错的键名会直接报错并提示正确的键名
+CONFIG_SCHEMA = {
+    "data_processing": {"change_column": str, "convert_percentage": bool},
+    "category_config": {"bins": list, "labels": list},
+    "visualization": {
+        "enabled": bool,
+        "chart_type": str,
+        "title": str,
+        "x_label": str,
+        "y_label": str,
+        "rotation": (int, float),
+        "save_path": str,
+    },
+    "output": {"save_csv": bool, "csv_path": str},
+    "snapshot_store": {"enabled": bool, "directory": str, "keyframe_interval": int},
+    "metrics": {"path": str, "format": str},
+}
+
+
+def fetch_spot() -> pd.DataFrame:
+    """获取A股实时数据, akshare 只在需要联网获取时才导入"""
+    import akshare as ak
+
+    return ak.stock_zh_a_spot_em()
+
+
+def count_changes(
+    data,
+    bins: list,
+    labels: list,
+    *,
+    change_column: str = "涨跌幅",
+    convert_percentage: bool = True,
+) -> pd.Series:
+    """
+    统计涨跌幅分布, 纯计算, 不联网也不绘图.
+    data 可以是包含 change_column 列的 DataFrame, 也可以是涨跌幅数组.
+    """
+    if isinstance(data, pd.DataFrame):
+        if change_column not in data.columns:
+            raise KeyError(f"列名不匹配, 当前可用列名如下: {data.columns.tolist()}")
+        values = pd.to_numeric(data[change_column], errors="coerce").to_numpy(dtype=np.float64)
+    else:
+        values = np.asarray(data, dtype=np.float64)
+
+    # 涨跌幅为小数时转为百分比, 区间规则与 pd.cut 一致
+    counts = bucket_counts(values, bins, convert_percentage=convert_percentage)[0]
+    index = pd.CategoricalIndex(labels, categories=labels, ordered=True, name="category")
+    return pd.Series(counts, index=index, name="count")
+
+
+def render_distribution(category_count: pd.Series, vis_config: dict) -> str:
+    """绘制涨跌幅分布图并保存, 返回图片路径. matplotlib 只在绘图时以 Agg 后端导入"""
+    import matplotlib
+    matplotlib.use("Agg")
+    import matplotlib.pyplot as plt
+
+    # 创建图形和坐标轴
+    fig, ax = plt.subplots()
+
+    title=vis_config.get("title", "Distribution of A-share Price Changes")
+    xlabel=vis_config.get("x_label", "Price Change Range")
+    ylabel=vis_config.get("y_label", "Stock Count")
+    rot=vis_config.get("rotation", 45)
+
+    # 绘图
+    category_count.plot(kind=vis_config.get("chart_type", "bar"), ax=ax)
+    current_date = datetime.now().strftime("%Y-%m-%d")
+    ax.set_title(f"{title} ({current_date})")
+    ax.set_xlabel(xlabel)
+    ax.set_ylabel(ylabel)
+    plt.xticks(rotation=rot)
+    plt.tight_layout()
+
+    current_dir = os.path.dirname(os.path.abspath(__file__))
+    save_path = os.path.join(current_dir, vis_config.get("save_path", "stock_percentage_change.png"))
+    fig.savefig(save_path)
+    plt.close(fig)
+    return save_path
+
+
+def save_counts(category_count: pd.Series, output_config: dict):
+    """按输出配置保存统计结果"""
+    if output_config.get('save_csv', False):
+        csv_path = output_config.get('csv_path', 'stock_category_stats.csv')
+        category_count.to_csv(csv_path)
+        print(f"统计结果已保存至 {csv_path}")
+
 
 def get_percentage_change(
     bins: list,
@@ -14,66 +107,57 @@ def get_percentage_change(
     output_config: Optional[dict],
     *,
     change_column: str = "涨跌幅",
-    conver_percentage: bool = True,
-):
-    """统计每日A股涨跌幅"""
+    convert_percentage: bool = True,
+    fetcher: Callable[[], pd.DataFrame] = fetch_spot,
+    renderer: Callable[[pd.Series, dict], str] = render_distribution,
+    conver_percentage: Optional[bool] = None,
+) -> Optional[pd.Series]:
+    """统计每日A股涨跌幅
+
+    获取、统计、可视化和输出拆分为独立的步骤, fetcher 和 renderer 可以替换,
+    例如传入已缓存的快照或自定义的绘图函数. 可视化关闭时不会导入 matplotlib.
+    conver_percentage 是 convert_percentage 的旧名称, 仍然可用但已弃用.
+    """
+    if conver_percentage is not None:
+        warnings.warn("conver_percentage 已弃用, 请改用 convert_percentage", DeprecationWarning, stacklevel=2)
+        convert_percentage = conver_percentage
+    vis_config = vis_config or {}
+    output_config = output_config or {}
 
     # 获取A股实时数据
-    stock_df = ak.stock_zh_a_spot_em()
-    if change_column not in stock_df.columns:
-        print(f"列名不匹配, 当前可用列名如下: {stock_df.columns.tolist()}")
+    with timed("stage_seconds", stage="fetch_spot"):
+        stock_df = fetcher()
+    try:
+        with timed("stage_seconds", stage="count_changes"):
+            category_count = count_changes(
+                stock_df, bins, labels, change_column=change_column, convert_percentage=convert_percentage
+            )
+    except KeyError as e:
+        print(e.args[0])
         return None
 
-    # 处理涨跌幅格式, 为小数则转为百分百
-    if conver_percentage and stock_df[change_column].max() < 1:
-        stock_df[change_column] = stock_df[change_column] * 100
-
-    # 统计涨跌幅分布
-    stock_df["category"] = pd.cut(stock_df[change_column], bins=bins, labels=labels)
-    category_count = stock_df["category"].value_counts().sort_index()
-
     # 可视化
     if vis_config.get("enabled", True):
-        # 创建图形和坐标轴
-        fig, ax = plt.subplots()
-
-        title=vis_config.get("title", "Distribution of A-share Price Changes")
-        xlabel=vis_config.get("x_label", "Price Change Range")
-        ylabel=vis_config.get("y_label", "Stock Count")
-        rot=vis_config.get("rotation", 45)
-
-        # 绘图
-        category_count.plot(kind=vis_config.get("chart_type", "bar"), ax=ax)
-        current_date = datetime.now().strftime("%Y-%m-%d")
-        ax.set_title(f"{title} ({current_date})")
-        ax.set_xlabel(xlabel)
-        ax.set_ylabel(ylabel)
-        plt.xticks(rotation=rot)
-        plt.tight_layout()
-        # plt.show()
-
-        current_dir = os.path.dirname(os.path.abspath(__file__))
-        save_path = os.path.join(current_dir, vis_config.get("save_path", "stock_percentage_change.png"))
-        plt.savefig(save_path)
-
+        with timed("stage_seconds", stage="render"):
+            renderer(category_count, vis_config)
     else:
         print("可视化已被禁用")
         print(category_count)
 
     # 输出结果
-    if output_config.get('save_csv', False):
-        csv_path = output_config.get('csv_path', 'stock_category_stats.csv')
-        category_count.to_csv(csv_path)
-        print(f"统计结果已保存至 {csv_path}")
-    
+    with timed("stage_seconds", stage="save"):
+        save_counts(category_count, output_config)
+    return category_count
 
-def main():
-    config = load_config()
+
+def main(overrides: Optional[dict] = None, config_path: str = CONFIG_PATH):
+    """按 config.yaml 运行一次统计, overrides 按配置段覆盖其中的配置"""
+    config = merge_config(load_config(config_path, CONFIG_SCHEMA), overrides)
 
     # 数据处理配置
     processing_cfg = config.get("data_processing", {})
     change_column = processing_cfg.get("change_column", "涨跌幅")
-    conver_percentage = processing_cfg.get("conver_percentage", True)
+    convert_percentage = processing_cfg.get("convert_percentage", True)
 
     # 分类配置
     category_cfg = config.get("category_config", {})
@@ -84,17 +168,38 @@ def main():
     vis_config = config.get("visualization", {})
     output_config = config.get("output", {})
 
+    # 快照存储配置, 开启后每次获取的全市场数据都会追加到快照存储中
+    fetcher = fetch_spot
+    store_cfg = config.get("snapshot_store", {})
+    if store_cfg.get("enabled", False):
+        from percentage_change.snapshot_store import SpotSnapshotStore
+
+        current_dir = os.path.dirname(os.path.abspath(__file__))
+        store = SpotSnapshotStore(
+            os.path.join(current_dir, store_cfg.get("directory", "snapshots")),
+            keyframe_interval=store_cfg.get("keyframe_interval", 30),
+        )
+        fetcher = lambda: store.append(fetch_spot())
+
+    category_count = None
     try:
-        get_percentage_change(
+        category_count = get_percentage_change(
             bins=bins,
             labels=labels,
             vis_config=vis_config,
             output_config=output_config,
             change_column=change_column,
-            conver_percentage=conver_percentage
+            convert_percentage=convert_percentage,
+            fetcher=fetcher,
         )
     except Exception as e:
         print(f"统计过程中发生错误: {e}")
 
+    # 导出各步骤耗时
+    metrics_path = export_metrics(config.get("metrics"), os.path.dirname(os.path.abspath(__file__)))
+    if metrics_path:
+        print(f"指标已导出至 {metrics_path}")
+    return category_count
+
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
@@ -0,0 +1,199 @@
+import json
+import os
+from datetime import date, datetime, time
+from typing import Optional
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.feather as feather
+from utils.atomic import write_text_atomic
+
+
+class SpotSnapshotStore:
+    """
+    A 股实时行情快照的追加式存储.
+
+    目录结构:
+        root/
+          2024-06-03/
+            index.json          当日快照列表 [{"time", "file", "kind", "rows", "removed"}]
+            093000000000.arrow  完整快照 (kind=full), 文件名为 时分秒微秒
+            093100000000.arrow  只包含与上一快照相比发生变化或新增的行 (kind=delta)
+
+    每天的第一个快照以及每隔 keyframe_interval 个快照写一次完整快照, 其余写增量,
+    读取时从最近的完整快照开始依次应用增量还原, 还原后的行顺序不保证与写入时一致.
+    文件为 Arrow IPC 列式格式.
+    """
+
+    def __init__(self, root: str, key_column: str = "代码", keyframe_interval: int = 30,
+                 drop_columns: tuple = ("序号",)):
+        """
+        Args:
+            root (str): 存储根目录.
+            key_column (str, optional): 唯一标识一只股票的列. Defaults to "代码".
+            keyframe_interval (int, optional): 每隔多少个快照写一次完整快照. Defaults to 30.
+            drop_columns (tuple, optional): 写入前丢弃的列, 例如每次都会变化的排名序号. Defaults to ("序号",).
+        """
+        self.root = root
+        self.key_column = key_column
+        self.keyframe_interval = keyframe_interval
+        self.drop_columns = drop_columns
+        self._last = None  # (日期, 文件名, 最近一次写入的完整快照), 用于计算增量
+
+    # 索引
+
+    def _day_dir(self, day: date) -> str:
+        return os.path.join(self.root, day.isoformat())
+
+    def _read_index(self, day: date) -> list:
+        path = os.path.join(self._day_dir(day), "index.json")
+        if not os.path.exists(path):
+            return []
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+
+    def _write_index(self, day: date, entries: list):
+        path = os.path.join(self._day_dir(day), "index.json")
+        write_text_atomic(path, json.dumps(entries, ensure_ascii=False))
+
+    def days(self) -> list:
+        """已存储的日期列表"""
+        if not os.path.isdir(self.root):
+            return []
+        days = []
+        for name in sorted(os.listdir(self.root)):
+            try:
+                days.append(date.fromisoformat(name))
+            except ValueError:
+                continue
+        return days
+
+    # 写入
+
+    def _changed_rows(self, df: pd.DataFrame, prev: pd.DataFrame) -> pd.DataFrame:
+        """返回 df 中相对 prev 新增或任意列发生变化的行"""
+        cur = df.set_index(self.key_column)
+        old = prev.set_index(self.key_column).reindex(cur.index)
+        same = (cur == old) | (cur.isna() & old.isna())
+        return df[~same.all(axis=1).to_numpy()]
+
+    def append(self, df: pd.DataFrame, timestamp: Optional[datetime] = None) -> pd.DataFrame:
+        """追加一个快照, 返回写入前的原始 DataFrame, 方便串在获取数据的步骤之后"""
+        timestamp = timestamp or datetime.now()
+        day = timestamp.date()
+        data = df.drop(columns=[c for c in self.drop_columns if c in df.columns])
+        data = data.drop_duplicates(subset=self.key_column).reset_index(drop=True)
+
+        entries = self._read_index(day)
+        prev = self._latest(day, entries)
+        since_keyframe = 0
+        for entry in reversed(entries):
+            if entry["kind"] == "full":
+                break
+            since_keyframe += 1
+
+        if prev is None or since_keyframe + 1 >= self.keyframe_interval or list(prev.columns) != list(data.columns):
+            kind, stored, removed = "full", data, []
+        else:
+            kind = "delta"
+            stored = self._changed_rows(data, prev)
+            removed = sorted(set(prev[self.key_column]) - set(data[self.key_column]))
+
+        os.makedirs(self._day_dir(day), exist_ok=True)
+        file_name = f"{timestamp:%H%M%S%f}.arrow"
+        feather.write_feather(pa.Table.from_pandas(stored, preserve_index=False),
+                              os.path.join(self._day_dir(day), file_name), compression="uncompressed")
+        entries.append({"time": timestamp.isoformat(), "file": file_name, "kind": kind,
+                        "rows": len(stored), "removed": removed})
+        self._write_index(day, entries)
+        self._last = (day, file_name, data)
+        return df
+
+    # 读取
+
+    def _read_file(self, day: date, file_name: str, codes: Optional[list], columns: Optional[list]) -> pd.DataFrame:
+        read_columns = None if columns is None else [self.key_column] + [c for c in columns if c != self.key_column]
+        table = feather.read_table(os.path.join(self._day_dir(day), file_name), columns=read_columns, memory_map=True)
+        if codes is not None:
+            table = table.filter(pc.is_in(table[self.key_column], value_set=pa.array(codes)))
+        return table.to_pandas()
+
+    def _apply(self, state: Optional[pd.DataFrame], entry: dict, frame: pd.DataFrame) -> pd.DataFrame:
+        """在上一快照 state 上应用一条索引记录, 返回还原后的完整快照"""
+        if entry["kind"] == "full" or state is None:
+            return frame
+        removed = set(entry["removed"]) | set(frame[self.key_column])
+        kept = state[~state[self.key_column].isin(removed)]
+        return pd.concat([kept, frame], ignore_index=True)
+
+    def _replay(self, day: date, entries: list, codes=None, columns=None):
+        """从最近的完整快照开始依次还原, 逐个返回 (时间, 快照)"""
+        state = None
+        for entry in entries:
+            frame = self._read_file(day, entry["file"], codes, columns)
+            state = self._apply(state, entry, frame)
+            yield datetime.fromisoformat(entry["time"]), state
+
+    def _latest(self, day: date, entries: list) -> Optional[pd.DataFrame]:
+        if self._last is not None and entries and self._last[:2] == (day, entries[-1]["file"]):
+            return self._last[2]
+        if not entries:
+            return None
+        start = max(i for i, entry in enumerate(entries) if entry["kind"] == "full")
+        state = None
+        for _, state in self._replay(day, entries[start:]):
+            pass
+        return state
+
+    def query(self, start: datetime, end: datetime, codes: Optional[list] = None,
+              columns: Optional[list] = None) -> pd.DataFrame:
+        """按时间范围 [start, end] 和股票代码查询快照
+
+        Args:
+            start (datetime): 开始时间 (含), 传入 date 时从当天 0 点开始.
+            end (datetime): 结束时间 (含), 传入 date 时到当天结束.
+            codes (list, optional): 只返回这些股票, 过滤在读取文件时完成. Defaults to None.
+            columns (list, optional): 只读取这些列, 代码列总会被读取. Defaults to None.
+
+        Returns:
+            pd.DataFrame: 长表, 每行为某只股票在某个快照中的数据, 时间列为 "时间".
+        """
+        if not isinstance(start, datetime):
+            start = datetime.combine(start, time.min)
+        if not isinstance(end, datetime):
+            end = datetime.combine(end, time.max)
+
+        frames = []
+        for day in self.days():
+            if day < start.date() or day > end.date():
+                continue
+            entries = self._read_index(day)
+            times = [datetime.fromisoformat(entry["time"]) for entry in entries]
+            selected = [i for i, t in enumerate(times) if start <= t <= end]
+            if not selected:
+                continue
+            # 从第一个选中快照之前最近的完整快照开始还原
+            first = max(i for i in range(selected[0] + 1) if entries[i]["kind"] == "full")
+            for timestamp, state in self._replay(day, entries[first:selected[-1] + 1], codes, columns):
+                if timestamp >= start:
+                    frames.append(state.assign(时间=timestamp))
+
+        if not frames:
+            return pd.DataFrame(columns=["时间", self.key_column])
+        result = pd.concat(frames, ignore_index=True)
+        return result[["时间"] + [c for c in result.columns if c != "时间"]]
+
+    def load(self, timestamp: datetime) -> Optional[pd.DataFrame]:
+        """读取指定时间的快照, 不存在时返回 None"""
+        result = self.query(timestamp, timestamp)
+        if result.empty:
+            return None
+        return result.drop(columns="时间")
+
+    def disk_usage(self) -> int:
+        """存储占用的字节数"""
+        total = 0
+        for dirpath, _, filenames in os.walk(self.root):
+            total += sum(os.path.getsize(os.path.join(dirpath, name)) for name in filenames)
+        return total
@@ -0,0 +1,101 @@
+from typing import Iterable
+
+import numpy as np
+import pandas as pd
+
+BOARD_COLUMN = "板块名称"
+
+
+def stack_constituents(frames: Iterable, board_column: str = BOARD_COLUMN) -> pd.DataFrame:
+    """
+    把多个板块的成分股数据拼成一张长表, 新增板块列.
+    frames 为 (板块名称, 成分股 DataFrame) 的可迭代对象, 例如 fetch_many_concept_stocks 的返回值.
+    """
+    names, chunks = [], []
+    for board_name, df in frames:
+        names.append(np.full(len(df), board_name, dtype=object))
+        chunks.append(df)
+    if not chunks:
+        return pd.DataFrame(columns=[board_column])
+
+    stacked = pd.concat(chunks, ignore_index=True)
+    stacked.insert(0, board_column, pd.Categorical(np.concatenate(names)))
+    return stacked
+
+
+def _group_sum(ids: np.ndarray, weights: np.ndarray, n_groups: int) -> np.ndarray:
+    return np.bincount(ids, weights=weights, minlength=n_groups)
+
+
+def board_aggregates(
+    stacked: pd.DataFrame,
+    *,
+    board_column: str = BOARD_COLUMN,
+    change_column: str = "涨跌幅",
+    amount_column: str = "成交额",
+    name_column: str = "名称",
+) -> pd.DataFrame:
+    """
+    由成分股长表一次性计算所有板块的聚合指标, 按板块 id 分组做 bincount, 不逐个板块循环.
+    涨跌幅为空 (停牌等) 的股票只计入成分股数.
+
+    Args:
+        stacked (pd.DataFrame): 成分股长表, 见 stack_constituents.
+        board_column (str, optional): 板块列. Defaults to "板块名称".
+        change_column (str, optional): 涨跌幅列 (百分比). Defaults to "涨跌幅".
+        amount_column (str, optional): 成交额列, 用于加权. Defaults to "成交额".
+        name_column (str, optional): 股票名称列, 用于领涨股票. Defaults to "名称".
+
+    Returns:
+        pd.DataFrame: 每行一个板块, 列为
+            成分股数, 上涨家数, 下跌家数, 平盘家数, 涨跌比 ((上涨 - 下跌) / 有效家数),
+            平均涨跌幅, 成交额加权涨跌幅, 涨跌幅标准差, 总成交额, 领涨股票, 领涨股票-涨跌幅.
+    """
+    ids, boards = pd.factorize(stacked[board_column], sort=True)
+    n = len(boards)
+    change = pd.to_numeric(stacked[change_column], errors="coerce").to_numpy(dtype=np.float64, na_value=np.nan)
+    amount = pd.to_numeric(stacked[amount_column], errors="coerce").to_numpy(dtype=np.float64, na_value=np.nan)
+
+    valid = ~np.isnan(change)
+    change_valid = np.where(valid, change, 0.0)
+    total = np.bincount(ids, minlength=n)
+    valid_count = _group_sum(ids, valid.astype(np.float64), n)
+    up = _group_sum(ids, (change_valid > 0).astype(np.float64), n)
+    down = _group_sum(ids, (change_valid < 0).astype(np.float64), n)
+    flat = valid_count - up - down
+
+    with np.errstate(invalid="ignore", divide="ignore"):
+        mean = _group_sum(ids, change_valid, n) / valid_count
+        # 样本标准差 (ddof=1), 先减去组内均值再平方, 避免大数相减的精度损失
+        deviation = np.where(valid, change - mean[ids], 0.0)
+        std = np.sqrt(_group_sum(ids, deviation ** 2, n) / (valid_count - 1))
+
+        # 成交额加权涨跌幅, 只计入涨跌幅和成交额都有效的股票
+        weighted = valid & ~np.isnan(amount)
+        amount_valid = np.where(weighted, amount, 0.0)
+        amount_sum = _group_sum(ids, amount_valid, n)
+        weighted_change = _group_sum(ids, amount_valid * change_valid, n) / amount_sum
+        breadth = (up - down) / valid_count
+
+    # 领涨股票: 按 (板块, 涨跌幅) 排序后取每个板块的最后一行, NaN 排在最前
+    order = np.lexsort((np.where(valid, change, -np.inf), ids))
+    last = order[np.r_[np.flatnonzero(np.diff(ids[order])), len(order) - 1]] if len(order) else order
+    leader_name = np.full(n, None, dtype=object)
+    leader_change = np.full(n, np.nan)
+    has_leader = valid[last]
+    leader_name[ids[last][has_leader]] = stacked[name_column].to_numpy(dtype=object)[last][has_leader]
+    leader_change[ids[last][has_leader]] = change[last][has_leader]
+
+    return pd.DataFrame({
+        "成分股数": total,
+        "上涨家数": up.astype(np.int64),
+        "下跌家数": down.astype(np.int64),
+        "平盘家数": flat.astype(np.int64),
+        "涨跌比": breadth,
+        "平均涨跌幅": mean,
+        "成交额加权涨跌幅": np.where(amount_sum > 0, weighted_change, np.nan),
+        "涨跌幅标准差": std,
+        "总成交额": amount_sum,
+        "领涨股票": leader_name,
+        "领涨股票-涨跌幅": leader_change,
+    }, index=pd.Index(np.asarray(boards), name=board_column))
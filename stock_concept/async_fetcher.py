@@ -0,0 +1,223 @@
+import asyncio
+import os
+
+import pandas as pd
+from stock_concept.board_index import get_board_index, update_board_index
+from stock_concept.fetch_stock_concept import (
+    CONFIG_PATH,
+    PAGE_SIZE,
+    BaseConceptFetcher,
+    concept_page_request,
+    concept_stocks_page_request,
+    page_count,
+    page_total,
+    parse_concepts,
+    parse_stocks_page,
+)
+from stock_concept.schema import CONCEPT_CODE_SCHEMA, CONCEPT_SCHEMA, CONCEPT_STOCK_SCHEMA
+from utils.http_client import AsyncHttpClient
+from utils.metrics import export_metrics, timed
+
+
+class AsyncConceptStockFetcher(BaseConceptFetcher):
+    """
+    ConceptStockFetcher 的异步版本, 供 asyncio 调度器直接 await, 不再需要把同步请求放进线程.
+    与 ConceptStockFetcher 共用 BaseConceptFetcher 中的配置、缓存、输出逻辑以及模块级的分页和解析函数.
+    公开的联网方法都是以 _async 结尾的协程 (get_all_concepts_async / iter_concept_stocks_async /
+    fetch_many_concept_stocks_async), 不会被当作同步 fetcher 传给 build_membership_index 等同步调用方;
+    _get_json、_fetch_all_concepts、_get_board_code 等内部方法同样是协程, 但不带后缀.
+    读写缓存和保存文件通过 asyncio.to_thread 执行, 避免磁盘 IO 阻塞事件循环.
+    同时进行的请求数不超过 request.max_workers, 外层任务被取消时未完成的请求会一并取消.
+
+        async with AsyncConceptStockFetcher() as fetcher:
+            df = await fetcher.get_all_concepts_async()
+            async for name, stocks in fetcher.fetch_many_concept_stocks_async(["低空经济", "数字货币"]):
+                await fetcher.save_df_async(stocks, name)
+    """
+
+    def __init__(self, overrides: dict = None, config_path: str = CONFIG_PATH):
+        super().__init__(overrides, config_path)
+        self._semaphore = asyncio.Semaphore(self.request_max_workers)
+        self._index_lock = asyncio.Lock()
+
+    def _create_http_client(self, **kwargs) -> AsyncHttpClient:
+        return AsyncHttpClient(**kwargs)
+
+    async def _single_flight(self, key: tuple, fn, *args):
+        """同一个 key 的并发调用只执行一次 fn, 与其它线程和任务中相同 key 的调用共享结果"""
+        if self.single_flight is None:
+            return await fn(*args)
+        return self._shared(key, await self.single_flight.do_async(key, fn, *args))
+
+    async def _get_json(self, url: str, params: dict) -> dict:
+        """发出单个请求, 并发数受信号量限制, 临时性错误按 retry_policy 只重试这一个请求"""
+        async with self._semaphore:
+            return await self.retry_policy.call_async(self.http.get_json, url, params=params)
+
+    @timed("stage_seconds", stage="fetch_concepts")
+    async def _fetch_all_concepts(self, schema=CONCEPT_SCHEMA) -> pd.DataFrame:
+        """获取所有概念板块的 schema 中的字段, 第一页的结果复用, 之后的页面并发请求"""
+        first_page = await self._get_json(*concept_page_request(1, schema))
+        total_pages = page_count(first_page)
+        self.logger.info(f"总共 {total_pages} 页")
+
+        rest = await _gather(self._get_json(*concept_page_request(page, schema)) for page in range(2, total_pages + 1))
+        all_data = [first_page] + rest
+        self.logger.info(f"当前已加载 {len(all_data)} 页数据")
+        return self._compact(parse_concepts(all_data, schema), schema)
+
+    async def get_all_concepts_async(self, use_cache=True) -> pd.DataFrame:
+        """获取所有概念板块数据, 参数同 ConceptStockFetcher.get_all_concepts"""
+        if self.cache_enable and use_cache:
+            cache = await asyncio.to_thread(self._cached_concepts)
+            if cache is not None:
+                return cache
+
+        df = await self._single_flight(("concepts", CONCEPT_SCHEMA.fields_param), self._download_concepts)
+        update_board_index(df)
+        return df
+
+    async def _download_concepts(self) -> pd.DataFrame:
+        df = await self._fetch_all_concepts()
+
+        if self.cache_enable:
+            await asyncio.to_thread(self.cache.set, "all_concepts.pkl", df)
+        return df
+
+    async def _get_board_code(self, concept_name: str) -> str:
+        index = get_board_index()
+        if self._board_index_expired(index):
+            async with self._index_lock:
+                index = get_board_index()
+                if self._board_index_expired(index):
+                    index = await self._refresh_board_index()
+        return self._code_of(index, concept_name)
+
+    @timed("stage_seconds", stage="refresh_board_index")
+    async def _refresh_board_index(self):
+        """同 ConceptStockFetcher._refresh_board_index, 只请求名称和代码两个字段"""
+        index = await asyncio.to_thread(self._board_index_from_cache) if self.cache_enable else None
+        if index is not None:
+            return index
+
+        df = await self._single_flight(("concepts", CONCEPT_CODE_SCHEMA.fields_param), self._fetch_all_concepts, CONCEPT_CODE_SCHEMA)
+        stale = await asyncio.to_thread(self._stale_concept_codes) if self.cache_enable else None
+        return self._index_concept_codes(df, stale)
+
+    async def iter_concept_stocks_async(self, concept_name: str):
+        """以异步生成器逐页返回指定概念板块的成分股, 同 ConceptStockFetcher.iter_concept_stocks"""
+        page_num, page_size = 1, PAGE_SIZE
+        total = 0
+        start = 1
+
+        stock_board_code = await self._get_board_code(concept_name)
+
+        while True:
+            data_json = await self._get_json(*concept_stocks_page_request(stock_board_code, page_num, page_size))
+
+            if page_num == 1:
+                total = page_total(data_json)
+                self.logger.info(f"将开始拉取 {total} 条 {concept_name} 的股票")
+
+            page_df = parse_stocks_page(data_json, start)
+            start += len(page_df)
+            yield page_df
+
+            if page_num * page_size >= total:
+                break
+            page_num += 1
+
+    @timed("stage_seconds", stage="fetch_concept_stocks")
+    async def _fetch_concept_stocks(self, concept_name: str) -> pd.DataFrame:
+        key = ("concept_stocks", await self._get_board_code(concept_name), CONCEPT_STOCK_SCHEMA.fields_param)
+        return await self._single_flight(key, self._download_concept_stocks, concept_name)
+
+    async def _download_concept_stocks(self, concept_name: str) -> pd.DataFrame:
+        df = pd.concat([chunk async for chunk in self.iter_concept_stocks_async(concept_name)], ignore_index=True)
+        return self._compact(df, CONCEPT_STOCK_SCHEMA)
+
+    async def fetch_many_concept_stocks_async(self, concept_names, max_workers=None, failures: dict = None):
+        """
+        并发获取多个概念板块的成分股, 每完成一个板块就立即返回 (板块名称, DataFrame).
+        max_workers 限制同时拉取的板块数, 所有请求的总并发数仍受 request.max_workers 限制.
+        单个板块失败记录日志并写入 failures (同 ConceptStockFetcher.fetch_many_concept_stocks);
+        调用方提前结束迭代或任务被取消时, 其余板块的请求会被取消.
+        提前结束迭代时建议配合 contextlib.aclosing 使用, 以便立即取消而不是等到生成器被回收.
+        """
+        boards = asyncio.Semaphore(max_workers or self.request_max_workers)
+        tasks = [asyncio.ensure_future(self._fetch_concept_stocks_or_error(name, boards)) for name in concept_names]
+        try:
+            for future in asyncio.as_completed(tasks):
+                concept_name, df, error = await future
+                if error is not None:
+                    self.logger.error(f"获取板块 {concept_name} 成分股失败: {error}")
+                    if failures is not None:
+                        failures[concept_name] = error
+                    continue
+                yield concept_name, df
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+    async def _fetch_concept_stocks_or_error(self, concept_name: str, semaphore: asyncio.Semaphore) -> tuple:
+        async with semaphore:
+            try:
+                return concept_name, await self._fetch_concept_stocks(concept_name), None
+            except Exception as e:
+                return concept_name, None, e
+
+    async def save_df_async(self, df: pd.DataFrame, filename: str, append: bool = False):
+        await asyncio.to_thread(self.save_df, df, filename, append)
+
+    async def close(self):
+        await self.http.close()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        await self.close()
+
+
+async def _gather(coros) -> list:
+    """并发执行并按顺序返回结果, 任一失败或外层被取消时取消其余任务"""
+    tasks = [asyncio.ensure_future(coro) for coro in coros]
+    try:
+        return await asyncio.gather(*tasks)
+    finally:
+        for task in tasks:
+            task.cancel()
+
+
+async def run_async():
+    async with AsyncConceptStockFetcher() as fetcher:
+        all_concepts_df = await fetcher.get_all_concepts_async()
+        board_index = get_board_index()
+        if fetcher.config["output"].get("save_all_concepts", False):
+            name = fetcher.config["output"].get("all_concept_file_name", "所有概念板块")
+            await fetcher.save_df_async(all_concepts_df, name)
+
+        concept_names = []
+        for concept_name in fetcher.default_concepts:
+            if concept_name not in board_index:
+                fetcher.logger.warning(f"未找到板块：{concept_name}")
+                continue
+            concept_names.append(concept_name)
+
+        fetcher.logger.info(f"获取板块：{', '.join(concept_names)}")
+        failures = {}
+        async for concept_name, df in fetcher.fetch_many_concept_stocks_async(concept_names, failures=failures):
+            fetcher.writer.submit(df, concept_name)
+        await asyncio.to_thread(fetcher.writer.close)
+
+        metrics_path = export_metrics(fetcher.config.get("metrics"), os.path.dirname(os.path.abspath(__file__)))
+        if metrics_path:
+            fetcher.logger.info(f"指标已导出至 {metrics_path}")
+
+        if failures:
+            raise RuntimeError(f"{len(failures)} 个板块获取失败: {', '.join(failures)}")
+
+
+if __name__ == "__main__":
+    asyncio.run(run_async())
@@ -0,0 +1,66 @@
+import threading
+import time
+from typing import Optional
+
+import pandas as pd
+
+
+class BoardIndex:
+    """板块名称 <-> 板块代码 的双向索引, 查询为 O(1) 的字典查找"""
+
+    def __init__(self, names: list, codes: list, snapshot: Optional[str] = None, created_at: Optional[float] = None):
+        """
+        Args:
+            names (list): 板块名称列表.
+            codes (list): 与 names 一一对应的板块代码列表.
+            snapshot (str, optional): 索引所对应的概念板块快照标识, 相同快照不会重复构建. Defaults to None.
+            created_at (float, optional): 快照的生成时间戳, 用于判断索引是否过期. Defaults to 当前时间.
+        """
+        self.name_to_code = dict(zip(names, codes))
+        self.code_to_name = dict(zip(codes, names))
+        self.snapshot = snapshot
+        self.created_at = created_at if created_at is not None else time.time()
+
+    @classmethod
+    def from_frame(cls, df: pd.DataFrame, snapshot: Optional[str] = None, created_at: Optional[float] = None) -> "BoardIndex":
+        return cls(df["板块名称"].tolist(), df["板块代码"].tolist(), snapshot, created_at)
+
+    def code_of(self, name: str) -> Optional[str]:
+        return self.name_to_code.get(name)
+
+    def name_of(self, code: str) -> Optional[str]:
+        return self.code_to_name.get(code)
+
+    def is_expired(self, ttl_seconds: float) -> bool:
+        return time.time() - self.created_at > ttl_seconds
+
+    def __contains__(self, name: str) -> bool:
+        return name in self.name_to_code
+
+    def __len__(self) -> int:
+        return len(self.name_to_code)
+
+
+# 进程内共享的索引, 所有 ConceptStockFetcher 实例共用
+_lock = threading.Lock()
+_current: Optional[BoardIndex] = None
+
+
+def get_board_index() -> Optional[BoardIndex]:
+    """获取当前进程内的板块索引, 尚未构建时返回 None"""
+    return _current
+
+
+def update_board_index(df: pd.DataFrame, snapshot: Optional[str] = None, created_at: Optional[float] = None) -> BoardIndex:
+    """用概念板块快照刷新进程内索引, snapshot 与当前索引一致时直接复用"""
+    global _current
+    with _lock:
+        if _current is None or snapshot is None or _current.snapshot != snapshot:
+            _current = BoardIndex.from_frame(df, snapshot, created_at)
+        return _current
+
+
+def clear_board_index():
+    global _current
+    with _lock:
+        _current = None
@@ -1,39 +1,334 @@
 import math
 import os
-import time
-import akshare as ak
-import requests
+from abc import ABC, abstractmethod
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
 import pandas as pd
-from utils.cache import load_cache, save_cache
-from utils.config_loader import load_config
+from stock_concept.board_index import get_board_index, update_board_index
+from stock_concept.schema import CONCEPT_CODE_SCHEMA, CONCEPT_SCHEMA, CONCEPT_STOCK_SCHEMA
+from utils.cache import get_cache
+from utils.config_loader import load_config, merge_config
+from utils.dtypes import compact_frame
+from utils.http_client import HttpClient
 from utils.logger import setup_logger
-from utils.retry import retry
+from utils.metrics import export_metrics, get_metrics, timed
+from utils.output import OutputWriter
+from utils.atomic import write_atomic
+from utils.rate_limit import get_rate_limiter
+from utils.retry import RetryPolicy
+from utils.single_flight import get_single_flight
 
-class ConceptStockFetcher:
-    """东方财富概念板块获取类"""
+CONFIG_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "config.yaml")
+
+_NUMBER = (int, float)
+_BUCKET_SCHEMA = {"rate": _NUMBER, "burst": _NUMBER, "min_rate": _NUMBER, "max_rate": _NUMBER,
+                  "decrease_factor": _NUMBER, "increase_step": _NUMBER}
+
+# config.yaml 的 schema, 加载时校验, 拼错的键名会直接报错并提示正确的键名
+CONFIG_SCHEMA = {
+    "output": {
+        "save_all_concepts": bool,
+        "directory": str,
+        "format": str,
+        "all_concept_file_name": str,
+        "writer_workers": int,
+        "consolidate": bool,
+        "consolidated_file_name": str,
+    },
+    "cache": {
+        "enabled": bool,
+        "directory": str,
+        "expire_seconds": _NUMBER,
+        "memory_entries": int,
+        "max_entries": int,
+        "max_mb": _NUMBER,
+    },
+    "default_concepts": list,
+    "request": {
+        "concurrent": bool,
+        "max_workers": int,
+        "single_flight": bool,
+        "single_flight_processes": bool,
+        "single_flight_window": _NUMBER,
+    },
+    "http": {
+        "pool_connections": int,
+        "pool_maxsize": int,
+        "timeout": _NUMBER,
+        "connect_timeout": _NUMBER,
+        "base_url": str,
+    },
+    "memory": {"compact": bool},
+    "retry": {"max_attempts": int, "base_delay": _NUMBER, "max_delay": _NUMBER, "max_elapsed": _NUMBER},
+    "rate_limit": {"enabled": bool, "default": _BUCKET_SCHEMA, "hosts": dict},
+    "metrics": {"path": str, "format": str},
+    "poll": {
+        "interval": _NUMBER,
+        "concepts_interval": _NUMBER,
+        "boards": dict,
+        "http": {"enabled": bool, "host": str, "port": int},
+    },
+}
+
+
+PAGE_SIZE = 100  # 东方财富分页接口每页最多返回 100 条
+
+
+def concept_page_request(page: int, schema=CONCEPT_SCHEMA) -> tuple:
+    """概念板块列表第 page 页的请求地址和参数, 只请求 schema 中的字段"""
+    params = {
+        "pn": str(page),
+        "pz": str(PAGE_SIZE),
+        "po": "1",
+        "np": "2",
+        "ut": "bd1d9ddb04089700cf9c27f6f7426281",
+        "fltt": "2",
+        "invt": "2",
+        "fid": "f12",
+        "fs": "m:90 t:3 f:!50",
+        "fields": schema.fields_param,
+        "_": "1626075887768",
+    }
+    return "https://79.push2.eastmoney.com/api/qt/clist/get", params
+
+
+def concept_stocks_page_request(board_code: str, page: int, page_size: int = PAGE_SIZE) -> tuple:
+    """指定板块成分股第 page 页的请求地址和参数"""
+    params = {
+        "pn": str(page),
+        "pz": str(page_size),
+        "po": "1",
+        "np": "2",
+        "ut": "bd1d9ddb04089700cf9c27f6f7426281",
+        "fltt": "2",
+        "invt": "2",
+        "fid": "f3",
+        "fs": f"b:{board_code} f:!50",
+        "fields": CONCEPT_STOCK_SCHEMA.fields_param,
+        "_": "1626081702127",
+    }
+    return "https://29.push2.eastmoney.com/api/qt/clist/get", params
+
+
+def page_total(data_json: dict) -> int:
+    """分页响应中的总条数"""
+    return data_json["data"]["total"]
+
+
+def page_count(data_json: dict, page_size: int = PAGE_SIZE) -> int:
+    """由第一页响应中的总条数计算总页数"""
+    return math.ceil(page_total(data_json) / page_size)
+
+
+@timed("stage_seconds", stage="parse")
+def parse_concepts(pages: list, schema=CONCEPT_SCHEMA) -> pd.DataFrame:
+    """将按页码顺序排列的概念板块响应合并, 按 schema 解析为 DataFrame, 排名跨页连续"""
+    frames = []
+    for data_json in pages:
+        frames.append(schema.parse(data_json["data"]["diff"], start=sum(len(df) for df in frames) + 1))
+    return pd.concat(frames, ignore_index=True)
+
+
+@timed("stage_seconds", stage="parse")
+def parse_stocks_page(data_json: dict, start: int) -> pd.DataFrame:
+    """解析一页成分股响应, start 为这一页第一行的序号"""
+    return CONCEPT_STOCK_SCHEMA.parse(data_json["data"]["diff"], start)
+
+
+def concept_changes(cached: pd.DataFrame, fresh: pd.DataFrame) -> tuple:
+    """按板块代码对比两个概念板块快照, 返回 (新增的代码, 删除的代码), 均按代码排序"""
+    cached_codes = set(cached["板块代码"].astype(str))
+    fresh_codes = set(fresh["板块代码"].astype(str))
+    return sorted(fresh_codes - cached_codes), sorted(cached_codes - fresh_codes)
+
+
+class BaseConceptFetcher(ABC):
+    """
+    同步和异步 fetcher 共用的部分: 加载配置, 构造缓存、输出、重试和请求去重,
+    以及不联网的缓存读写、板块索引查找和数据压缩. 联网的方法由 ConceptStockFetcher
+    和 AsyncConceptStockFetcher 各自实现, 子类只需要提供 _create_http_client.
+    """
 
-    def __init__(self):
-        self.config = load_config()
+    def __init__(self, overrides: dict = None, config_path: str = CONFIG_PATH):
+        """
+        Args:
+            overrides (dict, optional): 按配置段覆盖 config.yaml 中的配置, 例如 {"output": {"format": "parquet"}}. Defaults to None.
+            config_path (str, optional): 配置文件路径. Defaults to 本目录下的 config.yaml.
+        """
+        self.config = merge_config(load_config(config_path, CONFIG_SCHEMA), overrides)
         self.logger = setup_logger()
 
         current_dir = os.path.dirname(os.path.abspath(__file__))
 
         # 缓存配置
-        self.cache_enable = self.config.get("cache", {}).get("enalbed", False)
+        self.cache_enable = self.config.get("cache", {}).get("enabled", False)
         self.cache_dir = os.path.join(current_dir, self.config.get("cache", {}).get("directory", "./cache"))
         self.cache_expire = self.config.get("cache", {}).get("expire_seconds", 3600)
+        max_mb = self.config.get("cache", {}).get("max_mb")
+        self.cache = get_cache(
+            self.cache_dir,
+            ttl_seconds=self.cache_expire,
+            memory_entries=self.config.get("cache", {}).get("memory_entries", 32),
+            max_entries=self.config.get("cache", {}).get("max_entries"),
+            max_bytes=max_mb * 1024 * 1024 if max_mb else None,
+        )
 
         # 输出配置
         self.output_dir = os.path.join(current_dir, self.config.get("output", {}).get("directory", "./output"))
         self.output_format = self.config.get("output", {}).get("format", "csv")
         self.default_concepts = self.config.get("default_concepts", [])
-        
+        self.writer = OutputWriter(
+            self.output_dir,
+            self.output_format,
+            max_workers=self.config.get("output", {}).get("writer_workers", 2),
+            consolidate=self.config.get("output", {}).get("consolidate", False),
+            consolidated_name=self.config.get("output", {}).get("consolidated_file_name", "概念板块成分股"),
+            logger=self.logger,
+        )
+
+        # 请求配置
+        self.request_concurrent = self.config.get("request", {}).get("concurrent", False)
+        self.request_max_workers = self.config.get("request", {}).get("max_workers", 4)
+
+        # 请求去重, 同一板块 + 字段的并发获取 (线程 / asyncio 任务, 开启 single_flight_processes 后包括共用缓存目录的其它进程) 只请求一次
+        request_cfg = self.config.get("request", {})
+        if request_cfg.get("single_flight", True):
+            processes = request_cfg.get("single_flight_processes", False)
+            self.single_flight = get_single_flight(
+                self.cache_dir if processes else None, window=request_cfg.get("single_flight_window", 0)
+            )
+        else:
+            self.single_flight = None
+
+        # 重试配置, 按单个页面重试, 已拉取的页面不受影响
+        retry_cfg = self.config.get("retry", {})
+        self.retry_policy = RetryPolicy(
+            max_attempts=retry_cfg.get("max_attempts", 5),
+            base_delay=retry_cfg.get("base_delay", 0.5),
+            max_delay=retry_cfg.get("max_delay", 10),
+            max_elapsed=retry_cfg.get("max_elapsed", 60),
+        )
+
+        # 内存配置
+        self.compact_dtypes = self.config.get("memory", {}).get("compact", False)
+
+        # HTTP 配置, 所有请求通过按 host 复用连接和限流的 HttpClient 发出
+        http_cfg = self.config.get("http", {})
+        rate_cfg = self.config.get("rate_limit", {})
+        self.http = self._create_http_client(
+            pool_connections=http_cfg.get("pool_connections", 2),
+            pool_maxsize=http_cfg.get("pool_maxsize", max(8, self.request_max_workers)),
+            timeout=http_cfg.get("timeout", 10),
+            connect_timeout=http_cfg.get("connect_timeout"),
+            base_url=http_cfg.get("base_url"),
+            rate_limiter=get_rate_limiter(rate_cfg) if rate_cfg.get("enabled", True) else None,
+        )
+
         os.makedirs(self.output_dir, exist_ok=True)
         if self.cache_enable:
             os.makedirs(self.cache_dir, exist_ok=True)
 
-    @retry()
-    def _fetch_all_concepts(self) -> pd.DataFrame:
+    @abstractmethod
+    def _create_http_client(self, **kwargs):
+        """创建发出请求的客户端, 同步版本为 HttpClient, 异步版本为 AsyncHttpClient"""
+
+    def _shared(self, key: tuple, result: tuple):
+        """记录 single_flight 复用的结果, 返回结果本身"""
+        value, shared = result
+        if shared:
+            self.logger.info(f"复用正在进行的相同请求: {key[0]} {' '.join(key[1:-1])}".rstrip())
+            get_metrics().inc("single_flight_shared_total", kind=key[0])
+        return value
+
+    @timed("stage_seconds", stage="compact")
+    def _compact(self, df: pd.DataFrame, schema) -> pd.DataFrame:
+        """按 schema 压缩列类型 (category / float32 / int16 等), 在缓存和保存前调用"""
+        if not self.compact_dtypes:
+            return df
+        df, report = compact_frame(df, schema.compact_dtypes)
+        self.logger.info(f"压缩数据类型: {report['before'] / 1024:.1f}KB -> {report['after'] / 1024:.1f}KB, "
+                         f"节省 {report['saved'] / 1024:.1f}KB")
+        return df
+
+    def _log_concept_changes(self, cached: pd.DataFrame, fresh: pd.DataFrame):
+        added, removed = concept_changes(cached, fresh)
+        if not added and not removed:
+            self.logger.info(f"概念板块没有增减, 共 {len(fresh)} 个")
+            return
+        names = dict(zip(fresh["板块代码"], fresh["板块名称"]))
+        names.update(zip(cached["板块代码"], cached["板块名称"]))
+        self.logger.info(f"概念板块新增 {len(added)} 个: {', '.join(names[code] for code in added[:10])}; "
+                         f"删除 {len(removed)} 个: {', '.join(names[code] for code in removed[:10])}")
+
+    def _cached_concepts(self):
+        """读取未过期的概念板块缓存并刷新板块索引, 没有可用的缓存时返回 None"""
+        cache = self.cache.get("all_concepts.pkl")
+        if cache is None:
+            return None
+        self.logger.info("使用缓存加载概念板块列表")
+        mtime = self.cache.mtime("all_concepts.pkl")
+        update_board_index(cache, snapshot=f"all_concepts@{mtime}", created_at=mtime)
+        return cache
+
+    def _stale_concept_codes(self):
+        """读取缓存中概念板块快照的名称和代码两列, 不论是否过期, 用于与重新拉取的板块列表对比"""
+        return self.cache.get("all_concepts.pkl", ttl_seconds=math.inf, columns=["板块名称", "板块代码"])
+
+    def _index_concept_codes(self, df: pd.DataFrame, stale):
+        """用只有名称和代码的板块列表刷新板块索引, 有旧快照时记录新增和删除的板块"""
+        if stale is not None:
+            self._log_concept_changes(stale, df)
+        return update_board_index(df)
+
+    def _board_index_from_cache(self):
+        """只读取缓存中的名称和代码两列重建板块索引, 没有缓存时返回 None"""
+        cache = self.cache.get("all_concepts.pkl", columns=["板块名称", "板块代码"])
+        mtime = self.cache.mtime("all_concepts.pkl")
+        if cache is None or mtime is None:
+            return None
+        return update_board_index(cache, snapshot=f"all_concepts@{mtime}", created_at=mtime)
+
+    def _board_index_expired(self, index) -> bool:
+        return index is None or index.is_expired(self.cache_expire)
+
+    @staticmethod
+    def _code_of(index, concept_name: str) -> str:
+        board_code = index.code_of(concept_name)
+        if board_code is None:
+            raise KeyError(f"未找到板块：{concept_name}")
+        return board_code
+
+    def save_df(self, df: pd.DataFrame, filename: str, append: bool = False):
+        """在当前线程保存 DataFrame, csv 格式下 append=True 时追加到已有文件末尾, 其它情况先写临时文件再替换"""
+        self.writer.write(df, filename, append=append)
+
+
+class ConceptStockFetcher(BaseConceptFetcher):
+    """东方财富概念板块获取类"""
+
+    def __init__(self, overrides: dict = None, config_path: str = CONFIG_PATH):
+        super().__init__(overrides, config_path)
+        self._index_lock = threading.Lock()
+
+    def _create_http_client(self, **kwargs) -> HttpClient:
+        return HttpClient(**kwargs)
+
+    def _single_flight(self, key: tuple, fn, *args):
+        """同一个 key 的并发调用只执行一次 fn, 其余调用方共享结果"""
+        if self.single_flight is None:
+            return fn(*args)
+        return self._shared(key, self.single_flight.do(key, fn, *args))
+
+    def _get_json(self, url: str, params: dict) -> dict:
+        """发出单个请求, 临时性错误按 retry_policy 只重试这一个请求"""
+        return self.retry_policy.call(self.http.get_json, url, params=params)
+
+    def _get_concept_page(self, page: int, schema=CONCEPT_SCHEMA) -> dict:
+        """请求概念板块列表的第 page 页"""
+        return self._get_json(*concept_page_request(page, schema))
+
+    @timed("stage_seconds", stage="fetch_concepts")
+    def _fetch_all_concepts(self, schema=CONCEPT_SCHEMA) -> pd.DataFrame:
         """
         获取东方财富网所有概念板块数据.
         原始接口 stock_board_concept_name_em() 虽然在代码中设置了返回 5w 条数据, 
@@ -41,246 +336,197 @@ class ConceptStockFetcher:
         这里复制了 stock_board_concept_name_em 的代码进行修改:
         1. 100 条 1 页的数据分多批拉取
         2. 使用更健壮的空值检查来自动停止分页
+        3. 第一页的结果复用; 开启 request.concurrent 后, 剩余页面在线程池中并发拉取, 频率由 rate_limit 配置的令牌桶控制
+        4. 只请求 schema 中的字段, 刷新板块索引时传入 CONCEPT_CODE_SCHEMA, 不拉取行情
         """
-        # 先获取总数据量
-        first_page_params = {
-            "pn": "1",
-            "pz": "100",
-            "po": "1",
-            "np": "2",
-            "ut": "bd1d9ddb04089700cf9c27f6f7426281",
-            "fltt": "2",
-            "invt": "2",
-            "fid": "f12",
-            "fs": "m:90 t:3 f:!50",
-            "fields": "f2,f3,f4,f8,f12,f14,f15,f16,f17,f18,f20,f21,f24,f25,f22,f33,f11,f62,f128,f124,f107,f104,f105,f136",
-            "_": "1626075887768",
-        }
-        r = requests.get("https://79.push2.eastmoney.com/api/qt/clist/get", params=first_page_params, timeout=10)
-        data_json = r.json()
-        total_items = data_json["data"]["total"]
-        total_pages = math.ceil(total_items / 100)  # 计算总页数
+        # 先获取总数据量, 第一页的数据直接复用, 不再重复请求
+        first_page = self._get_concept_page(1, schema)
+        total_pages = page_count(first_page)
         self.logger.info(f"总共 {total_pages} 页")
 
-        # 存储所有页面的数据
-        all_data = []
-
-        # 循环请求每一页数据
-        for page in range(1, total_pages + 1):
-            params = {
-                "pn": str(page),
-                "pz": "100",
-                "po": "1",
-                "np": "2",
-                "ut": "bd1d9ddb04089700cf9c27f6f7426281",
-                "fltt": "2",
-                "invt": "2",
-                "fid": "f12",
-                "fs": "m:90 t:3 f:!50",
-                "fields": "f2,f3,f4,f8,f12,f14,f15,f16,f17,f18,f20,f21,f24,f25,f22,f33,f11,f62,f128,f124,f107,f104,f105,f136",
-                "_": "1626075887768",
-            }
-            r = requests.get("https://79.push2.eastmoney.com/api/qt/clist/get", params=params)
-            data_json = r.json()
-
-            # 合并当前页数据到总数据
-            page_data = pd.DataFrame(data_json["data"]["diff"]).T
-            all_data.append(page_data)
-            self.logger.info(f"当前已加载 {len(all_data)} 页数据")
-            time.sleep(0.5)  # 添加短暂延迟防止请求过快
-        
-        # 转换为DataFrame
-        temp_df = pd.concat(all_data, axis=0)
-        temp_df.reset_index(inplace=True)
-        temp_df["index"] = range(1, len(temp_df) + 1)
-        temp_df.columns = [
-            "排名",
-            "最新价",
-            "涨跌幅",
-            "涨跌额",
-            "换手率",
-            "_",
-            "板块代码",
-            "板块名称",
-            "_",
-            "_",
-            "_",
-            "_",
-            "总市值",
-            "_",
-            "_",
-            "_",
-            "_",
-            "_",
-            "_",
-            "上涨家数",
-            "下跌家数",
-            "_",
-            "_",
-            "领涨股票",
-            "_",
-            "_",
-            "领涨股票-涨跌幅",
-        ]
-
-        temp_df = temp_df[
-            [
-                "排名",
-                "板块名称",
-                "板块代码",
-                "最新价",
-                "涨跌额",
-                "涨跌幅",
-                "总市值",
-                "换手率",
-                "上涨家数",
-                "下跌家数",
-                "领涨股票",
-                "领涨股票-涨跌幅",
-            ]
-        ]
-        numeric_cols = ["最新价", "涨跌额", "涨跌幅", "总市值", "换手率", "上涨家数", "下跌家数", "领涨股票-涨跌幅"]
-        temp_df[numeric_cols] = temp_df[numeric_cols].apply(pd.to_numeric, errors="coerce")
-        return temp_df
-
-    @retry()
-    def _fetch_concept_stocks(self, concept_name: str) -> pd.DataFrame:
+        # 存储所有页面的响应, 按页码顺序解析
+        all_data = [first_page]
+        rest_pages = range(2, total_pages + 1)
+
+        if self.request_concurrent and total_pages > 1:
+            # 并发请求剩余页面, executor.map 会按页码顺序返回结果
+            with ThreadPoolExecutor(max_workers=self.request_max_workers) as executor:
+                for data_json in executor.map(self._get_concept_page, rest_pages, [schema] * len(rest_pages)):
+                    all_data.append(data_json)
+                    self.logger.info(f"当前已加载 {len(all_data)} 页数据")
+        else:
+            # 循环请求每一页数据
+            for page in rest_pages:
+                data_json = self._get_concept_page(page, schema)
+                all_data.append(data_json)
+                self.logger.info(f"当前已加载 {len(all_data)} 页数据")
+
+        return self._compact(parse_concepts(all_data, schema), schema)
+
+    def _get_concept_stocks_page(self, board_code: str, page: int, page_size: int = PAGE_SIZE) -> dict:
+        """请求指定板块成分股的第 page 页"""
+        return self._get_json(*concept_stocks_page_request(board_code, page, page_size))
+
+    def iter_concept_stocks(self, concept_name: str):
         """
-        获取东方财富指定概念板块的成分股列表
+        获取东方财富指定概念板块的成分股列表, 按页逐块返回已经完成列名映射和类型转换的 DataFrame.
         akshare 的 stock_board_concept_cons_em 还会调用 stock_board_concept_name_em 函数
         stock_board_concept_name_em 本身也存在分页问题, 有可能你要查询的板块不在第一页, 然后函数报错
         同 _fetch_all_concepts, stock_board_concept_cons_em 因为本身也有分页问题, 所以本函数也需要重写 
         """
         # 初始化参数
-        page_num, page_size = 1, 100
-        all_data = []
+        page_num, page_size = 1, PAGE_SIZE
         total = 0  # 可获取的股票总数量
-        
-        cache_file = os.path.join(self.cache_dir, "all_concepts.pkl")
-        data = load_cache(cache_file, self.cache_expire)
-        if data is None:
-            data = self._fetch_all_concepts()
+        start = 1  # 当前页第一行的序号
 
-        stock_board_code = data[data["板块名称"] == concept_name]["板块代码"].values[0]
+        stock_board_code = self._get_board_code(concept_name)
 
         while True:
-            url = "https://29.push2.eastmoney.com/api/qt/clist/get"
-            params = {
-                "pn": str(page_num),
-                "pz": str(page_size),
-                "po": "1",
-                "np": "2",
-                "ut": "bd1d9ddb04089700cf9c27f6f7426281",
-                "fltt": "2",
-                "invt": "2",
-                "fid": "f3",
-                "fs": f"b:{stock_board_code} f:!50",
-                "fields": "f1,f2,f3,f4,f5,f6,f7,f8,f9,f10,f12,f13,f14,f15,f16,f17,f18,f20,f21,f23,"
-                "f24,f25,f22,f11,f62,f128,f136,f115,f152,f45",
-                "_": "1626081702127",
-            }
-            r = requests.get(url, params=params, timeout=10)
-            data_json = r.json()
+            data_json = self._get_concept_stocks_page(stock_board_code, page_num, page_size)
 
             # 第一次翻页时获取一下总数量
             if page_num == 1:
-                total = data_json["data"]["total"]
+                total = page_total(data_json)
                 self.logger.info(f"将开始拉取 {total} 条 {concept_name} 的股票")
 
-            page_data = pd.DataFrame(data_json["data"]["diff"]).T
-            all_data.append(page_data)
-            time.sleep(0.5)  # 添加短暂延迟防止请求过快
+            page_df = parse_stocks_page(data_json, start)
+            start += len(page_df)
+            yield page_df
 
             if page_num * page_size >= total:
                 break
             page_num += 1
 
-        temp_df = pd.concat(all_data, axis=0)
-        temp_df.reset_index(inplace=True)
-        temp_df["index"] = range(1, len(temp_df) + 1)
-
-        temp_df.columns = [
-            "序号",
-            "_",
-            "最新价",
-            "涨跌幅",
-            "涨跌额",
-            "成交量",
-            "成交额",
-            "振幅",
-            "换手率",
-            "市盈率-动态",
-            "_",
-            "_",
-            "代码",
-            "_",
-            "名称",
-            "最高",
-            "最低",
-            "今开",
-            "昨收",
-            "_",
-            "_",
-            "_",
-            "市净率",
-            "_",
-            "_",
-            "_",
-            "_",
-            "_",
-            "_",
-            "_",
-            "_",
-            "_",
-            "_",
-        ]
-        temp_df = temp_df[
-            [
-                "序号",
-                "代码",
-                "名称",
-                "最新价",
-                "涨跌幅",
-                "涨跌额",
-                "成交量",
-                "成交额",
-                "振幅",
-                "最高",
-                "最低",
-                "今开",
-                "昨收",
-                "换手率",
-                "市盈率-动态",
-                "市净率",
-            ]
-        ]
-
-        numeric_cols = ["最新价", "涨跌幅", "涨跌额", "成交量", "成交额", "振幅", "最高", "最低", "今开", "昨收", "换手率", "市盈率-动态", "市净率"]
-        temp_df[numeric_cols] = temp_df[numeric_cols].apply(pd.to_numeric, errors="coerce")
-        return temp_df
+    @timed("stage_seconds", stage="fetch_concept_stocks")
+    def _fetch_concept_stocks(self, concept_name: str) -> pd.DataFrame:
+        """获取指定概念板块的全部成分股, 同一板块的并发获取只请求一次"""
+        key = ("concept_stocks", self._get_board_code(concept_name), CONCEPT_STOCK_SCHEMA.fields_param)
+        return self._single_flight(key, self._download_concept_stocks, concept_name)
+
+    def _download_concept_stocks(self, concept_name: str) -> pd.DataFrame:
+        """合并 iter_concept_stocks 返回的所有分页"""
+        df = pd.concat(list(self.iter_concept_stocks(concept_name)), ignore_index=True)
+        return self._compact(df, CONCEPT_STOCK_SCHEMA)
+
+    def fetch_many_concept_stocks(self, concept_names, max_workers=None, failures: dict = None):
+        """
+        并发获取多个概念板块的成分股, 每完成一个板块就立即返回 (板块名称, DataFrame).
+        所有线程共用按 host 划分的令牌桶, 因此整体请求频率仍受 rate_limit 配置限制.
+        单个板块失败不影响其余板块, 失败的板块记录日志并写入 failures.
+
+        Args:
+            concept_names (list): 板块名称.
+            max_workers (int, optional): 同时拉取的板块数, 为空时使用 request.max_workers. Defaults to None.
+            failures (dict, optional): 传入时记录失败的板块, {板块名称: 异常}, 调用方据此判断结果是否完整. Defaults to None.
+        """
+        max_workers = max_workers or self.request_max_workers
+        executor = ThreadPoolExecutor(max_workers=max_workers)
+        try:
+            futures = {executor.submit(self._fetch_concept_stocks, name): name for name in concept_names}
+            for future in as_completed(futures):
+                concept_name = futures[future]
+                try:
+                    df = future.result()
+                except Exception as e:
+                    self.logger.error(f"获取板块 {concept_name} 成分股失败: {e}")
+                    if failures is not None:
+                        failures[concept_name] = e
+                    continue
+                yield concept_name, df
+        finally:
+            # 调用方提前结束迭代时, 取消还未开始的任务
+            executor.shutdown(wait=True, cancel_futures=True)
+
+    def _get_board_code(self, concept_name: str) -> str:
+        """
+        通过进程内共享的板块索引查找板块代码.
+        索引按概念板块快照构建一次, 过期后才重新调用 get_all_concepts 刷新.
+        """
+        index = get_board_index()
+        if self._board_index_expired(index):
+            with self._index_lock:
+                index = get_board_index()
+                if self._board_index_expired(index):
+                    index = self._refresh_board_index()
+        return self._code_of(index, concept_name)
+
+    @timed("stage_seconds", stage="refresh_board_index")
+    def _refresh_board_index(self):
+        """
+        刷新板块索引, 只需要名称和代码两列: 缓存未过期时从缓存读取, 否则只请求 f12 / f14 两个字段的全部页面,
+        不拉取行情字段, 也不写入概念板块缓存. 接口只能按页拉取, 末尾页面中的增删无法从前面的页面判断,
+        因此仍然拉取全部页面, 与旧快照按代码对比后记录新增和删除的板块.
+        """
+        index = self._board_index_from_cache() if self.cache_enable else None
+        if index is not None:
+            return index
+
+        df = self._single_flight(("concepts", CONCEPT_CODE_SCHEMA.fields_param), self._fetch_all_concepts, CONCEPT_CODE_SCHEMA)
+        return self._index_concept_codes(df, self._stale_concept_codes() if self.cache_enable else None)
 
     def get_all_concepts(self, use_cache=True):
-        """获取所有概念板块数据，支持从缓存加载"""
-        cache_file = os.path.join(self.cache_dir, "all_concepts.pkl")
+        """获取所有概念板块数据，支持从缓存加载, 并同步刷新进程内的板块索引
+
+        Args:
+            use_cache (bool, optional): 是否优先使用未过期的缓存. Defaults to True.
+        """
         if self.cache_enable and use_cache:
-            cache = load_cache(cache_file, self.cache_expire)
+            cache = self._cached_concepts()
             if cache is not None:
-                self.logger.info("使用缓存加载概念板块列表")
                 return cache
 
-        # 无缓存, 从网络获取最新数据, 并刷新缓存
+        df = self._single_flight(("concepts", CONCEPT_SCHEMA.fields_param), self._download_concepts)
+        update_board_index(df)
+        return df
+
+    def _download_concepts(self) -> pd.DataFrame:
+        """从网络获取概念板块列表并刷新缓存"""
         df = self._fetch_all_concepts()
+
+        # 刷新缓存
         if self.cache_enable:
-            save_cache(cache_file, df)
+            self.cache.set("all_concepts.pkl", df)
         return df
 
-    def save_df(self, df: pd.DataFrame, filename: str):
-        path = os.path.join(self.output_dir, f"{filename}.{self.output_format}")
-        if self.output_format == "csv":
-            df.to_csv(path, index=False, encoding="utf-8-sig")  # 使用utf-8-sig编码确保中文正常显示
+    def save_stream(self, chunks, filename: str) -> int:
+        """
+        边拉取边保存分块数据, 返回写入的总行数. 可选的流式保存接口, 需要调用方显式使用,
+        例如 save_stream(fetcher.iter_concept_stocks(name), name) 或 `cli.py constituents --stream`;
+        run() 和 fetch_many_concept_stocks 仍按板块合并后保存.
+        csv 逐块追加写入, parquet 每块写成一个 row group (全部写完后再替换目标文件),
+        其它格式无法追加, 合并后一次性保存.
+        """
+        rows = 0
+        if self.writer.fmt == "csv":
+            for i, chunk in enumerate(chunks):
+                self.save_df(chunk, filename, append=i > 0)
+                rows += len(chunk)
+        elif self.writer.fmt == "parquet":
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+
+            def _write(tmp_path):
+                nonlocal rows
+                writer = None
+                try:
+                    for chunk in chunks:
+                        table = pa.Table.from_pandas(chunk, preserve_index=False)
+                        if writer is None:
+                            writer = pq.ParquetWriter(tmp_path, table.schema)
+                        writer.write_table(table.cast(writer.schema))
+                        rows += len(chunk)
+                finally:
+                    if writer is not None:
+                        writer.close()
+
+            path = self.writer.path(filename)
+            write_atomic(path, _write)
+            self.logger.info(f"已保存至 {path}")
         else:
-            df.to_excel(path, index=False)
-        self.logger.info(f"已保存至 {path}")
+            df = pd.concat(list(chunks), ignore_index=True)
+            self.save_df(df, filename)
+            rows = len(df)
+        return rows
 
 
 def run():
@@ -288,21 +534,35 @@ def run():
 
     # 功能1: 获取全部概念板块
     all_concepts_df = fetcher.get_all_concepts()
+    board_index = get_board_index()
     if fetcher.config["output"].get("save_all_concepts", False):
         name = fetcher.config["output"].get("all_concept_file_name", "所有概念板块")
         fetcher.save_df(all_concepts_df, name)
 
     # 功能2: 获取默认监控板块的成分股
+    concept_names = []
     for concept_name in fetcher.default_concepts:
         # 检查概念板块是否存在
-        if concept_name not in all_concepts_df["板块名称"].values:
+        if concept_name not in board_index:
             fetcher.logger.warning(f"未找到板块：{concept_name}")
             continue
-        
-        # 获取和保存成分股数据
-        fetcher.logger.info(f"获取板块：{concept_name}")
-        df = fetcher._fetch_concept_stocks(concept_name)
-        fetcher.save_df(df, concept_name)
+        concept_names.append(concept_name)
+
+    # 并发获取成分股, 每完成一个板块就交给后台线程保存, 开启 output.consolidate 时合并为一个文件
+    fetcher.logger.info(f"获取板块：{', '.join(concept_names)}")
+    failures = {}
+    with fetcher.writer:
+        for concept_name, df in fetcher.fetch_many_concept_stocks(concept_names, failures=failures):
+            fetcher.writer.submit(df, concept_name)
+
+    # 导出本次运行的耗时、请求数、缓存命中等指标
+    metrics_path = export_metrics(fetcher.config.get("metrics"), os.path.dirname(os.path.abspath(__file__)))
+    if metrics_path:
+        fetcher.logger.info(f"指标已导出至 {metrics_path}")
+
+    # 其余板块已经保存, 最后再报告失败, 避免一个板块失败时整批数据都丢失
+    if failures:
+        raise RuntimeError(f"{len(failures)} 个板块获取失败: {', '.join(failures)}")
 
 
 if __name__ == "__main__":
@@ -0,0 +1,335 @@
+"""
+盘中轮询: 常驻内存的概念板块和成分股状态, 按板块各自的间隔刷新, 只输出发生变化的行.
+
+    python -m stock_concept.live            # 按 config.yaml 中 poll 配置轮询, 同时开启本地读取接口
+    curl http://127.0.0.1:8765/status       # 各表的行数、版本和更新时间
+    curl http://127.0.0.1:8765/concepts     # 当前的概念板块列表
+    curl http://127.0.0.1:8765/boards/低空经济  # 指定板块当前的成分股
+"""
+import heapq
+import json
+import os
+import threading
+import time
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import unquote, urlsplit
+
+import numpy as np
+import pandas as pd
+from stock_concept.fetch_stock_concept import ConceptStockFetcher
+from utils.metrics import export_metrics, get_metrics, timed
+
+CHANGE_COLUMN = "变更类型"
+ADDED, REMOVED, CHANGED = "新增", "删除", "变化"
+# 排名 / 序号随涨跌幅排序变化, 不作为行变化的依据
+IGNORED_COLUMNS = ("排名", "序号")
+
+
+def _comparable(series: pd.Series) -> np.ndarray:
+    """category 列之间不能直接比较 (类别不同时报错), 统一转为 object 数组"""
+    return series.to_numpy(dtype=object) if isinstance(series.dtype, pd.CategoricalDtype) else series.to_numpy()
+
+
+def diff_frames(old, new: pd.DataFrame, key: str, ignore=IGNORED_COLUMNS) -> pd.DataFrame:
+    """
+    按 key 列对比新旧两个快照, 返回发生变化的行, 第一列为变更类型 (新增 / 删除 / 变化).
+    新增和变化的行取新值, 删除的行取旧值; 两边都为空值视为没有变化. 没有变化时返回空 DataFrame.
+
+    Args:
+        old (pd.DataFrame): 上一次的快照, 为空时 new 的所有行都是新增.
+        new (pd.DataFrame): 最新的快照.
+        key (str): 行的唯一标识列, 如成分股的 代码、概念板块的 板块代码.
+        ignore (tuple, optional): 不参与比较的列. Defaults to ("排名", "序号").
+    """
+    new = new.drop_duplicates(key, keep="last")
+    if old is None or old.empty:
+        return new.assign(**{CHANGE_COLUMN: ADDED})[[CHANGE_COLUMN] + list(new.columns)].reset_index(drop=True)
+    old = old.drop_duplicates(key, keep="last")
+
+    old_keys, new_keys = old[key].to_numpy(dtype=object), new[key].to_numpy(dtype=object)
+    in_old = np.isin(new_keys, old_keys)
+    in_new = np.isin(old_keys, new_keys)
+
+    # 两边都有的行按 key 对齐后逐列比较
+    common = new[in_old]
+    previous = old.set_index(key).loc[common[key]]
+    changed = np.zeros(len(common), dtype=bool)
+    for column in common.columns:
+        if column == key or column in ignore or column not in previous.columns:
+            continue
+        a, b = _comparable(previous[column]), _comparable(common[column])
+        same = pd.isna(a) & pd.isna(b)
+        both = ~same & ~pd.isna(a) & ~pd.isna(b)
+        same[both] = a[both] == b[both]
+        changed |= ~same
+
+    parts = [
+        new[~in_old].assign(**{CHANGE_COLUMN: ADDED}),
+        common[changed].assign(**{CHANGE_COLUMN: CHANGED}),
+        old[~in_new].assign(**{CHANGE_COLUMN: REMOVED}),
+    ]
+    parts = [part for part in parts if not part.empty]
+    if not parts:
+        return new.iloc[0:0].assign(**{CHANGE_COLUMN: []})[[CHANGE_COLUMN] + list(new.columns)]
+    delta = pd.concat(parts, ignore_index=True)
+    return delta[[CHANGE_COLUMN] + [c for c in delta.columns if c != CHANGE_COLUMN]]
+
+
+class LiveState:
+    """
+    常驻内存的概念板块列表和成分股, 每次更新整体替换 DataFrame, 不原地修改,
+    因此读取方拿到的 DataFrame 不会被后续更新改变, 读取时不需要加锁.
+    """
+
+    def __init__(self):
+        self._concepts = None
+        self._boards = {}
+        self._status = {}  # 表名 -> {"rows", "version", "updated_at", "changed"}
+        self._lock = threading.Lock()
+
+    def _replace(self, name: str, old, df: pd.DataFrame, key: str) -> pd.DataFrame:
+        delta = diff_frames(old, df, key)
+        version = self._status.get(name, {}).get("version", 0) + 1
+        self._status[name] = {"rows": len(df), "version": version, "updated_at": time.time(), "changed": len(delta)}
+        return delta
+
+    def update_concepts(self, df: pd.DataFrame) -> pd.DataFrame:
+        """替换概念板块列表, 返回与上一版本的差异"""
+        with self._lock:
+            delta = self._replace("concepts", self._concepts, df, "板块代码")
+            self._concepts = df
+        return delta
+
+    def update_board(self, concept_name: str, df: pd.DataFrame) -> pd.DataFrame:
+        """替换指定板块的成分股, 返回与上一版本的差异"""
+        with self._lock:
+            delta = self._replace(concept_name, self._boards.get(concept_name), df, "代码")
+            self._boards[concept_name] = df
+        return delta
+
+    def concepts(self):
+        with self._lock:
+            return self._concepts
+
+    def board(self, concept_name: str):
+        with self._lock:
+            return self._boards.get(concept_name)
+
+    def status(self) -> dict:
+        with self._lock:
+            return {name: dict(status) for name, status in self._status.items()}
+
+
+def writer_sink(writer, clock=datetime.now):
+    """
+    把差异交给 OutputWriter 在后台保存.
+    csv 格式下每次的差异追加到同一个文件 {表名}_变更 的末尾; xlsx / parquet / feather 无法追加,
+    每次的差异写入单独的文件 {表名}_变更_{年月日_时分秒_微秒}, 不会覆盖之前的差异.
+    """
+    def _sink(name: str, delta: pd.DataFrame):
+        if writer.fmt == "csv":
+            writer.submit(delta, f"{name}_变更", append=True)
+        else:
+            writer.submit(delta, f"{name}_变更_{clock():%Y%m%d_%H%M%S_%f}")
+    return _sink
+
+
+class ConceptPoller:
+    """
+    盘中轮询器. 复用同一个 ConceptStockFetcher (连接池、限流、缓存、板块索引都保持常驻),
+    按各自的间隔刷新概念板块列表和跟踪的板块, 与内存中的上一版本对比后只把变化的行交给 sink.
+
+        poller = ConceptPoller(fetcher, boards={"低空经济": 30, "数字货币": 60})
+        poller.run()  # 在另一个线程中调用 poller.stop() 结束
+    """
+
+    def __init__(self, fetcher: ConceptStockFetcher, boards: dict, concepts_interval: float = 300,
+                 sink=None, concepts_name: str = "所有概念板块", clock=time.monotonic, writer=None):
+        """
+        Args:
+            fetcher (ConceptStockFetcher): 用于拉取数据的 fetcher.
+            boards (dict): 跟踪的板块名称 -> 刷新间隔（秒）.
+            concepts_interval (float, optional): 概念板块列表的刷新间隔（秒）. Defaults to 300.
+            sink (callable, optional): sink(表名, 差异 DataFrame), 只在有变化时调用, 为空时不输出. Defaults to None.
+            concepts_name (str, optional): 概念板块列表传给 sink 的表名. Defaults to "所有概念板块".
+            clock (callable, optional): 单调时钟, 测试时可替换. Defaults to time.monotonic.
+            writer (OutputWriter, optional): sink 使用的后台输出器, 每轮结束时清理已完成的写入并记录失败. Defaults to None.
+        """
+        self.fetcher = fetcher
+        self.boards = dict(boards)
+        self.concepts_interval = concepts_interval
+        self.sink = sink
+        self.concepts_name = concepts_name
+        self.clock = clock
+        self.writer = writer
+        self.state = LiveState()
+        self.logger = fetcher.logger
+
+        self._stop = threading.Event()
+        self._concepts_due = 0.0
+        # (到期时间, 板块名称) 小顶堆, 每轮只拉取已到期的板块
+        self._schedule = [(0.0, name) for name in self.boards]
+        heapq.heapify(self._schedule)
+
+    def _emit(self, name: str, delta: pd.DataFrame):
+        if delta.empty:
+            return
+        get_metrics().inc("poll_rows_changed_total", len(delta), table="concepts" if name == self.concepts_name else "board")
+        self.logger.info(f"{name} 变化 {len(delta)} 行")
+        if self.sink is not None:
+            self.sink(name, delta)
+
+    def _refresh_concepts(self):
+        df = self.fetcher.get_all_concepts(use_cache=False)
+        self._emit(self.concepts_name, self.state.update_concepts(df))
+
+    def _due_boards(self, now: float) -> list:
+        due = []
+        while self._schedule and self._schedule[0][0] <= now:
+            due.append(heapq.heappop(self._schedule)[1])
+        return due
+
+    @timed("stage_seconds", stage="poll")
+    def poll_once(self) -> list:
+        """刷新所有已到期的表, 返回本轮刷新的板块名称"""
+        now = self.clock()
+        if now >= self._concepts_due:
+            try:
+                self._refresh_concepts()
+            except Exception as e:
+                self.logger.error(f"刷新概念板块列表失败: {e}")
+            self._concepts_due = now + self.concepts_interval
+
+        due = self._due_boards(now)
+        # 失败的板块只记录日志, 下一个间隔再重试
+        for concept_name, df in self.fetcher.fetch_many_concept_stocks(due):
+            self._emit(concept_name, self.state.update_board(concept_name, df))
+        for concept_name in due:
+            heapq.heappush(self._schedule, (now + self.boards[concept_name], concept_name))
+        self._check_writes()
+        return due
+
+    def _check_writes(self):
+        """清理已完成的后台写入, 失败的写入记录日志, 不中断轮询"""
+        if self.writer is None:
+            return
+        for error in self.writer.prune():
+            get_metrics().inc("poll_write_errors_total")
+            self.logger.error(f"保存变更失败: {error}")
+
+    def seconds_until_due(self) -> float:
+        """距离下一个表到期的秒数"""
+        next_due = min([self._concepts_due] + [due for due, _ in self._schedule[:1]])
+        return max(0.0, next_due - self.clock())
+
+    def run(self, rounds: int = None):
+        """循环轮询直到 stop 被调用; rounds 不为空时最多执行 rounds 轮"""
+        self._stop.clear()
+        done = 0
+        while not self._stop.is_set() and (rounds is None or done < rounds):
+            self.poll_once()
+            done += 1
+            if rounds is None or done < rounds:
+                self._stop.wait(self.seconds_until_due())
+
+    def stop(self):
+        self._stop.set()
+
+
+class _StateHandler(BaseHTTPRequestHandler):
+    """只读接口: /status, /concepts, /boards/<板块名称>"""
+
+    def do_GET(self):
+        path = unquote(urlsplit(self.path).path).rstrip("/")
+        state = self.server.state
+        if path == "/status":
+            return self._send(200, state.status())
+        if path == "/concepts":
+            return self._send_frame(state.concepts())
+        if path.startswith("/boards/"):
+            return self._send_frame(state.board(path[len("/boards/"):]))
+        return self._send(404, {"error": f"未知的路径: {path}"})
+
+    def _send_frame(self, df):
+        if df is None:
+            return self._send(404, {"error": "暂无数据"})
+        # to_json 会把 NaN 写成 null, 并直接处理 numpy / pandas 的类型
+        return self._send_body(200, df.to_json(orient="records", force_ascii=False).encode("utf-8"))
+
+    def _send(self, status: int, payload):
+        self._send_body(status, json.dumps(payload, ensure_ascii=False).encode("utf-8"))
+
+    def _send_body(self, status: int, body: bytes):
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def serve_state(state: LiveState, host: str = "127.0.0.1", port: int = 8765) -> ThreadingHTTPServer:
+    """在后台线程中启动本地只读 HTTP 接口, 返回服务对象, 调用其 shutdown() 停止; port 为 0 时随机分配端口"""
+    server = ThreadingHTTPServer((host, port), _StateHandler)
+    server.daemon_threads = True
+    server.state = state
+    threading.Thread(target=server.serve_forever, name="live-state", daemon=True).start()
+    return server
+
+
+def create_poller(fetcher: ConceptStockFetcher, boards=None) -> ConceptPoller:
+    """
+    按 poll 配置创建轮询器. 跟踪的板块为 boards, 为空时使用 default_concepts 加上 poll.boards 中的板块;
+    poll.boards 中配置了间隔的板块按各自的间隔刷新, 其余使用 poll.interval. 变化的行写入输出目录.
+    """
+    poll_cfg = fetcher.config.get("poll", {})
+    interval = poll_cfg.get("interval", 60)
+    intervals = poll_cfg.get("boards") or {}
+    names = list(boards) if boards else list(fetcher.default_concepts) + list(intervals)
+    return ConceptPoller(
+        fetcher,
+        {name: intervals.get(name) or interval for name in dict.fromkeys(names)},
+        concepts_interval=poll_cfg.get("concepts_interval", 300),
+        sink=writer_sink(fetcher.writer),
+        concepts_name=fetcher.config.get("output", {}).get("all_concept_file_name", "所有概念板块"),
+        writer=fetcher.writer,
+    )
+
+
+def run_poll(boards=None, rounds: int = None, overrides: dict = None):
+    """
+    Args:
+        boards (list, optional): 跟踪的板块名称, 为空时按 poll 配置. Defaults to None.
+        rounds (int, optional): 执行指定轮数后退出, 为空时一直运行直到 Ctrl+C. Defaults to None.
+        overrides (dict, optional): 按配置段覆盖 config.yaml, 见 ConceptStockFetcher. Defaults to None.
+    """
+    fetcher = ConceptStockFetcher(overrides)
+    poller = create_poller(fetcher, boards)
+
+    http_cfg = fetcher.config.get("poll", {}).get("http", {})
+    server = None
+    if http_cfg.get("enabled", False):
+        server = serve_state(poller.state, http_cfg.get("host", "127.0.0.1"), http_cfg.get("port", 8765))
+        fetcher.logger.info(f"本地接口已启动: http://{server.server_address[0]}:{server.server_address[1]}/status")
+
+    fetcher.logger.info(f"开始轮询: {', '.join(f'{name}({seconds}s)' for name, seconds in poller.boards.items())}")
+    try:
+        with fetcher.writer:
+            poller.run(rounds)
+    except KeyboardInterrupt:
+        fetcher.logger.info("停止轮询")
+    finally:
+        if server is not None:
+            server.shutdown()
+            server.server_close()
+
+    metrics_path = export_metrics(fetcher.config.get("metrics"), os.path.dirname(os.path.abspath(__file__)))
+    if metrics_path:
+        fetcher.logger.info(f"指标已导出至 {metrics_path}")
+
+
+if __name__ == "__main__":
+    run_poll()
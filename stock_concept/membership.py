@@ -0,0 +1,173 @@
+import os
+from typing import Iterable, Optional
+
+import numpy as np
+from utils.atomic import write_atomic
+
+
+class MembershipIndex:
+    """
+    板块 <-> 成分股 的双向倒排索引.
+    板块和股票都映射为连续的整数 id, 成员关系按 CSR 格式存放:
+    board_indices[board_indptr[b]:board_indptr[b + 1]] 为板块 b 的股票 id (升序),
+    stock_indices[stock_indptr[s]:stock_indptr[s + 1]] 为股票 s 所属的板块 id (升序).
+    missing_boards 记录构建时获取失败、没有纳入索引的板块名称, 为空表示索引完整.
+    """
+
+    def __init__(self, board_codes, board_names, stock_codes, board_indptr, board_indices, missing_boards=()):
+        self.board_codes = np.asarray(board_codes, dtype=str)
+        self.board_names = np.asarray(board_names, dtype=str)
+        self.stock_codes = np.asarray(stock_codes, dtype=str)
+        self.board_indptr = np.asarray(board_indptr, dtype=np.int64)
+        self.board_indices = np.asarray(board_indices, dtype=np.int32)
+        self.missing_boards = np.asarray(missing_boards, dtype=str)
+
+        # 由 板块 -> 股票 转置出 股票 -> 板块
+        rows = np.repeat(np.arange(len(self.board_codes), dtype=np.int32), np.diff(self.board_indptr))
+        order = np.argsort(self.board_indices, kind="stable")
+        self.stock_indices = rows[order]
+        counts = np.bincount(self.board_indices, minlength=len(self.stock_codes))
+        self.stock_indptr = np.concatenate([[0], np.cumsum(counts)]).astype(np.int64)
+
+        self._board_ids = {code: i for i, code in enumerate(self.board_codes)}
+        self._board_ids.update({name: i for i, name in enumerate(self.board_names)})
+        self._stock_ids = {code: i for i, code in enumerate(self.stock_codes)}
+
+    @classmethod
+    def from_constituents(cls, constituents: Iterable, missing_boards=()) -> "MembershipIndex":
+        """由 (板块代码, 板块名称, 成分股代码列表) 构建索引, missing_boards 为没有获取到的板块名称"""
+        board_codes, board_names, members = [], [], []
+        stock_ids = {}
+        for board_code, board_name, stock_codes in constituents:
+            board_codes.append(board_code)
+            board_names.append(board_name)
+            ids = {stock_ids.setdefault(code, len(stock_ids)) for code in stock_codes}
+            members.append(np.array(sorted(ids), dtype=np.int32))
+
+        indptr = np.concatenate([[0], np.cumsum([len(m) for m in members])]).astype(np.int64)
+        indices = np.concatenate(members) if members else np.array([], dtype=np.int32)
+        stock_codes = np.array(list(stock_ids), dtype=str)
+        return cls(board_codes, board_names, stock_codes, indptr, indices, missing_boards)
+
+    # 持久化
+
+    def save(self, path: str):
+        """先写临时文件再替换, 读取方不会读到写了一半的索引"""
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+
+        def _write(tmp_path):
+            # 传入文件对象, np.savez 不会在文件名后追加 .npz
+            with open(tmp_path, "wb") as f:
+                np.savez(
+                    f,
+                    board_codes=self.board_codes,
+                    board_names=self.board_names,
+                    stock_codes=self.stock_codes,
+                    board_indptr=self.board_indptr,
+                    board_indices=self.board_indices,
+                    missing_boards=self.missing_boards,
+                )
+
+        write_atomic(path, _write)
+
+    @classmethod
+    def load(cls, path: str) -> "MembershipIndex":
+        with np.load(path) as data:
+            # 旧版本保存的索引没有 missing_boards
+            missing_boards = data["missing_boards"] if "missing_boards" in data.files else ()
+            return cls(data["board_codes"], data["board_names"], data["stock_codes"],
+                       data["board_indptr"], data["board_indices"], missing_boards)
+
+    # 查询
+
+    def _board_id(self, board: str) -> int:
+        """板块代码或名称 -> 板块 id"""
+        if board not in self._board_ids:
+            raise KeyError(f"未找到板块：{board}")
+        return self._board_ids[board]
+
+    def _members(self, board_id: int) -> np.ndarray:
+        return self.board_indices[self.board_indptr[board_id]:self.board_indptr[board_id + 1]]
+
+    def stocks_of(self, board: str) -> list:
+        """板块包含的股票代码"""
+        return self.stock_codes[self._members(self._board_id(board))].tolist()
+
+    def boards_of(self, stock_code: str) -> list:
+        """股票所属的板块名称, 股票不在任何板块中时返回空列表"""
+        stock_id = self._stock_ids.get(stock_code)
+        if stock_id is None:
+            return []
+        board_ids = self.stock_indices[self.stock_indptr[stock_id]:self.stock_indptr[stock_id + 1]]
+        return self.board_names[board_ids].tolist()
+
+    def overlap(self, *boards: str) -> list:
+        """同时属于所有给定板块的股票代码"""
+        ids = self._members(self._board_id(boards[0]))
+        for board in boards[1:]:
+            ids = np.intersect1d(ids, self._members(self._board_id(board)), assume_unique=True)
+        return self.stock_codes[ids].tolist()
+
+    def union(self, *boards: str) -> list:
+        """属于任一给定板块的股票代码"""
+        if not boards:
+            return []
+        ids = np.unique(np.concatenate([self._members(self._board_id(board)) for board in boards]))
+        return self.stock_codes[ids].tolist()
+
+    def top_cooccurring(self, board: str, k: int = 10) -> list:
+        """与给定板块共有成分股最多的 k 个板块, 返回 [(板块名称, 共有股票数)]"""
+        board_id = self._board_id(board)
+        stock_ids = self._members(board_id)
+        if len(stock_ids) == 0:
+            return []
+        # 这些股票所属的全部板块 id, 按板块计数即为共有股票数
+        starts, ends = self.stock_indptr[stock_ids], self.stock_indptr[stock_ids + 1]
+        lengths = ends - starts
+        positions = np.repeat(starts - np.concatenate([[0], np.cumsum(lengths)[:-1]]), lengths) + np.arange(lengths.sum())
+        counts = np.bincount(self.stock_indices[positions], minlength=len(self.board_codes))
+        counts[board_id] = 0
+
+        top = np.argsort(-counts, kind="stable")[:k]
+        return [(self.board_names[i], int(counts[i])) for i in top if counts[i] > 0]
+
+    @property
+    def complete(self) -> bool:
+        """构建时所有板块都获取成功"""
+        return len(self.missing_boards) == 0
+
+    def __len__(self) -> int:
+        return len(self.board_codes)
+
+
+def build_membership_index(fetcher, concept_names: Optional[list] = None, path: Optional[str] = None,
+                           max_workers: Optional[int] = None) -> MembershipIndex:
+    """
+    抓取所有 (或指定) 概念板块的成分股, 构建并保存成员关系索引.
+    获取失败的板块不纳入索引, 名称记录在索引的 missing_boards 中 (随 .npz 一起保存) 并输出警告.
+
+    Args:
+        fetcher (ConceptStockFetcher): 用于获取板块列表和成分股.
+        concept_names (list, optional): 需要纳入索引的板块名称, 为空时使用 get_all_concepts 的全部板块. Defaults to None.
+        path (str, optional): 索引保存路径. Defaults to 缓存目录下的 index/membership.npz, 子目录不参与缓存淘汰.
+        max_workers (int, optional): 并发抓取的线程数. Defaults to None.
+    """
+    if concept_names is None:
+        concept_names = fetcher.get_all_concepts()["板块名称"].tolist()
+
+    constituents, failures = [], {}
+    for concept_name, df in fetcher.fetch_many_concept_stocks(concept_names, max_workers=max_workers, failures=failures):
+        constituents.append((fetcher._get_board_code(concept_name), concept_name, df["代码"].tolist()))
+        fetcher.logger.info(f"成员关系索引: 已获取 {len(constituents)}/{len(concept_names)} 个板块")
+
+    # 按传入顺序记录缺失的板块, 结果与线程完成顺序无关
+    missing = [name for name in concept_names if name in failures]
+    index = MembershipIndex.from_constituents(constituents, missing_boards=missing)
+    path = path or os.path.join(fetcher.cache_dir, "index", "membership.npz")
+    index.save(path)
+    if missing:
+        fetcher.logger.warning(
+            f"成员关系索引不完整: {len(missing)}/{len(concept_names)} 个板块获取失败, 未纳入索引: {', '.join(missing)}"
+        )
+    fetcher.logger.info(f"成员关系索引已保存至 {path} ({len(constituents)}/{len(concept_names)} 个板块)")
+    return index
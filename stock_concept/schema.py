@@ -0,0 +1,118 @@
+from typing import NamedTuple, Optional
+
+import numpy as np
+import pandas as pd
+
+
+class Field(NamedTuple):
+    """东方财富接口字段: 字段代码 -> 中文列名 + 数据类型"""
+    code: str
+    name: str
+    dtype: str = "float64"  # str / float64 / int64
+    compact: Optional[str] = None  # 缓存和保存前压缩为的类型, 见 utils.dtypes.compact_frame
+
+
+class Schema:
+    """
+    按字段代码 (f2, f3, f12...) 描述接口返回的数据.
+    请求时只拉取 schema 中的字段, 解析时按字段代码取值, 不再依赖接口返回的字段顺序.
+    """
+
+    def __init__(self, fields: list, index_name: Optional[str] = None):
+        """
+        Args:
+            fields (list): Field 列表, 顺序即输出 DataFrame 的列顺序.
+            index_name (str, optional): 序号列的列名, 从 start 开始编号, 为空时不生成. Defaults to None.
+        """
+        self.fields = fields
+        self.index_name = index_name
+
+    @property
+    def columns(self) -> list:
+        names = [field.name for field in self.fields]
+        return [self.index_name] + names if self.index_name else names
+
+    @property
+    def compact_dtypes(self) -> dict:
+        """列名 -> 压缩类型, 传给 utils.dtypes.compact_frame"""
+        dtypes = {self.index_name: "int32"} if self.index_name else {}
+        dtypes.update({field.name: field.compact for field in self.fields if field.compact})
+        return dtypes
+
+    @property
+    def fields_param(self) -> str:
+        """请求参数 fields 的取值"""
+        return ",".join(field.code for field in self.fields)
+
+    def parse(self, diff, start: int = 1) -> pd.DataFrame:
+        """将接口返回的 data.diff 解析为带类型的 DataFrame
+
+        Args:
+            diff (dict | list): np=2 时为 {"0": {...}, "1": {...}}, 否则为列表.
+            start (int, optional): 序号列的起始值. Defaults to 1.
+        """
+        records = list(diff.values()) if isinstance(diff, dict) else list(diff or [])
+        columns = {}
+        if self.index_name:
+            columns[self.index_name] = np.arange(start, start + len(records), dtype=np.int64)
+
+        for field in self.fields:
+            raw = [record.get(field.code) for record in records]
+            if field.dtype == "str":
+                columns[field.name] = np.array(raw, dtype=object)
+                continue
+
+            try:
+                values = np.array(raw, dtype=np.float64)  # None 会直接转为 NaN
+            except (TypeError, ValueError):
+                # 停牌等情况下接口返回 "-", 统一转为 NaN
+                values = pd.to_numeric(pd.Series(raw, dtype=object), errors="coerce").to_numpy(dtype=np.float64)
+            if field.dtype == "int64" and not np.isnan(values).any():
+                values = values.astype(np.int64)
+            columns[field.name] = values
+
+        return pd.DataFrame(columns, columns=self.columns)
+
+
+# 概念板块列表
+CONCEPT_SCHEMA = Schema(
+    [
+        Field("f14", "板块名称", "str", "string"),
+        Field("f12", "板块代码", "str", "string"),
+        Field("f2", "最新价", compact="float32"),
+        Field("f4", "涨跌额", compact="float32"),
+        Field("f3", "涨跌幅", compact="float32"),
+        Field("f20", "总市值"),
+        Field("f8", "换手率", compact="float32"),
+        Field("f104", "上涨家数", "int64", "int16"),
+        Field("f105", "下跌家数", "int64", "int16"),
+        Field("f128", "领涨股票", "str", "category"),
+        Field("f136", "领涨股票-涨跌幅", compact="float32"),
+    ],
+    index_name="排名",
+)
+
+# 只有名称和代码的概念板块列表, 刷新板块索引时使用, 不拉取行情字段
+CONCEPT_CODE_SCHEMA = Schema([field for field in CONCEPT_SCHEMA.fields if field.code in ("f14", "f12")])
+
+# 概念板块成分股
+CONCEPT_STOCK_SCHEMA = Schema(
+    [
+        Field("f12", "代码", "str", "string"),
+        Field("f14", "名称", "str", "string"),
+        Field("f2", "最新价", compact="float32"),
+        Field("f3", "涨跌幅", compact="float32"),
+        Field("f4", "涨跌额", compact="float32"),
+        Field("f5", "成交量"),
+        Field("f6", "成交额"),
+        Field("f7", "振幅", compact="float32"),
+        Field("f15", "最高", compact="float32"),
+        Field("f16", "最低", compact="float32"),
+        Field("f17", "今开", compact="float32"),
+        Field("f18", "昨收", compact="float32"),
+        Field("f8", "换手率", compact="float32"),
+        Field("f9", "市盈率-动态", compact="float32"),
+        Field("f23", "市净率", compact="float32"),
+    ],
+    index_name="序号",
+)
@@ -0,0 +1,125 @@
+"""
+测试共用的东方财富 clist/get 替身服务, 以及指向它、输出和缓存都放在临时目录中的 fetcher.
+
+    with EastmoneyStub(boards={"BK1000": "概念1000"}, stocks={"BK1000": 250}) as stub:
+        fetcher = make_fetcher(ConceptStockFetcher, stub, tmp_dir)
+"""
+import json
+import os
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+
+class _EastmoneyHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    # 响应头和响应体分两次发送, 关闭 Nagle 算法避免 keep-alive 连接上的 40ms 延迟确认
+    disable_nagle_algorithm = True
+
+    def do_GET(self):
+        stub = self.server.stub
+        params = {k: v[0] for k, v in parse_qs(urlsplit(self.path).query).items()}
+        page, size = int(params["pn"]), int(params["pz"])
+        concepts = params["fs"].startswith("m:90")
+        code = None if concepts else params["fs"].split()[0][2:]
+
+        with stub.lock:
+            stub.requests.append(("concepts" if concepts else "stocks", code, page))
+            stub.fields.append(params["fields"])
+            stub.in_flight += 1
+            stub.max_in_flight = max(stub.max_in_flight, stub.in_flight)
+            boards = sorted(stub.boards.items(), reverse=True)
+            throttled = concepts and page in stub.throttled
+            stub.throttled.discard(page)
+        try:
+            time.sleep(stub.latency + (stub.delays.get(page, 0) if concepts else stub.stock_delays.get(code, 0)))
+            if throttled:
+                return self._send(b'{"rc": 0, "data": null}')
+            if code in stub.fail_codes:
+                return self.send_error(404)
+
+            if concepts:
+                rows = [{"f12": c, "f14": name, "f3": stub.changes.get(c, 1.0)} for c, name in boards]
+            else:
+                rows = [{"f12": f"{i:06d}", "f14": f"股票{i}", "f3": 0.5} for i in range(stub.stocks.get(code, 0))]
+            self._send(json.dumps({"data": {"total": len(rows), "diff": rows[(page - 1) * size:page * size]}}).encode())
+        finally:
+            with stub.lock:
+                stub.in_flight -= 1
+
+    def _send(self, body: bytes):
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class EastmoneyStub:
+    """
+    概念板块按代码降序分页, 成分股按 fs 中的板块代码返回, 以下属性在测试中可以随时修改:
+        boards: {板块代码: 板块名称}; stocks: {板块代码: 成分股数量}; changes: {板块代码: 涨跌幅}
+        latency: 每个请求的延迟; delays / stock_delays: 指定概念板块页码 / 指定板块的额外延迟
+        fail_codes: 返回 404 的板块; throttled: 第一次请求时返回 data 为空的概念板块页码 (东方财富的软限流)
+    requests 按到达顺序记录 (类型, 板块代码, 页码), fields 记录每个请求的 fields 参数,
+    max_in_flight 为同时处理中的最大请求数.
+    """
+
+    def __init__(self, boards: dict = None, stocks: dict = None, latency: float = 0.0):
+        self.boards = dict(boards or {})
+        self.stocks = dict(stocks or {})
+        self.changes = {}
+        self.latency = latency
+        self.delays = {}
+        self.stock_delays = {}
+        self.fail_codes = set()
+        self.throttled = set()
+        self.requests = []
+        self.fields = []
+        self.in_flight = self.max_in_flight = 0
+        self.lock = threading.Lock()
+
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", 0), _EastmoneyHandler)
+        self.httpd.daemon_threads = True
+        self.httpd.stub = self
+        self.url = f"http://127.0.0.1:{self.httpd.server_address[1]}"
+
+    def pages(self, kind: str = "concepts") -> list:
+        """按到达顺序返回指定类型请求的页码"""
+        return [page for k, _, page in self.requests if k == kind]
+
+    def start(self):
+        threading.Thread(target=self.httpd.serve_forever, daemon=True).start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.stop()
+
+
+def make_fetcher(cls, stub: EastmoneyStub, directory: str, **overrides):
+    """
+    构造指向替身服务的 fetcher: 输出和缓存目录都在 directory 下, 默认关闭缓存、请求去重和限流,
+    重试间隔缩短. overrides 按配置段覆盖这些默认值.
+    """
+    config = {
+        "output": {"directory": os.path.join(directory, "output")},
+        "cache": {"enabled": False, "directory": os.path.join(directory, "cache")},
+        "http": {"base_url": stub.url, "timeout": 5},
+        "request": {"single_flight": False},
+        "retry": {"max_attempts": 2, "base_delay": 0.01, "max_delay": 0.01},
+        "rate_limit": {"enabled": False},
+    }
+    for section, values in overrides.items():
+        config[section] = {**config.get(section, {}), **values}
+    return cls(config)
@@ -0,0 +1,54 @@
+import unittest
+
+import numpy as np
+import pandas as pd
+from stock_concept.analytics import board_aggregates, stack_constituents
+
+
+class TestAnalytics(unittest.TestCase):
+
+    def setUp(self):
+        self.stacked = stack_constituents([
+            ("低空经济", pd.DataFrame({"名称": ["A", "B", "C", "D"], "涨跌幅": [2.0, -1.0, 0.0, 5.0],
+                                     "成交额": [100.0, 300.0, 50.0, 50.0]})),
+            ("数字货币", pd.DataFrame({"名称": ["A", "E", "F"], "涨跌幅": [2.0, np.nan, -3.0],
+                                     "成交额": [100.0, np.nan, 100.0]})),
+            ("空板块", pd.DataFrame({"名称": [], "涨跌幅": [], "成交额": []})),
+        ])
+
+    def test_aggregates(self):
+        """测试：涨跌家数、涨跌比、成交额加权涨跌幅和领涨股票"""
+        result = board_aggregates(self.stacked)
+        self.assertEqual(result.index.tolist(), ["低空经济", "数字货币"])
+
+        row = result.loc["低空经济"]
+        self.assertEqual((row["成分股数"], row["上涨家数"], row["下跌家数"], row["平盘家数"]), (4, 2, 1, 1))
+        self.assertAlmostEqual(row["涨跌比"], 0.25)
+        self.assertAlmostEqual(row["成交额加权涨跌幅"], (200 - 300 + 0 + 250) / 500)
+        self.assertEqual((row["领涨股票"], row["领涨股票-涨跌幅"]), ("D", 5.0))
+
+        # 停牌股只计入成分股数
+        row = result.loc["数字货币"]
+        self.assertEqual((row["成分股数"], row["上涨家数"], row["下跌家数"]), (3, 1, 1))
+        self.assertAlmostEqual(row["平均涨跌幅"], -0.5)
+        self.assertEqual(row["领涨股票"], "A")
+
+    def test_matches_groupby(self):
+        """测试：随机数据下与 pandas groupby 逐板块计算的结果一致"""
+        rng = np.random.default_rng(0)
+        stacked = pd.DataFrame({
+            "板块名称": rng.integers(0, 50, 5000).astype(str),
+            "名称": np.arange(5000).astype(str),
+            "涨跌幅": np.where(rng.random(5000) < 0.05, np.nan, rng.normal(0, 3, 5000).round(2)),
+            "成交额": rng.uniform(1e6, 1e9, 5000),
+        })
+        result = board_aggregates(stacked)
+        grouped = stacked.groupby("板块名称")["涨跌幅"]
+        np.testing.assert_allclose(result["平均涨跌幅"], grouped.mean())
+        np.testing.assert_allclose(result["涨跌幅标准差"], grouped.std())
+        np.testing.assert_array_equal(result["上涨家数"], grouped.apply(lambda s: (s > 0).sum()))
+        np.testing.assert_allclose(result["领涨股票-涨跌幅"], grouped.max())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,100 @@
+import asyncio
+import contextlib
+import tempfile
+import time
+import unittest
+
+try:
+    import httpx
+except ImportError:
+    httpx = None
+
+from stock_concept.board_index import clear_board_index
+from test.eastmoney_stub import EastmoneyStub, make_fetcher
+
+BOARDS = {f"BK{1000 + i}": (f"概念{i}", 30 + 60 * i) for i in range(5)}
+
+
+@unittest.skipIf(httpx is None, "需要安装 httpx")
+class TestAsyncConceptStockFetcher(unittest.TestCase):
+
+    def setUp(self):
+        from stock_concept.async_fetcher import AsyncConceptStockFetcher
+
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.server = EastmoneyStub(
+            boards={code: name for code, (name, _) in BOARDS.items()},
+            stocks={code: n for code, (_, n) in BOARDS.items()},
+            latency=0.02,
+        ).start()
+        clear_board_index()
+        self.fetcher = make_fetcher(
+            AsyncConceptStockFetcher, self.server, self.tmp_dir.name, request={"single_flight": True, "max_workers": 2}
+        )
+
+    def tearDown(self):
+        clear_board_index()
+        self.server.stop()
+        self.tmp_dir.cleanup()
+
+    def test_fetch_concepts_and_stocks(self):
+        """测试：异步获取板块列表和多个板块的成分股, 同时进行的请求数不超过上限"""
+        async def main():
+            async with self.fetcher:
+                concepts = await self.fetcher.get_all_concepts_async()
+                names = concepts["板块名称"].tolist() + ["不存在的板块"]
+                return concepts, {name: df async for name, df in self.fetcher.fetch_many_concept_stocks_async(names)}
+
+        concepts, stocks = asyncio.run(main())
+        self.assertEqual(len(concepts), len(BOARDS))
+        # 不存在的板块只记录日志, 不影响其它板块
+        self.assertEqual({name: len(df) for name, df in stocks.items()}, {name: n for name, n in BOARDS.values()})
+        self.assertEqual(stocks["概念4"]["序号"].tolist(), list(range(1, 271)))
+        self.assertLessEqual(self.server.max_in_flight, 2)
+
+    def test_concurrent_same_board_requested_once(self):
+        """测试：并发获取同一个板块时只请求一次, 调用方共享结果"""
+        async def main():
+            async with self.fetcher:
+                await self.fetcher.get_all_concepts_async()
+                return await asyncio.gather(*(self.fetcher._fetch_concept_stocks("概念4") for _ in range(3)))
+
+        results = asyncio.run(main())
+        self.assertTrue(all(df is results[0] for df in results))
+        # 板块列表 1 页 + 概念4 成分股 3 页
+        self.assertEqual(len(self.server.requests), 1 + 3)
+
+    def test_early_exit_cancels_pending(self):
+        """测试：提前结束迭代时, 其余板块的请求被取消"""
+        async def main():
+            async with self.fetcher:
+                await self.fetcher.get_all_concepts_async()
+                names = [name for name, _ in BOARDS.values()]
+                stream = self.fetcher.fetch_many_concept_stocks_async(names, max_workers=1)
+                async with contextlib.aclosing(stream):
+                    async for name, df in stream:
+                        return name
+
+        first = asyncio.run(main())
+        self.assertIn(first, [name for name, _ in BOARDS.values()])
+        # 5 个板块共 9 页成分股, 提前结束后不再发出新的请求
+        requests_at_exit = len(self.server.requests)
+        time.sleep(0.2)
+        self.assertEqual(len(self.server.requests), requests_at_exit)
+        self.assertLess(requests_at_exit, 1 + 9)
+
+    def test_not_a_sync_fetcher(self):
+        """测试：异步 fetcher 不提供同名的同步方法, 误传给同步调用方时直接报错而不是返回协程"""
+        from stock_concept.fetch_stock_concept import BaseConceptFetcher, ConceptStockFetcher
+        from stock_concept.membership import build_membership_index
+
+        self.assertNotIsInstance(self.fetcher, ConceptStockFetcher)
+        with self.assertRaises(TypeError):
+            BaseConceptFetcher()
+        with self.assertRaises(AttributeError):
+            build_membership_index(self.fetcher)
+        asyncio.run(self.fetcher.close())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,45 @@
+import os
+import tempfile
+import unittest
+
+from bench.fixtures import load_fixtures, synthesize
+from bench.run import compare, run_benchmarks
+from stock_concept.schema import CONCEPT_STOCK_SCHEMA
+
+
+class TestBench(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.fixture_dir = synthesize(os.path.join(self.tmp.name, "fixtures"), n_concepts=120,
+                                      stocks_per_board=(5, 150))
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_synthesized_fixtures(self):
+        """测试：合成数据与接口结构一致, 可以按 schema 解析"""
+        fixtures = load_fixtures(self.fixture_dir)
+        self.assertEqual(sorted(fixtures["concepts"]), [1, 2])
+        self.assertEqual(fixtures["concepts"][1]["data"]["total"], 120)
+        self.assertEqual(len(fixtures["boards"]), 120)
+        page = next(iter(fixtures["boards"].values()))[1]
+        df = CONCEPT_STOCK_SCHEMA.parse(page["data"]["diff"])
+        self.assertEqual(df.columns.tolist(), CONCEPT_STOCK_SCHEMA.columns)
+
+    def test_run_and_compare(self):
+        """测试：通过本地替身服务运行全部基准, 结果可用于对比"""
+        results = run_benchmarks(self.fixture_dir, sizes=[200], boards=3, workers=[2], repeat=1)
+        names = {r["name"] for r in results["results"]}
+        self.assertTrue({"concepts", "constituents", "parse", "cache_load", "distribution"} <= names)
+        concepts = next(r for r in results["results"] if r["name"] == "concepts")
+        self.assertEqual(concepts["rows"], 120)
+        self.assertTrue(any(c["name"] == "http_requests_total" for c in results["metrics"]["counters"]))
+
+        slower = {"results": [{**r, "median": r["median"] * 2} for r in results["results"]]}
+        self.assertEqual(len(compare(results, slower, threshold=1.5)), len(results["results"]))
+        self.assertEqual(compare(slower, results, threshold=1.5), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
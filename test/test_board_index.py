@@ -0,0 +1,43 @@
+import time
+import unittest
+
+import pandas as pd
+from stock_concept.board_index import BoardIndex, clear_board_index, get_board_index, update_board_index
+
+
+class TestBoardIndex(unittest.TestCase):
+
+    def setUp(self):
+        clear_board_index()
+        self.df = pd.DataFrame({"板块名称": ["低空经济", "数字货币"], "板块代码": ["BK1158", "BK0947"]})
+
+    def tearDown(self):
+        clear_board_index()
+
+    def test_bidirectional_lookup(self):
+        """测试：名称与代码可以互查"""
+        index = BoardIndex.from_frame(self.df)
+        self.assertEqual(index.code_of("低空经济"), "BK1158")
+        self.assertEqual(index.name_of("BK0947"), "数字货币")
+        self.assertIsNone(index.code_of("不存在"))
+        self.assertIn("数字货币", index)
+        self.assertEqual(len(index), 2)
+
+    def test_same_snapshot_is_reused(self):
+        """测试：同一快照只构建一次索引"""
+        first = update_board_index(self.df, snapshot="all_concepts@1")
+        second = update_board_index(self.df, snapshot="all_concepts@1")
+        third = update_board_index(self.df, snapshot="all_concepts@2")
+        self.assertIs(first, second)
+        self.assertIsNot(first, third)
+        self.assertIs(get_board_index(), third)
+
+    def test_expiry_follows_snapshot_time(self):
+        """测试：过期时间以快照生成时间为准"""
+        index = update_board_index(self.df, snapshot="old", created_at=time.time() - 100)
+        self.assertTrue(index.is_expired(50))
+        self.assertFalse(index.is_expired(200))
+
+
+if __name__ == "__main__":
+    unittest.main()
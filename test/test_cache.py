@@ -0,0 +1,126 @@
+import os
+import tempfile
+import time
+import unittest
+
+import pandas as pd
+from utils.cache import TieredCache, cache_mtime, load_cache, pa, save_cache
+
+
+class TestCache(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp_dir.name, "all_concepts.pkl")
+        self.df = pd.DataFrame({
+            "板块名称": ["低空经济", "数字货币"],
+            "板块代码": ["BK1158", "BK0947"],
+            "涨跌幅": [1.5, -0.3],
+        })
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_missing_cache(self):
+        """测试：缓存不存在时返回 None"""
+        self.assertIsNone(load_cache(self.path))
+        self.assertIsNone(cache_mtime(self.path))
+
+    def test_dataframe_roundtrip(self):
+        """测试：DataFrame 写入后可以完整读回"""
+        save_cache(self.path, self.df)
+        pd.testing.assert_frame_equal(load_cache(self.path), self.df, check_dtype=False)
+        self.assertIsNotNone(cache_mtime(self.path))
+
+    @unittest.skipIf(pa is None, "需要 pyarrow")
+    def test_dataframe_stored_as_arrow_with_projection(self):
+        """测试：DataFrame 以 Arrow 格式保存, 并支持只读取部分列"""
+        save_cache(self.path, self.df)
+        self.assertTrue(os.path.exists(os.path.join(self.tmp_dir.name, "all_concepts.arrow")))
+        self.assertFalse(os.path.exists(self.path))
+
+        data = load_cache(self.path, columns=["板块名称", "板块代码"])
+        self.assertEqual(list(data.columns), ["板块名称", "板块代码"])
+        self.assertEqual(data["板块代码"].tolist(), ["BK1158", "BK0947"])
+
+    def test_non_dataframe_falls_back_to_pickle(self):
+        """测试：非 DataFrame 数据使用 pickle 保存, 并清理旧的 Arrow 文件"""
+        save_cache(self.path, self.df)
+        save_cache(self.path, {"total": 2})
+        self.assertEqual(load_cache(self.path), {"total": 2})
+        self.assertFalse(os.path.exists(os.path.join(self.tmp_dir.name, "all_concepts.arrow")))
+
+    def test_expired_cache(self):
+        """测试：超过有效期的缓存视为不存在"""
+        save_cache(self.path, {"total": 2})
+        old = time.time() - 2 * 3600
+        os.utime(self.path, (old, old))
+        self.assertIsNone(load_cache(self.path, ttl_hours=1))
+        self.assertEqual(load_cache(self.path, ttl_hours=3), {"total": 2})
+
+    def test_ttl_seconds(self):
+        """测试：ttl_seconds 以秒为单位判断过期"""
+        save_cache(self.path, {"total": 2})
+        old = time.time() - 120
+        os.utime(self.path, (old, old))
+        self.assertIsNone(load_cache(self.path, ttl_seconds=60))
+        self.assertEqual(load_cache(self.path, ttl_seconds=300), {"total": 2})
+
+
+class TestTieredCache(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_memory_tier_hit(self):
+        """测试：写入后的读取命中内存层, 内存层被清空后命中磁盘层"""
+        cache = TieredCache(self.tmp_dir.name, ttl_seconds=60)
+        cache.set("a.pkl", {"v": 1})
+        self.assertEqual(cache.get("a.pkl"), {"v": 1})
+        self.assertEqual(cache.stats["memory_hits"], 1)
+
+        cache._memory.clear()
+        self.assertEqual(cache.get("a.pkl"), {"v": 1})
+        self.assertEqual(cache.stats["disk_hits"], 1)
+        self.assertIsNone(cache.get("missing.pkl"))
+        self.assertEqual(cache.stats["misses"], 1)
+
+    def test_memory_lru_eviction(self):
+        """测试：内存层超过条目上限时淘汰最久未使用的条目"""
+        cache = TieredCache(self.tmp_dir.name, memory_entries=2)
+        cache.set("a.pkl", 1)
+        cache.set("b.pkl", 2)
+        cache.get("a.pkl")
+        cache.set("c.pkl", 3)
+        self.assertEqual(list(cache._memory), ["a.pkl", "c.pkl"])
+        self.assertEqual(cache.stats["memory_evictions"], 1)
+
+    def test_disk_entry_budget(self):
+        """测试：磁盘层超过文件数上限时按访问时间淘汰"""
+        cache = TieredCache(self.tmp_dir.name, max_entries=2)
+        for i, key in enumerate(["a.pkl", "b.pkl"]):
+            cache.set(key, i)
+            t = time.time() - 10 + i
+            os.utime(os.path.join(self.tmp_dir.name, key), (t, t))
+        cache.set("c.pkl", 2)
+        self.assertEqual(sorted(os.listdir(self.tmp_dir.name)), ["b.pkl", "c.pkl"])
+        self.assertEqual(cache.stats["disk_evictions"], 1)
+        self.assertNotIn("a.pkl", cache._memory)
+
+    def test_expired_entries_are_removed(self):
+        """测试：过期的内存条目和磁盘文件都会被清理"""
+        cache = TieredCache(self.tmp_dir.name, ttl_seconds=60)
+        cache.set("a.pkl", 1)
+        old = time.time() - 120
+        os.utime(os.path.join(self.tmp_dir.name, "a.pkl"), (old, old))
+        cache._memory["a.pkl"] = (1, old)
+        self.assertIsNone(cache.get("a.pkl"))
+        cache.evict()
+        self.assertEqual(os.listdir(self.tmp_dir.name), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,49 @@
+import os
+import subprocess
+import sys
+import unittest
+
+from cli import build_parser
+from utils.config_loader import merge_config
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _loaded_modules(code: str) -> set:
+    """在新的解释器中执行 code, 返回执行后已加载的顶层模块"""
+    out = subprocess.run(
+        [sys.executable, "-c", f"{code}\nimport sys\nprint(' '.join(sys.modules))"],
+        cwd=ROOT, capture_output=True, text=True, check=True,
+    ).stdout
+    return {name.split(".")[0] for name in out.split()}
+
+
+class TestCli(unittest.TestCase):
+
+    def test_parser(self):
+        """测试：子命令与参数解析"""
+        args = build_parser().parse_args(["--timing", "constituents", "低空经济", "数字货币", "--workers", "2"])
+        self.assertTrue(args.timing)
+        self.assertEqual(args.names, ["低空经济", "数字货币"])
+        self.assertEqual(args.workers, 2)
+        self.assertFalse(args.stream)
+        self.assertTrue(build_parser().parse_args(["constituents", "--stream"]).stream)
+        self.assertTrue(build_parser().parse_args(["distribution", "--no-plot"]).no_plot)
+
+    def test_lazy_imports(self):
+        """测试：解析命令行不导入 pandas, 导入获取模块不导入 akshare / requests / matplotlib"""
+        self.assertNotIn("pandas", _loaded_modules("import cli; cli.build_parser().parse_args(['concepts'])"))
+        loaded = _loaded_modules("import stock_concept.fetch_stock_concept, percentage_change.percentage_change")
+        self.assertFalse(loaded & {"akshare", "requests", "httpx", "matplotlib"})
+
+    def test_merge_config(self):
+        """测试：覆盖项按配置段合并"""
+        config = {"output": {"format": "csv", "directory": "./output"}, "cache": {"enabled": True}}
+        merged = merge_config(config, {"output": {"format": "parquet"}, "metrics": {"path": "m.json"}})
+        self.assertEqual(merged["output"], {"format": "parquet", "directory": "./output"})
+        self.assertEqual(merged["metrics"], {"path": "m.json"})
+        self.assertEqual(config["output"]["format"], "csv")
+
+
+if __name__ == "__main__":
+    unittest.main()
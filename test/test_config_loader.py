@@ -0,0 +1,81 @@
+import os
+import tempfile
+import time
+import unittest
+from unittest import mock
+
+from utils import config_loader
+from utils.config_loader import ConfigError, clear_config_cache, load_config, validate_config
+
+SCHEMA = {"cache": {"enabled": bool, "expire_seconds": (int, float)}, "default_concepts": list, "hosts": dict}
+
+
+class TestConfigLoader(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, "config.yaml")
+        self._write("cache:\n  enabled: true\n  expire_seconds: 60\n")
+        clear_config_cache()
+
+    def tearDown(self):
+        clear_config_cache()
+        self.tmp.cleanup()
+
+    def _write(self, content: str):
+        with open(self.path, "w", encoding="utf-8") as f:
+            f.write(content)
+
+    def test_cached_until_modified(self):
+        """测试：同一路径只解析一次, 文件修改后重新解析, 返回值的修改不影响缓存"""
+        with mock.patch.object(config_loader.yaml, "safe_load", wraps=config_loader.yaml.safe_load) as safe_load:
+            config = load_config(self.path, SCHEMA)
+            config["cache"]["enabled"] = False
+            self.assertTrue(load_config("config.yaml", SCHEMA, base_dir=self.tmp.name)["cache"]["enabled"])
+            self.assertEqual(safe_load.call_count, 1)
+
+            self._write("cache:\n  enabled: false\n")
+            os.utime(self.path, ns=(time.time_ns(), time.time_ns() + 10 ** 9))
+            self.assertFalse(load_config(self.path, SCHEMA)["cache"]["enabled"])
+            self.assertEqual(safe_load.call_count, 2)
+
+    def test_typo_suggestion(self):
+        """测试：拼错的键名报错并提示正确的键名, 类型不符时报错"""
+        problems = validate_config({"cache": {"enalbed": True, "expire_seconds": "1h"}, "hosts": {"a": 1}}, SCHEMA)
+        self.assertEqual(len(problems), 2)
+        self.assertIn("cache.enalbed", problems[0])
+        self.assertIn("cache.enabled", problems[0])
+        self.assertIn("cache.expire_seconds", problems[1])
+
+        self._write("cache:\n  enalbed: true\n")
+        with self.assertRaises(ConfigError):
+            load_config(self.path, SCHEMA)
+
+    def test_schema_checked_after_unvalidated_load(self):
+        """测试：先不带 schema 读取, 之后带 schema 读取时仍然校验, 校验通过后不再重复校验"""
+        self._write("cache:\n  enalbed: true\n")
+        self.assertTrue(load_config(self.path)["cache"]["enalbed"])
+        with self.assertRaises(ConfigError):
+            load_config(self.path, SCHEMA)
+
+        self._write("cache:\n  enabled: true\n")
+        os.utime(self.path, ns=(time.time_ns(), time.time_ns() + 10 ** 9))
+        load_config(self.path)
+        with mock.patch.object(config_loader, "validate_config", wraps=config_loader.validate_config) as validate:
+            load_config(self.path, SCHEMA)
+            calls = validate.call_count
+            load_config(self.path, SCHEMA)
+        self.assertGreater(calls, 0)
+        self.assertEqual(validate.call_count, calls)
+
+    def test_repo_configs_are_valid(self):
+        """测试：仓库自带的配置文件符合各自的 schema"""
+        from percentage_change import percentage_change
+        from stock_concept import fetch_stock_concept
+
+        for module in (fetch_stock_concept, percentage_change):
+            self.assertTrue(load_config(module.CONFIG_PATH, module.CONFIG_SCHEMA))
+
+
+if __name__ == "__main__":
+    unittest.main()
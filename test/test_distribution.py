@@ -0,0 +1,44 @@
+import unittest
+
+import numpy as np
+import pandas as pd
+from percentage_change.distribution import bucket_counts, distribution_matrix
+
+BINS = [-100, -20, -10, -3, 0, 3, 10, 20, 100]
+LABELS = ["Down >20%", "Down 10%-20%", "Down 3%-10%", "Down 0%-3%", "Up 0%-3%", "Up 3%-10%", "Up 10%-20%", "Up >20%"]
+
+
+class TestDistribution(unittest.TestCase):
+
+    def test_matches_pd_cut(self):
+        """测试：统计结果与 pd.cut + value_counts 一致, 包括边界值、越界值和 NaN"""
+        rng = np.random.default_rng(0)
+        values = np.concatenate([rng.normal(0, 8, 5000), BINS, [-150, 150, np.nan]])
+        expected = pd.cut(pd.Series(values), bins=BINS, labels=LABELS).value_counts().sort_index()
+        counts = bucket_counts(values, BINS)
+        self.assertEqual(counts.shape, (1, len(LABELS)))
+        self.assertEqual(counts[0].tolist(), expected.tolist())
+
+    def test_two_dimensional_input(self):
+        """测试：二维输入每行独立统计, NaN 填充位不计数"""
+        values = np.array([[1.0, 2.0, -5.0], [25.0, np.nan, np.nan]])
+        counts = bucket_counts(values, BINS)
+        self.assertEqual(counts[0].tolist(), [0, 0, 1, 0, 2, 0, 0, 0])
+        self.assertEqual(counts[1].tolist(), [0, 0, 0, 0, 0, 0, 0, 1])
+
+    def test_distribution_matrix(self):
+        """测试：长表按日期统计, 小数形式的快照自动转为百分比"""
+        df = pd.DataFrame({
+            "日期": ["2024-01-03", "2024-01-02", "2024-01-02", "2024-01-03"],
+            "涨跌幅": [0.05, 1.5, -12.0, -0.01],
+        })
+        matrix = distribution_matrix(df, BINS, LABELS)
+        self.assertEqual(matrix.index.tolist(), ["2024-01-02", "2024-01-03"])
+        self.assertEqual(matrix.loc["2024-01-02", "Up 0%-3%"], 1)
+        self.assertEqual(matrix.loc["2024-01-02", "Down 10%-20%"], 1)
+        self.assertEqual(matrix.loc["2024-01-03", "Up 3%-10%"], 1)
+        self.assertEqual(matrix.loc["2024-01-03", "Down 0%-3%"], 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
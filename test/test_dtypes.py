@@ -0,0 +1,46 @@
+import unittest
+
+import numpy as np
+import pandas as pd
+from utils.dtypes import compact_frame
+
+
+class TestCompactFrame(unittest.TestCase):
+
+    def setUp(self):
+        n = 1000
+        self.df = pd.DataFrame({
+            "代码": np.array([f"{i:06d}" for i in range(n)], dtype=object),
+            "领涨股票": np.array(["贵州茅台", "宁德时代"] * (n // 2), dtype=object),
+            "最新价": np.linspace(1, 100, n),
+            "上涨家数": np.arange(n, dtype=np.int64),
+            "下跌家数": np.where(np.arange(n) % 2, np.nan, 1.0),
+        })
+        self.dtypes = {"代码": "string", "领涨股票": "category", "最新价": "float32", "上涨家数": "int16",
+                       "下跌家数": "int16", "不存在的列": "float32"}
+
+    def test_dtypes_and_report(self):
+        """测试：列类型被压缩, 并返回节省的字节数"""
+        compacted, report = compact_frame(self.df, self.dtypes)
+        self.assertEqual(compacted["领涨股票"].dtype, "category")
+        self.assertEqual(compacted["最新价"].dtype, np.float32)
+        self.assertEqual(compacted["上涨家数"].dtype, np.int16)
+        self.assertEqual(str(compacted["下跌家数"].dtype), "Int16")
+        self.assertEqual(report["saved"], report["before"] - report["after"])
+        self.assertGreater(report["saved"], 0)
+
+    def test_values_preserved(self):
+        """测试：压缩后代码的前导 0 和数值保持不变, 原 DataFrame 不被修改"""
+        compacted, _ = compact_frame(self.df, self.dtypes)
+        self.assertEqual(compacted["代码"].iloc[1], "000001")
+        self.assertEqual(self.df["最新价"].dtype, np.float64)
+        np.testing.assert_allclose(compacted["最新价"].to_numpy(), self.df["最新价"].to_numpy(), rtol=1e-6)
+
+    def test_unknown_kind(self):
+        """测试：不支持的压缩类型抛出 ValueError"""
+        with self.assertRaises(ValueError):
+            compact_frame(self.df, {"最新价": "float16"})
+
+
+if __name__ == "__main__":
+    unittest.main()
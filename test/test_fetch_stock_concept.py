@@ -0,0 +1,197 @@
+import math
+import os
+import tempfile
+import time
+import unittest
+
+import pandas as pd
+from stock_concept.board_index import clear_board_index
+from stock_concept.fetch_stock_concept import ConceptStockFetcher
+from test.eastmoney_stub import EastmoneyStub, make_fetcher
+from utils.cache import save_cache
+from utils.output import OutputWriter
+
+
+def _boards(n: int, start: int = 1000) -> dict:
+    return {f"BK{start + i:04d}": f"概念{start + i}" for i in range(n)}
+
+
+class FetcherTestCase(unittest.TestCase):
+    """启动替身服务并构造指向它的 ConceptStockFetcher, 输出和缓存目录在临时目录中, 不使用缓存"""
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.server = EastmoneyStub(boards=_boards(250)).start()
+        clear_board_index()
+        self.fetcher = make_fetcher(ConceptStockFetcher, self.server, self.tmp_dir.name)
+
+    def tearDown(self):
+        clear_board_index()
+        self.fetcher.http.close()
+        self.server.stop()
+        self.tmp_dir.cleanup()
+
+
+class TestFetchAllConcepts(FetcherTestCase):
+
+    def test_first_page_reused(self):
+        """测试：第一页只请求一次, 顺序和并发模式都按页码取完所有页面"""
+        for concurrent in (False, True):
+            self.server.requests.clear()
+            self.fetcher.request_concurrent = concurrent
+            df = self.fetcher._fetch_all_concepts()
+            self.assertEqual(len(df), 250)
+            self.assertEqual(sorted(self.server.pages()), [1, 2, 3])
+
+    def test_concurrent_pages_in_order(self):
+        """测试：并发模式下先返回的页面不会打乱顺序, 排名连续"""
+        self.server.delays = {2: 0.2}  # 第 2 页最后返回
+        self.fetcher.request_concurrent = True
+        df = self.fetcher._fetch_all_concepts()
+
+        self.assertEqual(df["排名"].tolist(), list(range(1, 251)))
+        self.assertEqual(df["板块代码"].tolist(), sorted(self.server.boards, reverse=True))
+
+    def test_soft_throttle_retried(self):
+        """测试：某一页返回 data 为空时只重试这一页"""
+        self.server.throttled = {2}
+        df = self.fetcher._fetch_all_concepts()
+        self.assertEqual(len(df), 250)
+        self.assertEqual(sorted(self.server.pages()), [1, 2, 2, 3])
+
+    def test_sequential_and_concurrent_identical(self):
+        """测试：顺序和并发模式得到相同的 DataFrame"""
+        self.fetcher.request_concurrent = False
+        sequential = self.fetcher._fetch_all_concepts()
+        self.fetcher.request_concurrent = True
+        concurrent = self.fetcher._fetch_all_concepts()
+        pd.testing.assert_frame_equal(sequential, concurrent)
+
+
+class TestRefreshBoardIndex(FetcherTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.server.boards = _boards(300, start=1)  # BK0001 - BK0300, 共 3 页
+        # 缓存目录中放一份已过期的旧快照, 板块索引只能重新拉取, 旧快照用于对比
+        self.cached = self.fetcher._fetch_all_concepts()
+        # 基类的 fetcher 已按默认过期时间创建了 cache 目录的共享缓存, 这里换一个目录
+        cache_dir = os.path.join(self.tmp_dir.name, "stale_cache")
+        save_cache(os.path.join(cache_dir, "all_concepts.pkl"), self.cached)
+        expired = time.time() - 7200
+        for name in os.listdir(cache_dir):
+            os.utime(os.path.join(cache_dir, name), (expired, expired))
+
+        self.fetcher.http.close()
+        self.fetcher = make_fetcher(
+            ConceptStockFetcher, self.server, self.tmp_dir.name, cache={"enabled": True, "directory": cache_dir, "expire_seconds": 3600}
+        )
+        self.server.requests.clear()
+        self.server.fields.clear()
+
+    def _refresh(self):
+        with self.assertLogs(self.fetcher.logger, "INFO") as cm:
+            index = self.fetcher._refresh_board_index()
+        self.assertEqual(dict(index.code_to_name), self.server.boards)
+        # 只请求名称和代码两个字段的全部页面, 不写入概念板块缓存
+        self.assertEqual(sorted(self.server.pages()), list(range(1, math.ceil(len(self.server.boards) / 100) + 1)))
+        self.assertEqual(set(self.server.fields), {"f14,f12"})
+        pd.testing.assert_frame_equal(self.fetcher.cache.get("all_concepts.pkl", ttl_seconds=float("inf")), self.cached)
+        return "\n".join(cm.output)
+
+    def test_unchanged(self):
+        """测试：板块没有增减时, 索引与最新数据一致"""
+        self.assertIn("概念板块没有增减, 共 300 个", self._refresh())
+
+    def test_insert_at_top(self):
+        """测试：新增的板块位于第 1 页"""
+        self.server.boards["BK0999"] = "新概念"
+        self.assertIn("概念板块新增 1 个: 新概念; 删除 0 个", self._refresh())
+
+    def test_swap_in_tail(self):
+        """测试：末尾页面中一增一删, 总数不变, 也能得到正确的板块列表"""
+        del self.server.boards["BK0010"]
+        self.server.boards["BK0005A"] = "新概念"
+        self.assertIn("概念板块新增 1 个: 新概念; 删除 1 个: 概念10", self._refresh())
+        self.assertEqual(self.fetcher._get_board_code("新概念"), "BK0005A")
+        with self.assertRaises(KeyError):
+            self.fetcher._get_board_code("概念10")
+
+
+class TestFetchManyConceptStocks(FetcherTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.server.boards = _boards(5)
+        self.server.stocks = {code: 30 + 60 * i for i, code in enumerate(sorted(self.server.boards))}
+        self.names = [self.server.boards[code] for code in sorted(self.server.boards)]
+
+    def test_results_as_completed(self):
+        """测试：先完成的板块先返回, 每个板块的成分股完整"""
+        self.server.stock_delays = {"BK1000": 0.3}  # 第一个板块最慢
+        results = list(self.fetcher.fetch_many_concept_stocks(self.names, max_workers=5))
+
+        self.assertEqual(results[-1][0], "概念1000")
+        self.assertEqual({name: len(df) for name, df in results}, dict(zip(self.names, [30, 90, 150, 210, 270])))
+
+    def test_failures_recorded(self):
+        """测试：单个板块失败不影响其余板块, 失败的板块写入 failures"""
+        self.server.fail_codes = {"BK1002"}
+        failures = {}
+        names = self.names + ["不存在的板块"]
+        results = dict(self.fetcher.fetch_many_concept_stocks(names, failures=failures))
+
+        self.assertEqual(set(results), set(self.names) - {"概念1002"})
+        self.assertEqual(set(failures), {"概念1002", "不存在的板块"})
+        self.assertIsInstance(failures["不存在的板块"], KeyError)
+
+    def test_early_exit_cancels_pending(self):
+        """测试：提前结束迭代时, 还未开始的板块不再请求"""
+        self.fetcher.get_all_concepts()
+        stream = self.fetcher.fetch_many_concept_stocks(self.names, max_workers=1)
+        next(stream)
+        stream.close()
+
+        requested = {code for kind, code, _ in self.server.requests if kind == "stocks"}
+        self.assertLess(len(requested), len(self.names))
+
+
+class TestSaveStream(FetcherTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.server.boards = {"BK1000": "概念1000"}
+        self.server.stocks = {"BK1000": 250}  # 3 页
+
+    def _save(self, fmt: str) -> str:
+        self.fetcher.writer = OutputWriter(self.fetcher.output_dir, fmt)
+        rows = self.fetcher.save_stream(self.fetcher.iter_concept_stocks("概念1000"), "概念1000")
+        self.assertEqual(rows, 250)
+        return self.fetcher.writer.path("概念1000")
+
+    def test_csv_append(self):
+        """测试：csv 逐页追加, 只有一个 BOM 和一行表头"""
+        path = self._save("csv")
+        with open(path, "rb") as f:
+            content = f.read()
+        self.assertTrue(content.startswith(b"\xef\xbb\xbf"))
+        self.assertEqual(content.count(b"\xef\xbb\xbf"), 1)
+        self.assertEqual(content.count("代码".encode("utf-8")), 1)
+
+        df = pd.read_csv(path, encoding="utf-8-sig", dtype={"代码": str})
+        self.assertEqual(df["序号"].tolist(), list(range(1, 251)))
+        self.assertEqual(df["代码"].iloc[-1], "000249")
+
+    def test_parquet_row_groups(self):
+        """测试：parquet 每页写成一个 row group"""
+        import pyarrow.parquet as pq
+
+        path = self._save("parquet")
+        parquet = pq.ParquetFile(path)
+        self.assertEqual(parquet.num_row_groups, 3)
+        self.assertEqual([parquet.metadata.row_group(i).num_rows for i in range(3)], [100, 100, 50])
+        self.assertEqual(pd.read_parquet(path)["序号"].tolist(), list(range(1, 251)))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,112 @@
+import json
+import threading
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+import requests
+from utils.http_client import HttpClient
+from utils.rate_limit import HostRateLimiter
+from utils.retry import ThrottledError
+
+
+class _StubHandler(BaseHTTPRequestHandler):
+    """本地替身服务: 返回请求参数, 并记录客户端端口与请求头"""
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        self.server.client_ports.append(self.client_address[1])
+        self.server.headers_seen.append(dict(self.headers))
+        parts = urlsplit(self.path)
+        if parts.path == "/error":
+            body = b"{}"
+            self.send_response(503)
+        elif parts.path == "/null":
+            body = b'{"rc": 0, "data": null}'
+            self.send_response(200)
+        elif parts.path == "/html":
+            body = b"<html>busy</html>"
+            self.send_response(200)
+        else:
+            body = json.dumps({"path": parts.path, "params": parse_qs(parts.query)}).encode()
+            self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class TestHttpClient(unittest.TestCase):
+
+    def setUp(self):
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), _StubHandler)
+        self.server.client_ports = []
+        self.server.headers_seen = []
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.base_url = f"http://127.0.0.1:{self.server.server_address[1]}"
+        self.client = HttpClient(base_url=self.base_url, timeout=5)
+
+    def tearDown(self):
+        self.client.close()
+        self.server.shutdown()
+        self.server.server_close()
+
+    def test_base_url_rewrite(self):
+        """测试：请求被改写到 base_url, 路径和参数保持不变"""
+        data = self.client.get_json("https://79.push2.eastmoney.com/api/qt/clist/get", params={"pn": "2"})
+        self.assertEqual(data["path"], "/api/qt/clist/get")
+        self.assertEqual(data["params"], {"pn": ["2"]})
+
+    def test_keep_alive_reuses_connection(self):
+        """测试：同一 host 的多次请求复用同一个连接"""
+        for page in range(5):
+            self.client.get_json("https://79.push2.eastmoney.com/api/qt/clist/get", params={"pn": str(page)})
+        self.assertEqual(len(self.server.client_ports), 5)
+        self.assertEqual(len(set(self.server.client_ports)), 1)
+
+    def test_gzip_negotiation(self):
+        """测试：请求头声明支持 gzip"""
+        self.client.get_json("https://79.push2.eastmoney.com/api/qt/clist/get")
+        self.assertIn("gzip", self.server.headers_seen[0]["Accept-Encoding"])
+
+    def test_session_per_host(self):
+        """测试：不同 host 使用不同的 Session, 相同 host 共用一个"""
+        client = HttpClient()
+        s1 = client.session("https://79.push2.eastmoney.com/api/qt/clist/get")
+        s2 = client.session("https://79.push2.eastmoney.com/other")
+        s3 = client.session("https://29.push2.eastmoney.com/api/qt/clist/get")
+        self.assertIs(s1, s2)
+        self.assertIsNot(s1, s3)
+        client.close()
+
+    def test_error_status_raises(self):
+        """测试：非 2xx 响应抛出 HTTPError"""
+        with self.assertRaises(requests.HTTPError):
+            self.client.get_json("https://79.push2.eastmoney.com/error")
+
+    def test_rate_limiter_feedback(self):
+        """测试：限流器按原始 host 分桶, 5xx 响应触发降速"""
+        limiter = HostRateLimiter({"default": {"rate": 8, "min_rate": 1}})
+        client = HttpClient(base_url=self.base_url, timeout=5, rate_limiter=limiter)
+        with self.assertRaises(requests.HTTPError):
+            client.get_json("https://79.push2.eastmoney.com/error")
+        client.close()
+        self.assertEqual(limiter.bucket("https://79.push2.eastmoney.com/").rate, 4)
+
+    def test_soft_throttle(self):
+        """测试：200 响应但 data 为空或不是 JSON 时视为限流, 抛出 ThrottledError 并降速"""
+        limiter = HostRateLimiter({"default": {"rate": 8, "min_rate": 1}})
+        client = HttpClient(base_url=self.base_url, timeout=5, rate_limiter=limiter)
+        for path in ("/null", "/html"):
+            with self.assertRaises(ThrottledError):
+                client.get_json(f"https://79.push2.eastmoney.com{path}")
+        client.close()
+        # 每次软限流都降速 (200 响应本身先按成功略微提速)
+        self.assertLess(limiter.bucket("https://79.push2.eastmoney.com/").rate, 4)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,197 @@
+import json
+import os
+import tempfile
+import unittest
+from concurrent.futures import wait
+from datetime import datetime, timedelta
+import urllib.error
+import urllib.parse
+import urllib.request
+
+import numpy as np
+import pandas as pd
+from stock_concept.live import ConceptPoller, LiveState, diff_frames, serve_state, writer_sink
+from utils.logger import setup_logger
+from utils.output import OutputWriter
+
+
+def _stocks(codes, changes):
+    return pd.DataFrame({
+        "序号": np.arange(1, len(codes) + 1),
+        "代码": pd.array(codes, dtype="string"),
+        "涨跌幅": np.array(changes, dtype=np.float32),
+    })
+
+
+class _FakeFetcher:
+    """只提供 ConceptPoller 用到的方法, 记录每次拉取的板块"""
+
+    def __init__(self):
+        self.logger = setup_logger()
+        self.concepts = pd.DataFrame({"板块名称": ["低空经济", "数字货币"], "板块代码": ["BK1158", "BK0947"]})
+        self.stocks = {"低空经济": _stocks(["000001", "000002"], [1.0, 2.0]), "数字货币": _stocks(["600000"], [0.5])}
+        self.fetched = []
+
+    def get_all_concepts(self, use_cache=True):
+        return self.concepts
+
+    def fetch_many_concept_stocks(self, concept_names, max_workers=None):
+        for name in concept_names:
+            self.fetched.append(name)
+            yield name, self.stocks[name]
+
+
+class TestDiffFrames(unittest.TestCase):
+
+    def test_first_snapshot_all_added(self):
+        """测试：没有旧快照时所有行都是新增"""
+        delta = diff_frames(None, _stocks(["000001", "000002"], [1.0, 2.0]), "代码")
+        self.assertEqual(delta["变更类型"].tolist(), ["新增", "新增"])
+        self.assertEqual(delta.columns[0], "变更类型")
+
+    def test_added_changed_removed(self):
+        """测试：新增、变化和删除的行, 序号变化和两边都为空值不算变化"""
+        old = _stocks(["000001", "000002", "000003", "000004"], [1.0, 2.0, 3.0, np.nan])
+        new = _stocks(["000005", "000004", "000002", "000001"], [5.0, np.nan, 2.5, 1.0])
+        delta = diff_frames(old, new, "代码")
+        self.assertEqual(
+            list(zip(delta["变更类型"], delta["代码"], delta["涨跌幅"].tolist())),
+            [("新增", "000005", 5.0), ("变化", "000002", 2.5), ("删除", "000003", 3.0)],
+        )
+
+    def test_no_change(self):
+        """测试：没有变化时返回带变更类型列的空 DataFrame"""
+        df = _stocks(["000001"], [1.0])
+        delta = diff_frames(df, df.copy(), "代码")
+        self.assertTrue(delta.empty)
+        self.assertEqual(delta.columns[0], "变更类型")
+
+    def test_categories_differ(self):
+        """测试：两边 category 列的类别不同时也可以比较"""
+        old = pd.DataFrame({"代码": ["1", "2"], "领涨股票": pd.Categorical(["甲", "乙"])})
+        new = pd.DataFrame({"代码": ["1", "2"], "领涨股票": pd.Categorical(["甲", "丙"])})
+        self.assertEqual(diff_frames(old, new, "代码")["代码"].tolist(), ["2"])
+
+
+class TestConceptPoller(unittest.TestCase):
+
+    def setUp(self):
+        self.now = 0.0
+        self.fetcher = _FakeFetcher()
+        self.emitted = []
+        self.poller = ConceptPoller(
+            self.fetcher, {"低空经济": 10, "数字货币": 30}, concepts_interval=60,
+            sink=lambda name, delta: self.emitted.append((name, len(delta))), clock=lambda: self.now,
+        )
+
+    def test_per_board_intervals(self):
+        """测试：各板块按自己的间隔刷新"""
+        self.assertCountEqual(self.poller.poll_once(), ["低空经济", "数字货币"])
+        self.now = 10
+        self.assertEqual(self.poller.poll_once(), ["低空经济"])
+        self.assertEqual(self.poller.seconds_until_due(), 10)
+        self.now = 30
+        self.assertCountEqual(self.poller.poll_once(), ["低空经济", "数字货币"])
+
+    def test_only_deltas_emitted(self):
+        """测试：只有变化的行交给 sink, 内存状态保持最新"""
+        self.poller.poll_once()
+        self.assertCountEqual(self.emitted, [("所有概念板块", 2), ("低空经济", 2), ("数字货币", 1)])
+
+        self.emitted.clear()
+        self.fetcher.stocks["低空经济"] = _stocks(["000002", "000001"], [2.0, 1.5])
+        self.now = 10
+        self.poller.poll_once()
+        self.assertEqual(self.emitted, [("低空经济", 1)])
+        self.assertEqual(self.poller.state.board("低空经济")["涨跌幅"].tolist(), [2.0, 1.5])
+        self.assertEqual(self.poller.state.status()["低空经济"]["version"], 2)
+
+    def test_failed_writes_logged_each_round(self):
+        """测试：每轮结束时清理已完成的写入, 失败的写入记录日志而不中断轮询"""
+        futures = []
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            writer = OutputWriter(tmp_dir, "csv")
+            self.poller.writer = writer
+            self.poller.sink = lambda name, delta: futures.append(writer.submit(None, name))  # 写入必然失败
+            with self.assertLogs(self.fetcher.logger, "ERROR") as cm:
+                self.poller.poll_once()
+                wait(futures)
+                self.fetcher.stocks["低空经济"] = _stocks(["000001"], [9.0])
+                self.now = 10
+                self.poller.poll_once()
+                self.assertEqual(self.poller.fetcher.fetched[-1], "低空经济")
+                wait(futures)
+                self.poller._check_writes()
+            writer.close()
+        self.assertEqual(len(futures), 4)
+        self.assertEqual(len([line for line in cm.output if "保存变更失败" in line]), 4)
+
+    def test_run_rounds(self):
+        """测试：run 执行指定轮数后返回"""
+        self.poller.run(rounds=1)
+        self.assertCountEqual(self.fetcher.fetched, ["低空经济", "数字货币"])
+
+
+class TestWriterSink(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.deltas = [_stocks(["000001"], [1.0]), _stocks(["000002", "000003"], [2.0, 3.0])]
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_csv_appended(self):
+        """测试：csv 格式下每次的差异追加到同一个文件"""
+        with OutputWriter(self.tmp_dir.name, "csv") as writer:
+            sink = writer_sink(writer)
+            for delta in self.deltas:
+                sink("低空经济", delta)
+                writer.flush()
+        self.assertEqual(os.listdir(self.tmp_dir.name), ["低空经济_变更.csv"])
+        self.assertEqual(len(pd.read_csv(writer.path("低空经济_变更"))), 3)
+
+    def test_parquet_file_per_delta(self):
+        """测试：无法追加的格式每次的差异写入单独的文件, 不覆盖之前的差异"""
+        times = iter([datetime(2024, 6, 3, 9, 30), datetime(2024, 6, 3, 9, 30) + timedelta(microseconds=1)])
+        with OutputWriter(self.tmp_dir.name, "parquet") as writer:
+            sink = writer_sink(writer, clock=lambda: next(times))
+            for delta in self.deltas:
+                sink("低空经济", delta)
+        files = sorted(os.listdir(self.tmp_dir.name))
+        self.assertEqual(files, ["低空经济_变更_20240603_093000_000000.parquet", "低空经济_变更_20240603_093000_000001.parquet"])
+        self.assertEqual([len(pd.read_parquet(os.path.join(self.tmp_dir.name, f))) for f in files], [1, 2])
+
+
+class TestServeState(unittest.TestCase):
+
+    def setUp(self):
+        self.state = LiveState()
+        self.state.update_concepts(pd.DataFrame({"板块名称": ["低空经济"], "板块代码": ["BK1158"]}))
+        self.state.update_board("低空经济", _stocks(["000001"], [1.5]))
+        self.server = serve_state(self.state, port=0)
+        self.base_url = f"http://127.0.0.1:{self.server.server_address[1]}"
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def _get(self, path):
+        with urllib.request.urlopen(self.base_url + urllib.parse.quote(path), timeout=5) as response:
+            return json.loads(response.read().decode("utf-8"))
+
+    def test_read_state(self):
+        """测试：通过本地接口读取当前状态"""
+        self.assertEqual(self._get("/concepts"), [{"板块名称": "低空经济", "板块代码": "BK1158"}])
+        self.assertEqual(self._get("/boards/低空经济"), [{"序号": 1, "代码": "000001", "涨跌幅": 1.5}])
+        self.assertEqual(self._get("/status")["低空经济"]["rows"], 1)
+
+    def test_unknown_board(self):
+        """测试：未跟踪的板块返回 404"""
+        with self.assertRaises(urllib.error.HTTPError) as cm:
+            self._get("/boards/数字货币")
+        self.assertEqual(cm.exception.code, 404)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,126 @@
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+import numpy as np
+import pandas as pd
+from stock_concept.membership import MembershipIndex, build_membership_index
+from utils.logger import setup_logger
+
+
+class TestMembershipIndex(unittest.TestCase):
+
+    def setUp(self):
+        self.index = MembershipIndex.from_constituents([
+            ("BK1158", "低空经济", ["000001", "600000", "300750"]),
+            ("BK0947", "数字货币", ["000001", "600000", "688981"]),
+            ("BK0493", "新能源车", ["300750"]),
+            ("BK0001", "空板块", []),
+        ])
+
+    def test_bidirectional_lookup(self):
+        """测试：板块 -> 股票 与 股票 -> 板块 互查"""
+        self.assertEqual(sorted(self.index.stocks_of("低空经济")), ["000001", "300750", "600000"])
+        self.assertEqual(self.index.stocks_of("BK0493"), ["300750"])
+        self.assertEqual(self.index.boards_of("300750"), ["低空经济", "新能源车"])
+        self.assertEqual(self.index.boards_of("999999"), [])
+        with self.assertRaises(KeyError):
+            self.index.stocks_of("不存在")
+
+    def test_set_queries(self):
+        """测试：交集、并集与共现板块"""
+        self.assertEqual(sorted(self.index.overlap("低空经济", "数字货币")), ["000001", "600000"])
+        self.assertEqual(len(self.index.union("低空经济", "数字货币", "新能源车")), 4)
+        self.assertEqual(self.index.top_cooccurring("低空经济"), [("数字货币", 2), ("新能源车", 1)])
+        self.assertEqual(self.index.top_cooccurring("低空经济", k=1), [("数字货币", 2)])
+        self.assertEqual(self.index.top_cooccurring("空板块"), [])
+
+    def test_save_and_load(self):
+        """测试：保存后重新加载, 查询结果不变"""
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            path = os.path.join(tmp_dir, "membership.npz")
+            self.index.save(path)
+            loaded = MembershipIndex.load(path)
+        self.assertEqual(len(loaded), 4)
+        self.assertEqual(loaded.boards_of("000001"), ["低空经济", "数字货币"])
+        self.assertEqual(loaded.top_cooccurring("数字货币"), [("低空经济", 2)])
+        self.assertTrue(loaded.complete)
+
+    def test_save_atomic(self):
+        """测试：保存失败时保留原来的索引, 不残留临时文件"""
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            path = os.path.join(tmp_dir, "membership.npz")
+            self.index.save(path)
+            def _broken(f, **arrays):
+                f.write(b"partial")
+                raise OSError("disk full")
+
+            with mock.patch.object(np, "savez", _broken), self.assertRaises(OSError):
+                MembershipIndex.from_constituents([("BK1158", "低空经济", ["000001"])]).save(path)
+            self.assertEqual(os.listdir(tmp_dir), ["membership.npz"])
+            self.assertEqual(len(MembershipIndex.load(path)), 4)
+
+    def test_load_without_missing_boards(self):
+        """测试：加载没有 missing_boards 的旧索引文件"""
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            path = os.path.join(tmp_dir, "membership.npz")
+            np.savez(path, board_codes=self.index.board_codes, board_names=self.index.board_names,
+                     stock_codes=self.index.stock_codes, board_indptr=self.index.board_indptr,
+                     board_indices=self.index.board_indices)
+            loaded = MembershipIndex.load(path)
+        self.assertTrue(loaded.complete)
+        self.assertEqual(loaded.stocks_of("BK0493"), ["300750"])
+
+
+class _FakeFetcher:
+    """只提供 build_membership_index 用到的方法, fail 中的板块获取失败"""
+
+    def __init__(self, cache_dir, fail=()):
+        self.logger = setup_logger()
+        self.cache_dir = cache_dir
+        self.codes = {"低空经济": "BK1158", "数字货币": "BK0947", "新能源车": "BK0493"}
+        self.fail = set(fail)
+
+    def _get_board_code(self, concept_name):
+        return self.codes[concept_name]
+
+    def fetch_many_concept_stocks(self, concept_names, max_workers=None, failures=None):
+        for name in concept_names:
+            if name in self.fail:
+                failures[name] = ConnectionError("断开")
+            else:
+                yield name, pd.DataFrame({"代码": ["000001", "300750"]})
+
+
+class TestBuildMembershipIndex(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp_dir.name, "membership.npz")
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_complete(self):
+        """测试：所有板块获取成功时索引完整"""
+        index = build_membership_index(_FakeFetcher(self.tmp_dir.name), ["低空经济", "数字货币", "新能源车"], path=self.path)
+        self.assertEqual(len(index), 3)
+        self.assertTrue(index.complete)
+
+    def test_missing_boards_saved(self):
+        """测试：部分板块获取失败时记录缺失的板块, 保存后可以读取, 并输出警告"""
+        fetcher = _FakeFetcher(self.tmp_dir.name, fail={"新能源车", "低空经济"})
+        with self.assertLogs(fetcher.logger, "WARNING") as cm:
+            index = build_membership_index(fetcher, ["低空经济", "数字货币", "新能源车"], path=self.path)
+
+        self.assertEqual(len(index), 1)
+        self.assertFalse(index.complete)
+        self.assertIn("2/3", cm.output[0])
+        loaded = MembershipIndex.load(self.path)
+        self.assertEqual(loaded.missing_boards.tolist(), ["低空经济", "新能源车"])
+        self.assertEqual(loaded.stocks_of("数字货币"), ["000001", "300750"])
+
+
+if __name__ == "__main__":
+    unittest.main()
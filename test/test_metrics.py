@@ -0,0 +1,78 @@
+import asyncio
+import json
+import os
+import tempfile
+import unittest
+
+from utils.metrics import MetricsRegistry, get_metrics
+from utils.retry import RetryPolicy, ThrottledError
+
+
+class TestMetrics(unittest.TestCase):
+
+    def setUp(self):
+        self.metrics = MetricsRegistry(buckets=(0.1, 1))
+
+    def test_counters_and_histograms(self):
+        """测试：按标签区分计数器, 直方图边界值计入 le 对应的分桶"""
+        self.metrics.inc("http_requests_total", host="a", status=200)
+        self.metrics.inc("http_requests_total", 2, host="a", status=200)
+        self.metrics.inc("http_requests_total", host="b", status=503)
+        for value in (0.05, 0.1, 0.5, 3):
+            self.metrics.observe("latency", value, host="a")
+
+        self.assertEqual(self.metrics.counter_value("http_requests_total", host="a", status=200), 3)
+        histogram = self.metrics.snapshot()["histograms"][0]
+        self.assertEqual(histogram["buckets"], {"0.1": 2, "1": 1, "+Inf": 1})
+        self.assertEqual((histogram["count"], histogram["min"], histogram["max"]), (4, 0.05, 3))
+
+    def test_timer(self):
+        """测试：计时器可用作上下文管理器、装饰器和协程装饰器"""
+        with self.metrics.timer("stage_seconds", stage="a"):
+            pass
+
+        @self.metrics.timer("stage_seconds", stage="b")
+        def work(x):
+            return x * 2
+
+        @self.metrics.timer("stage_seconds", stage="c")
+        async def work_async(x):
+            return x + 1
+
+        self.assertEqual(work(2), 4)
+        self.assertEqual(asyncio.run(work_async(2)), 3)
+        counts = {h["labels"]["stage"]: h["count"] for h in self.metrics.snapshot()["histograms"]}
+        self.assertEqual(counts, {"a": 1, "b": 1, "c": 1})
+
+    def test_export(self):
+        """测试：导出 Prometheus 文本 (累计分桶) 和 JSON"""
+        self.metrics.inc("rows_saved_total", 10, format="csv")
+        self.metrics.observe("latency", 0.5, host='a"b')
+        text = self.metrics.to_prometheus()
+        self.assertIn('rows_saved_total{format="csv"} 10', text)
+        self.assertIn('latency_bucket{host="a\\"b",le="+Inf"} 1', text)
+        self.assertIn('latency_bucket{host="a\\"b",le="1"} 1', text)
+
+        with tempfile.TemporaryDirectory() as tmp:
+            path = self.metrics.export(os.path.join(tmp, "metrics.json"))
+            with open(path, encoding="utf-8") as f:
+                self.assertEqual(json.load(f)["counters"][0]["value"], 10)
+
+    def test_retry_policy_reports_retries(self):
+        """测试：RetryPolicy 记录重试次数和放弃次数"""
+        metrics = get_metrics()
+        before = metrics.counter_value("retries_total", error="ThrottledError")
+        exhausted = metrics.counter_value("retries_exhausted_total", error="ThrottledError")
+        policy = RetryPolicy(max_attempts=3, base_delay=0, jitter=False)
+
+        def fail():
+            raise ThrottledError("429")
+
+        with self.assertRaises(ThrottledError):
+            policy.call(fail)
+        self.assertEqual(metrics.counter_value("retries_total", error="ThrottledError") - before, 2)
+        self.assertEqual(metrics.counter_value("retries_exhausted_total", error="ThrottledError") - exhausted, 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,79 @@
+import os
+import tempfile
+import unittest
+
+import pandas as pd
+from utils.atomic import write_atomic
+from utils.output import OutputWriter
+
+
+class TestOutputWriter(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.df = pd.DataFrame({"代码": ["000001", "600000"], "涨跌幅": [1.5, -0.3]})
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_formats_round_trip(self):
+        """测试：后台写入 csv / parquet / feather, 读回内容一致且不残留临时文件"""
+        readers = {"csv": lambda p: pd.read_csv(p, dtype={"代码": str}),
+                   "parquet": pd.read_parquet, "feather": pd.read_feather}
+        for fmt, read in readers.items():
+            with OutputWriter(self.tmp.name, fmt) as writer:
+                futures = [writer.submit(self.df, f"板块{i}") for i in range(3)]
+            self.assertTrue(all(f.done() for f in futures))
+            for i in range(3):
+                pd.testing.assert_frame_equal(read(writer.path(f"板块{i}")), self.df, check_dtype=False)
+        self.assertFalse([name for name in os.listdir(self.tmp.name) if name.startswith(".")])
+
+    def test_consolidate(self):
+        """测试：合并模式下只生成一个文件, 新增板块名称列"""
+        with OutputWriter(self.tmp.name, "parquet", consolidate=True, consolidated_name="全部") as writer:
+            writer.submit(self.df, "低空经济")
+            writer.submit(self.df.iloc[:1], "数字货币")
+        self.assertEqual(os.listdir(self.tmp.name), ["全部.parquet"])
+        df = pd.read_parquet(writer.path("全部"))
+        self.assertEqual(df.columns.tolist(), ["板块名称", "代码", "涨跌幅"])
+        self.assertEqual(df["板块名称"].tolist(), ["低空经济", "低空经济", "数字货币"])
+
+    def test_failed_write_keeps_old_file(self):
+        """测试：写入失败时保留原文件, 临时文件被清理, flush 抛出异常"""
+        path = os.path.join(self.tmp.name, "a.csv")
+        write_atomic(path, lambda p: self.df.to_csv(p, index=False))
+
+        def _broken(p):
+            with open(p, "w") as f:
+                f.write("partial")
+            raise OSError("disk full")
+
+        with self.assertRaises(OSError):
+            write_atomic(path, _broken)
+        self.assertEqual(len(pd.read_csv(path)), 2)
+        self.assertEqual(os.listdir(self.tmp.name), ["a.csv"])
+
+        writer = OutputWriter(self.tmp.name, "csv")
+        writer.submit("not a frame", "b")
+        with self.assertRaises(AttributeError):
+            writer.close()
+
+    def test_prune(self):
+        """测试：prune 只移除已完成的任务并返回失败任务的异常, 不抛出"""
+        writer = OutputWriter(self.tmp.name, "csv")
+        writer.submit(self.df, "a")
+        writer.submit("not a frame", "b")
+        writer._executor.shutdown(wait=True)
+        errors = writer.prune()
+        self.assertEqual([type(e) for e in errors], [AttributeError])
+        self.assertEqual(writer._futures, [])
+        writer.close()
+
+    def test_unknown_format(self):
+        """测试：不支持的格式直接报错"""
+        with self.assertRaises(ValueError):
+            OutputWriter(self.tmp.name, "json")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,80 @@
+import os
+import sys
+import tempfile
+import unittest
+
+import numpy as np
+import pandas as pd
+from percentage_change.percentage_change import count_changes, get_percentage_change, main
+from utils.config_loader import ConfigError
+
+BINS = [-100, -20, -10, -3, 0, 3, 10, 20, 100]
+LABELS = ["Down >20%", "Down 10%-20%", "Down 3%-10%", "Down 0%-3%", "Up 0%-3%", "Up 3%-10%", "Up 10%-20%", "Up >20%"]
+
+
+class TestPercentageChange(unittest.TestCase):
+
+    def test_count_changes_dataframe(self):
+        """测试：DataFrame 输入与 pd.cut + value_counts 结果一致"""
+        df = pd.DataFrame({"涨跌幅": np.linspace(-30, 30, 601)})
+        expected = pd.cut(df["涨跌幅"], bins=BINS, labels=LABELS).value_counts().sort_index()
+        counts = count_changes(df, BINS, LABELS)
+        self.assertEqual(counts.index.tolist(), LABELS)
+        self.assertEqual(counts.tolist(), expected.tolist())
+
+    def test_count_changes_array_with_decimal(self):
+        """测试：数组输入, 小数形式的涨跌幅自动转为百分比"""
+        counts = count_changes(np.array([0.01, -0.05, 0.25]), BINS, LABELS)
+        self.assertEqual(counts["Up 0%-3%"], 1)
+        self.assertEqual(counts["Down 3%-10%"], 1)
+        self.assertEqual(counts["Up >20%"], 1)
+
+    def test_missing_column(self):
+        """测试：列名不匹配时抛出 KeyError"""
+        with self.assertRaises(KeyError):
+            count_changes(pd.DataFrame({"change": [1.0]}), BINS, LABELS)
+
+    def test_pipeline_with_pluggable_stages(self):
+        """测试：替换获取和绘图步骤, 关闭可视化时不导入 matplotlib"""
+        rendered = []
+        counts = get_percentage_change(
+            BINS, LABELS, {"enabled": False}, {},
+            fetcher=lambda: pd.DataFrame({"涨跌幅": [1.0, 2.0, -15.0]}),
+            renderer=lambda count, cfg: rendered.append(count),
+        )
+        self.assertEqual(counts["Up 0%-3%"], 2)
+        self.assertEqual(rendered, [])
+        self.assertNotIn("matplotlib.pyplot", sys.modules)
+
+        get_percentage_change(
+            BINS, LABELS, {"enabled": True}, {},
+            fetcher=lambda: pd.DataFrame({"涨跌幅": [1.0]}),
+            renderer=lambda count, cfg: rendered.append(count),
+        )
+        self.assertEqual(len(rendered), 1)
+
+    def test_deprecated_conver_percentage(self):
+        """测试：旧参数名 conver_percentage 仍然可用, 并给出 DeprecationWarning"""
+        stages = {"fetcher": lambda: pd.DataFrame({"涨跌幅": [0.01, 0.05]}), "renderer": lambda count, cfg: None}
+        with self.assertWarns(DeprecationWarning):
+            counts = get_percentage_change(BINS, LABELS, {"enabled": False}, {}, conver_percentage=False, **stages)
+        self.assertEqual(counts["Up 0%-3%"], 2)
+
+        with self.assertWarns(DeprecationWarning):
+            counts = get_percentage_change(BINS, LABELS, {"enabled": False}, {}, conver_percentage=True, **stages)
+        self.assertEqual(counts["Up 0%-3%"], 1)
+        self.assertEqual(counts["Up 3%-10%"], 1)
+
+    def test_old_config_key_rejected(self):
+        """测试：配置文件中的旧键名 conver_percentage 不再接受, 报错并提示正确的键名"""
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            path = os.path.join(tmp_dir, "config.yaml")
+            with open(path, "w", encoding="utf-8") as f:
+                f.write("data_processing:\n  conver_percentage: false\n")
+            with self.assertRaises(ConfigError) as cm:
+                main(config_path=path)
+        self.assertIn("是否应为 data_processing.convert_percentage?", str(cm.exception))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,81 @@
+import asyncio
+import threading
+import time
+import unittest
+
+from utils.rate_limit import HostRateLimiter, TokenBucket, get_rate_limiter
+
+
+class TestTokenBucket(unittest.TestCase):
+
+    def test_burst_then_rate(self):
+        """测试：桶内令牌用完后按 rate 放行"""
+        bucket = TokenBucket(rate=50, burst=5)
+        start = time.monotonic()
+        for _ in range(10):
+            bucket.acquire()
+        elapsed = time.monotonic() - start
+        # 前 5 个立即放行, 后 5 个约需 5 / 50 = 0.1 秒
+        self.assertGreaterEqual(elapsed, 0.08)
+        self.assertLess(elapsed, 0.5)
+
+    def test_shared_across_threads(self):
+        """测试：多个线程共用同一个令牌桶的速率"""
+        bucket = TokenBucket(rate=100, burst=1)
+        start = time.monotonic()
+        threads = [threading.Thread(target=lambda: [bucket.acquire() for _ in range(5)]) for _ in range(4)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        self.assertGreaterEqual(time.monotonic() - start, 0.17)
+
+    def test_acquire_async(self):
+        """测试：协程中等待令牌不阻塞事件循环"""
+        bucket = TokenBucket(rate=50, burst=1)
+
+        async def main():
+            start = time.monotonic()
+            await asyncio.gather(*(bucket.acquire_async() for _ in range(6)))
+            return time.monotonic() - start
+
+        self.assertGreaterEqual(asyncio.run(main()), 0.08)
+
+    def test_adaptive_rate(self):
+        """测试：被限流时降速, 成功后逐步恢复, 且不超出上下限"""
+        bucket = TokenBucket(rate=8, min_rate=1, max_rate=10, increase_step=1)
+        bucket.on_throttle()
+        self.assertEqual(bucket.rate, 4)
+        for _ in range(5):
+            bucket.on_throttle()
+        self.assertEqual(bucket.rate, 1)
+        for _ in range(20):
+            bucket.on_success()
+        self.assertEqual(bucket.rate, 10)
+
+
+class TestHostRateLimiter(unittest.TestCase):
+
+    def test_bucket_per_host(self):
+        """测试：同一 host 共用令牌桶, host 配置覆盖默认配置"""
+        limiter = HostRateLimiter({"default": {"rate": 2}, "hosts": {"29.push2.eastmoney.com": {"rate": 6}}})
+        a = limiter.bucket("https://79.push2.eastmoney.com/api/qt/clist/get")
+        b = limiter.bucket("https://79.push2.eastmoney.com/other")
+        c = limiter.bucket("https://29.push2.eastmoney.com/api/qt/clist/get")
+        self.assertIs(a, b)
+        self.assertEqual(a.rate, 2)
+        self.assertEqual(c.rate, 6)
+
+    def test_shared_limiter_per_config(self):
+        """测试：相同配置共用同一个限流器, 不同配置各自生效"""
+        config = {"default": {"rate": 3}, "hosts": {"29.push2.eastmoney.com": {"rate": 7}}}
+        same = {"hosts": {"29.push2.eastmoney.com": {"rate": 7}}, "default": {"rate": 3}}
+        self.assertIs(get_rate_limiter(config), get_rate_limiter(same))
+
+        other = get_rate_limiter({"default": {"rate": 100}})
+        self.assertIsNot(other, get_rate_limiter(config))
+        self.assertEqual(other.bucket("https://79.push2.eastmoney.com/").rate, 100)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,6 +1,7 @@
+import asyncio
 import unittest
 import time
-from utils.retry import retry
+from utils.retry import RetryPolicy, ThrottledError, retry
 
 
 class TestRetryDecorator(unittest.TestCase):
@@ -81,5 +82,90 @@ class TestRetryDecorator(unittest.TestCase):
         self.assertEqual(len(calls), 2)
 
 
+class _Response:
+    def __init__(self, status_code):
+        self.status_code = status_code
+
+
+class _HTTPError(Exception):
+    def __init__(self, status_code):
+        super().__init__(f"HTTP {status_code}")
+        self.response = _Response(status_code)
+
+
+class TestRetryPolicy(unittest.TestCase):
+
+    def test_retry_transient_errors(self):
+        """测试：超时等临时性错误会重试直到成功"""
+        calls = []
+        policy = RetryPolicy(max_attempts=4, base_delay=0.001)
+
+        def flaky():
+            calls.append(1)
+            if len(calls) < 3:
+                raise TimeoutError("timeout")
+            return "ok"
+
+        self.assertEqual(policy.call(flaky), "ok")
+        self.assertEqual(len(calls), 3)
+
+    def test_non_retryable_error_raises_immediately(self):
+        """测试：非临时性错误不重试"""
+        calls = []
+        policy = RetryPolicy(max_attempts=4, base_delay=0.001)
+
+        def broken():
+            calls.append(1)
+            raise KeyError("bad data")
+
+        with self.assertRaises(KeyError):
+            policy.call(broken)
+        self.assertEqual(len(calls), 1)
+
+    def test_status_classification(self):
+        """测试：5xx 和 429 可以重试, 4xx 不重试"""
+        policy = RetryPolicy()
+        self.assertTrue(policy.is_retryable(_HTTPError(503)))
+        self.assertTrue(policy.is_retryable(_HTTPError(429)))
+        self.assertFalse(policy.is_retryable(_HTTPError(404)))
+        self.assertTrue(policy.is_retryable(ThrottledError()))
+
+    def test_exponential_backoff(self):
+        """测试：不带抖动时等待时间指数增长, 并受 max_delay 限制"""
+        policy = RetryPolicy(base_delay=1, max_delay=5, jitter=False)
+        self.assertEqual([policy.backoff(n) for n in range(1, 5)], [1, 2, 4, 5])
+        jittered = RetryPolicy(base_delay=1, max_delay=5)
+        self.assertTrue(all(0 <= jittered.backoff(3) <= 4 for _ in range(20)))
+
+    def test_max_elapsed(self):
+        """测试：总耗时超过 max_elapsed 后不再重试"""
+        calls = []
+        policy = RetryPolicy(max_attempts=10, base_delay=1, jitter=False, max_elapsed=0.5)
+
+        def always_timeout():
+            calls.append(1)
+            raise TimeoutError("timeout")
+
+        start = time.monotonic()
+        with self.assertRaises(TimeoutError):
+            policy.call(always_timeout)
+        self.assertEqual(len(calls), 1)
+        self.assertLess(time.monotonic() - start, 0.5)
+
+    def test_call_async(self):
+        """测试：异步版本同样按策略重试"""
+        calls = []
+        policy = RetryPolicy(max_attempts=3, base_delay=0.001)
+
+        async def flaky():
+            calls.append(1)
+            if len(calls) < 2:
+                raise ConnectionError("reset")
+            return "ok"
+
+        self.assertEqual(asyncio.run(policy.call_async(flaky)), "ok")
+        self.assertEqual(len(calls), 2)
+
+
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,48 @@
+import unittest
+
+import numpy as np
+from stock_concept.schema import CONCEPT_SCHEMA, Field, Schema
+
+
+class TestSchema(unittest.TestCase):
+
+    def setUp(self):
+        self.schema = Schema(
+            [Field("f12", "代码", "str"), Field("f2", "最新价"), Field("f104", "上涨家数", "int64")],
+            index_name="序号",
+        )
+
+    def test_fields_param(self):
+        """测试：请求参数只包含 schema 中的字段"""
+        self.assertEqual(self.schema.fields_param, "f12,f2,f104")
+        self.assertIn("f128", CONCEPT_SCHEMA.fields_param.split(","))
+
+    def test_parse_by_field_code(self):
+        """测试：按字段代码取值, 与接口返回的字段顺序无关"""
+        diff = {
+            "0": {"f2": 10.5, "f104": 3, "f12": "000001"},
+            "1": {"f104": 5, "f12": "600000", "f2": "8.2"},
+        }
+        df = self.schema.parse(diff, start=101)
+        self.assertEqual(list(df.columns), ["序号", "代码", "最新价", "上涨家数"])
+        self.assertEqual(df["序号"].tolist(), [101, 102])
+        self.assertEqual(df["代码"].tolist(), ["000001", "600000"])
+        self.assertEqual(df["最新价"].tolist(), [10.5, 8.2])
+        self.assertEqual(df["上涨家数"].dtype, np.int64)
+
+    def test_missing_values_become_nan(self):
+        """测试："-" 和缺失字段转为 NaN, 整数列含缺失值时保留为浮点"""
+        diff = [{"f12": "000001", "f2": "-", "f104": 3}, {"f12": "000002"}]
+        df = self.schema.parse(diff)
+        self.assertTrue(np.isnan(df["最新价"]).all())
+        self.assertEqual(df["上涨家数"].dtype, np.float64)
+
+    def test_empty_page(self):
+        """测试：空页面返回带完整列名的空 DataFrame"""
+        df = self.schema.parse(None)
+        self.assertEqual(len(df), 0)
+        self.assertEqual(list(df.columns), ["序号", "代码", "最新价", "上涨家数"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,170 @@
+import asyncio
+import tempfile
+import threading
+import time
+import unittest
+
+import pandas as pd
+from utils.cache import TieredCache
+from utils.single_flight import FileSingleFlight, SingleFlight, fcntl
+
+
+class TestSingleFlight(unittest.TestCase):
+
+    def setUp(self):
+        self.flight = SingleFlight()
+        self.calls = 0
+
+    def _slow(self, value, seconds=0.1):
+        self.calls += 1
+        time.sleep(seconds)
+        return value
+
+    async def _slow_async(self, value, seconds=0.1):
+        self.calls += 1
+        await asyncio.sleep(seconds)
+        return value
+
+    def test_threads_share_one_call(self):
+        """测试：多个线程并发调用同一个 key 时只执行一次, 共享同一个结果"""
+        results = []
+
+        def worker():
+            results.append(self.flight.do(("concept_stocks", "BK1158"), self._slow, "data"))
+
+        threads = [threading.Thread(target=worker) for _ in range(8)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+        self.assertEqual(self.calls, 1)
+        self.assertEqual([value for value, _ in results], ["data"] * 8)
+        self.assertEqual(sum(shared for _, shared in results), 7)
+        self.assertEqual(self.flight.in_flight(), 0)
+
+    def test_different_keys_not_shared(self):
+        """测试：不同的 key 分别执行"""
+        threads = [threading.Thread(target=self.flight.do, args=(("concept_stocks", code), self._slow, code))
+                   for code in ("BK1158", "BK0947")]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        self.assertEqual(self.calls, 2)
+
+    def test_error_shared_and_not_cached(self):
+        """测试：执行失败时等待方收到同一个异常, 之后的调用重新执行"""
+        def fail():
+            time.sleep(0.1)
+            raise ConnectionError("断开")
+
+        errors = []
+
+        def worker():
+            try:
+                self.flight.do("key", fail)
+            except ConnectionError as e:
+                errors.append(e)
+
+        threads = [threading.Thread(target=worker) for _ in range(3)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+        self.assertEqual(len(errors), 3)
+        self.assertEqual(self.flight.do("key", lambda: "ok"), ("ok", False))
+
+    def test_async_tasks_share_one_call(self):
+        """测试：多个 asyncio 任务并发调用同一个 key 时只执行一次"""
+        async def main():
+            return await asyncio.gather(*(self.flight.do_async("key", self._slow_async, "data") for _ in range(5)))
+
+        results = asyncio.run(main())
+        self.assertEqual(self.calls, 1)
+        self.assertEqual([value for value, _ in results], ["data"] * 5)
+
+    def test_thread_and_task_share(self):
+        """测试：线程中的调用和 asyncio 任务中的调用互相复用"""
+        thread = threading.Thread(target=self.flight.do, args=("key", self._slow, "data", 0.2))
+        thread.start()
+        time.sleep(0.05)
+        value, shared = asyncio.run(self.flight.do_async("key", self._slow_async, "other"))
+        thread.join()
+
+        self.assertEqual((value, shared), ("data", True))
+        self.assertEqual(self.calls, 1)
+
+    def test_cancelled_leader_handed_over(self):
+        """测试：执行方的任务被取消时, 等待方接替执行而不是收到取消"""
+        async def main():
+            leader = asyncio.ensure_future(self.flight.do_async("key", self._slow_async, "data"))
+            await asyncio.sleep(0.01)
+            follower = asyncio.ensure_future(self.flight.do_async("key", self._slow_async, "data"))
+            await asyncio.sleep(0.01)
+            leader.cancel()
+            return await follower
+
+        self.assertEqual(asyncio.run(main()), ("data", False))
+        self.assertEqual(self.calls, 2)
+
+
+@unittest.skipIf(fcntl is None, "需要 fcntl")
+class TestFileSingleFlight(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.calls = 0
+        self.df = pd.DataFrame({"代码": ["000001", "000002"], "涨跌幅": [1.5, -0.3]})
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def _flight(self, window=0):
+        # 每个实例使用独立的 TieredCache 和文件句柄, 相当于共用缓存目录的不同进程
+        return FileSingleFlight(TieredCache(self.tmp_dir.name), window=window)
+
+    def _fetch(self):
+        self.calls += 1
+        time.sleep(0.2)
+        return self.df
+
+    def test_waiting_process_reuses_result(self):
+        """测试：等待文件锁的进程直接读取另一个进程写入缓存的结果"""
+        results = {}
+        first = threading.Thread(target=lambda: results.setdefault("first", self._flight().do("key", self._fetch)))
+        first.start()
+        time.sleep(0.05)
+        results["second"] = self._flight().do("key", self._fetch)
+        first.join()
+
+        self.assertEqual(self.calls, 1)
+        self.assertFalse(results["first"][1])
+        self.assertTrue(results["second"][1])
+        pd.testing.assert_frame_equal(results["second"][0], self.df)
+
+    def test_window(self):
+        """测试：window 秒内写入的结果可以复用, window 为 0 时重新执行"""
+        self._flight().do("key", self._fetch)
+        self.assertTrue(self._flight(window=60).do("key", self._fetch)[1])
+        self.assertFalse(self._flight().do("key", self._fetch)[1])
+        self.assertEqual(self.calls, 2)
+
+    def test_async(self):
+        """测试：异步版本同样复用其它进程写入的结果"""
+        async def fetch_async():
+            return self._fetch()
+
+        thread = threading.Thread(target=self._flight().do, args=("key", self._fetch))
+        thread.start()
+        time.sleep(0.05)
+        value, shared = asyncio.run(self._flight().do_async("key", fetch_async))
+        thread.join()
+
+        self.assertTrue(shared)
+        self.assertEqual(self.calls, 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
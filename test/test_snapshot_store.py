@@ -0,0 +1,70 @@
+import tempfile
+import unittest
+from datetime import date, datetime
+
+import pandas as pd
+from percentage_change.snapshot_store import SpotSnapshotStore
+
+
+def _snapshot(prices: dict) -> pd.DataFrame:
+    codes = sorted(prices)
+    return pd.DataFrame({
+        "序号": range(1, len(codes) + 1),
+        "代码": codes,
+        "最新价": [prices[c] for c in codes],
+        "涨跌幅": [prices[c] / 10 for c in codes],
+    })
+
+
+class TestSpotSnapshotStore(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.store = SpotSnapshotStore(self.tmp_dir.name, keyframe_interval=3)
+        self.t1 = datetime(2024, 6, 3, 9, 30)
+        self.t2 = datetime(2024, 6, 3, 9, 31)
+        self.t3 = datetime(2024, 6, 3, 9, 32)
+        self.store.append(_snapshot({"000001": 10.0, "600000": 8.0, "300750": 200.0}), self.t1)
+        self.store.append(_snapshot({"000001": 10.1, "600000": 8.0, "300750": 200.0}), self.t2)
+        self.store.append(_snapshot({"000001": 10.1, "600000": 8.0, "688981": 50.0}), self.t3)
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_delta_only_stores_changed_rows(self):
+        """测试：增量快照只保存变化的行, 并记录被移除的代码"""
+        entries = self.store._read_index(date(2024, 6, 3))
+        self.assertEqual([e["kind"] for e in entries], ["full", "delta", "delta"])
+        self.assertEqual([e["rows"] for e in entries], [3, 1, 1])
+        self.assertEqual(entries[2]["removed"], ["300750"])
+
+    def test_load_reconstructs_snapshot(self):
+        """测试：读取时还原出完整快照"""
+        df = self.store.load(self.t3).sort_values("代码").reset_index(drop=True)
+        self.assertEqual(df["代码"].tolist(), ["000001", "600000", "688981"])
+        self.assertEqual(df["最新价"].tolist(), [10.1, 8.0, 50.0])
+        self.assertNotIn("序号", df.columns)
+
+    def test_query_by_time_and_code(self):
+        """测试：按时间范围和股票代码查询"""
+        result = self.store.query(self.t2, self.t3, codes=["000001"])
+        self.assertEqual(result["时间"].tolist(), [self.t2, self.t3])
+        self.assertEqual(result["最新价"].tolist(), [10.1, 10.1])
+
+        whole_day = self.store.query(date(2024, 6, 3), date(2024, 6, 3), columns=["涨跌幅"])
+        self.assertEqual(len(whole_day), 9)
+        self.assertEqual(list(whole_day.columns), ["时间", "代码", "涨跌幅"])
+
+    def test_keyframe_interval(self):
+        """测试：达到间隔后写入完整快照, 新进程也能基于已有数据继续写增量"""
+        store = SpotSnapshotStore(self.tmp_dir.name, keyframe_interval=3)
+        store.append(_snapshot({"000001": 10.2, "600000": 8.0}), datetime(2024, 6, 3, 9, 33))
+        store.append(_snapshot({"000001": 10.3, "600000": 8.0}), datetime(2024, 6, 3, 9, 34))
+        entries = store._read_index(date(2024, 6, 3))
+        self.assertEqual([e["kind"] for e in entries], ["full", "delta", "delta", "full", "delta"])
+        df = store.load(datetime(2024, 6, 3, 9, 34)).sort_values("代码")
+        self.assertEqual(df["最新价"].tolist(), [10.3, 8.0])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,35 @@
+import os
+import threading
+
+
+def _tmp_path(path: str) -> str:
+    """与目标文件同目录、同扩展名的临时文件, 扩展名保留以便 pandas 选择 Excel 引擎; 以 . 开头, 缓存淘汰时跳过"""
+    directory, name = os.path.split(os.fspath(path))
+    stem, ext = os.path.splitext(name)
+    return os.path.join(directory, f".{stem}.{os.getpid()}-{threading.get_ident()}.tmp{ext}")
+
+
+def write_atomic(path, write):
+    """
+    先写临时文件再重命名, 其它进程和线程不会读到写了一半的文件; 写入失败时保留原文件并删除临时文件.
+
+    Args:
+        path (str | Path): 目标文件路径.
+        write (callable): 接收临时文件路径 (str) 并写入内容的函数.
+    """
+    tmp_path = _tmp_path(path)
+    try:
+        write(tmp_path)
+        os.replace(tmp_path, path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+
+def write_text_atomic(path, content: str, encoding: str = "utf-8"):
+    """原子写入文本文件"""
+    def _write(tmp_path):
+        with open(tmp_path, "w", encoding=encoding) as f:
+            f.write(content)
+
+    write_atomic(path, _write)
@@ -1,23 +1,241 @@
 import os
 import pickle
-from datetime import datetime, timedelta
+import threading
+import time
+from collections import OrderedDict
+from datetime import timedelta
 from pathlib import Path
-from typing import Any
+from typing import Any, Optional
 
-def load_cache(path: str, ttl_hours: int = 24):
-    path = Path(path)
-    if not path.exists():
+import pandas as pd
+
+from utils.atomic import write_atomic
+from utils.metrics import get_metrics
+
+try:
+    import pyarrow as pa
+    import pyarrow.feather as feather
+except ImportError:  # 未安装 pyarrow 时全部退回 pickle
+    pa = None
+
+
+def _arrow_path(path: Path) -> Path:
+    """DataFrame 以 Arrow IPC 格式存放在同名的 .arrow 文件中"""
+    return path.with_suffix(".arrow")
+
+
+def _stored_path(path: Path) -> Optional[Path]:
+    """返回实际存在的缓存文件, Arrow 文件优先"""
+    for candidate in (_arrow_path(path), path):
+        if candidate.exists():
+            return candidate
+    return None
+
+
+def cache_mtime(path: str) -> Optional[float]:
+    """缓存文件的最后写入时间, 缓存不存在时返回 None"""
+    stored = _stored_path(Path(path))
+    return stored.stat().st_mtime if stored else None
+
+
+def load_cache(path: str, ttl_hours: int = 24, columns: Optional[list] = None, *, ttl_seconds: Optional[float] = None):
+    """读取缓存, 超过 ttl_hours (或 ttl_seconds, 优先) 视为过期
+
+    DataFrame 缓存以内存映射方式读取 Arrow IPC 文件, 传入 columns 时只读取这些列;
+    其它类型的数据读取 pickle 文件.
+    """
+    stored = _stored_path(Path(path))
+    if stored is None:
         return None
 
-    mtime = datetime.fromtimestamp(path.stat().st_mtime)
-    if datetime.now() - mtime > timedelta(hours=ttl_hours):
+    if ttl_seconds is None:
+        ttl_seconds = timedelta(hours=ttl_hours).total_seconds()
+    if time.time() - stored.stat().st_mtime > ttl_seconds:
         return None
 
-    with open(path, "rb") as f:
-        return pickle.load(f)
+    if stored.suffix == ".arrow":
+        if pa is None:
+            return None
+        table = feather.read_table(stored, columns=columns, memory_map=True)
+        return table.to_pandas(split_blocks=True)
+
+    with open(stored, "rb") as f:
+        data = pickle.load(f)
+    if columns is not None and isinstance(data, pd.DataFrame):
+        data = data[columns]
+    return data
+
 
 def save_cache(path: str, data: Any):
+    """写入缓存, DataFrame 写成未压缩的 Arrow IPC 文件以便内存映射读取, 其它数据使用 pickle"""
     path = Path(path)
     os.makedirs(path.parent, exist_ok=True)
-    with open(path, "wb") as f:
-        pickle.dump(data, f)
\ No newline at end of file
+    arrow_path = _arrow_path(path)
+
+    if pa is not None and isinstance(data, pd.DataFrame):
+        try:
+            table = pa.Table.from_pandas(data)
+        except (pa.ArrowInvalid, pa.ArrowTypeError, pa.ArrowNotImplementedError):
+            table = None  # 含有 Arrow 无法表示的列, 退回 pickle
+        if table is not None:
+            write_atomic(arrow_path, lambda p: feather.write_feather(table, p, compression="uncompressed"))
+            if path != arrow_path and path.exists():
+                path.unlink()
+            return
+
+    def _dump(p):
+        with open(p, "wb") as f:
+            pickle.dump(data, f)
+
+    write_atomic(path, _dump)
+    if path != arrow_path and arrow_path.exists():
+        arrow_path.unlink()
+
+
+class TieredCache:
+    """两级缓存: 进程内 LRU 内存层 + 有容量上限的磁盘层
+
+    - 内存层最多保留 memory_entries 个对象, 命中时不再读取磁盘
+    - 磁盘层按最近访问时间淘汰, 文件数不超过 max_entries, 总大小不超过 max_bytes
+    - 两层共用同一个以秒为单位的 ttl_seconds
+    内存层直接返回缓存中的对象, 调用方不应原地修改返回的 DataFrame.
+    """
+
+    def __init__(
+        self,
+        directory: str,
+        ttl_seconds: float = 3600,
+        memory_entries: int = 32,
+        max_entries: Optional[int] = None,
+        max_bytes: Optional[int] = None,
+    ):
+        self.directory = Path(directory)
+        self.ttl_seconds = ttl_seconds
+        self.memory_entries = memory_entries
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+
+        self._memory = OrderedDict()  # key -> (value, 写入时间)
+        self._lock = threading.Lock()
+        self.stats = {"memory_hits": 0, "disk_hits": 0, "misses": 0, "memory_evictions": 0, "disk_evictions": 0}
+
+    def _path(self, key: str) -> Path:
+        return self.directory / key
+
+    def _count(self, name: str):
+        with self._lock:
+            self.stats[name] += 1
+        get_metrics().inc("cache_events_total", event=name)
+
+    def _remember(self, key: str, value: Any, stored_at: float):
+        with self._lock:
+            self._memory[key] = (value, stored_at)
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.memory_entries:
+                self._memory.popitem(last=False)
+                self.stats["memory_evictions"] += 1
+                get_metrics().inc("cache_events_total", event="memory_evictions")
+
+    def get(self, key: str, columns: Optional[list] = None, ttl_seconds: Optional[float] = None):
+        """读取缓存, 依次查找内存层和磁盘层, 均未命中时返回 None
+
+        ttl_seconds 可临时放宽过期时间, 例如传入 math.inf 读取已过期的旧快照.
+        """
+        ttl_seconds = self.ttl_seconds if ttl_seconds is None else ttl_seconds
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None and time.time() - entry[1] > ttl_seconds:
+                entry = None
+            if entry is not None:
+                self._memory.move_to_end(key)
+                self.stats["memory_hits"] += 1
+        if entry is not None:
+            get_metrics().inc("cache_events_total", event="memory_hits")
+            value = entry[0]
+            return value[columns] if columns is not None and isinstance(value, pd.DataFrame) else value
+
+        path = self._path(key)
+        with get_metrics().timer("cache_read_seconds"):
+            value = load_cache(path, columns=columns, ttl_seconds=ttl_seconds)
+        if value is None:
+            self._count("misses")
+            return None
+
+        self._count("disk_hits")
+        stored = _stored_path(path)
+        mtime = stored.stat().st_mtime
+        os.utime(stored, (time.time(), mtime))  # 记录访问时间供 LRU 淘汰, 保留 mtime 用于过期判断
+        if columns is None:
+            self._remember(key, value, mtime)
+        return value
+
+    def set(self, key: str, value: Any):
+        """写入内存层和磁盘层, 之后按容量上限淘汰磁盘文件"""
+        with get_metrics().timer("cache_write_seconds"):
+            save_cache(self._path(key), value)
+        self._remember(key, value, cache_mtime(self._path(key)))
+        self.evict()
+
+    def mtime(self, key: str) -> Optional[float]:
+        return cache_mtime(self._path(key))
+
+    def invalidate(self, key: str):
+        with self._lock:
+            self._memory.pop(key, None)
+        path = self._path(key)
+        for stored in (_arrow_path(path), path):
+            if stored.exists():
+                stored.unlink()
+
+    def evict(self):
+        """删除过期文件, 再按最近访问时间淘汰超出 max_entries / max_bytes 的文件"""
+        if not self.directory.exists():
+            return
+        now = time.time()
+        files = []
+        for entry in os.scandir(self.directory):
+            if not entry.is_file() or entry.name.startswith("."):
+                continue
+            stat = entry.stat()
+            if now - stat.st_mtime > self.ttl_seconds:
+                self._evict_file(entry.path)
+                continue
+            files.append((max(stat.st_atime, stat.st_mtime), stat.st_size, entry.path))
+
+        files.sort()  # 最久未访问的排在前面
+        total_bytes = sum(size for _, size, _ in files)
+        while files and (
+            (self.max_entries is not None and len(files) > self.max_entries)
+            or (self.max_bytes is not None and total_bytes > self.max_bytes)
+        ):
+            _, size, file_path = files.pop(0)
+            total_bytes -= size
+            self._evict_file(file_path)
+
+    def _evict_file(self, file_path: str):
+        try:
+            os.remove(file_path)
+        except FileNotFoundError:  # 已被其它进程或线程删除
+            return
+        key = Path(file_path).name
+        with self._lock:
+            self.stats["disk_evictions"] += 1
+            # 内存层的 key 可能是 .pkl 形式, 对应磁盘上的 .arrow 文件
+            for memory_key in [k for k in self._memory if Path(k).stem == Path(key).stem]:
+                del self._memory[memory_key]
+        get_metrics().inc("cache_events_total", event="disk_evictions")
+
+
+_caches = {}
+_caches_lock = threading.Lock()
+
+
+def get_cache(directory: str, **kwargs) -> TieredCache:
+    """获取指定目录的共享 TieredCache, 同一进程内同一目录只创建一次"""
+    directory = os.path.abspath(directory)
+    with _caches_lock:
+        cache = _caches.get(directory)
+        if cache is None:
+            cache = TieredCache(directory, **kwargs)
+            _caches[directory] = cache
+        return cache
@@ -1,25 +1,125 @@
+import copy
+import difflib
 import os
+import sys
+import threading
+from typing import Optional
+
 import yaml
-import inspect
 
-def load_config(config_name: str = "config.yaml") -> any:
+# 已解析的配置, {绝对路径: (mtime_ns, size, config, 已通过校验的 schema 列表)}, 文件修改后重新解析
+_configs = {}
+_lock = threading.Lock()
+
+
+class ConfigError(ValueError):
+    """配置文件不符合 schema 时抛出, 信息中列出所有问题"""
+
+
+def load_config(config_name: str = "config.yaml", schema: Optional[dict] = None,
+                base_dir: Optional[str] = None) -> dict:
     """
-    自动加载调用者所在目录的配置文件。
-    默认查找 config.yaml, 可以自定义配置文件名。
+    读取并校验 YAML 配置. 同一路径只在第一次调用或文件被修改后解析, 每个 schema 只校验一次
+    (先不带 schema 读取过的文件, 之后带 schema 读取时仍会校验), 其余调用直接返回缓存的副本,
+    可以在频繁构造的对象中调用.
+
+    Args:
+        config_name (str, optional): 配置文件路径, 绝对路径直接使用, 相对路径基于 base_dir. Defaults to "config.yaml".
+        schema (dict, optional): 配置的 schema, 见 validate_config, 不符合时抛出 ConfigError. Defaults to None.
+        base_dir (str, optional): 相对路径的基准目录, 为空时使用调用者所在的目录. Defaults to None.
+
+    Returns:
+        dict: 配置内容, 修改返回值不会影响缓存.
     """
+    if os.path.isabs(config_name):
+        config_path = config_name
+    else:
+        if base_dir is None:
+            # 只读取调用者这一帧的文件名, 不用 inspect.stack() 构建整个调用栈
+            base_dir = os.path.dirname(os.path.abspath(sys._getframe(1).f_code.co_filename))
+        config_path = os.path.join(base_dir, config_name)
+
+    try:
+        stat = os.stat(config_path)
+    except FileNotFoundError:
+        raise FileNotFoundError(f"配置文件 {config_path} 不存在") from None
+
+    with _lock:
+        cached = _configs.get(config_path)
+    if cached is None or cached[:2] != (stat.st_mtime_ns, stat.st_size):
+        with open(config_path, "r", encoding="utf-8") as file:
+            config = yaml.safe_load(file) or {}
+        cached = (stat.st_mtime_ns, stat.st_size, config, [])
+
+    # 按对象身份记录已经校验过的 schema, 列表持有引用, 不会出现 id 被复用的问题
+    if schema is not None and not any(s is schema for s in cached[3]):
+        problems = validate_config(cached[2], schema)
+        if problems:
+            raise ConfigError(f"配置文件 {config_path} 有误:\n  " + "\n  ".join(problems))
+        cached = cached[:3] + (cached[3] + [schema],)
+    with _lock:
+        _configs[config_path] = cached
+
+    return copy.deepcopy(cached[2])
 
-    # 获取调用者所在的文件路径
-    frame = inspect.stack()[1]
-    caller_file = frame.filename
-    caller_dir = os.path.dirname(os.path.abspath(caller_file))
 
-    # 构造配置文件的完整路径
-    config_path = os.path.join(caller_dir, config_name)
+def clear_config_cache():
+    with _lock:
+        _configs.clear()
+
+
+def _type_names(expected) -> str:
+    expected = expected if isinstance(expected, tuple) else (expected,)
+    return " / ".join(t.__name__ for t in expected)
+
+
+def _type_ok(value, expected) -> bool:
+    if value is None:
+        return True  # 空值表示使用默认值
+    expected = expected if isinstance(expected, tuple) else (expected,)
+    if isinstance(value, bool):
+        return bool in expected
+    if isinstance(value, int) and float in expected:
+        return True
+    return isinstance(value, expected)
+
+
+def validate_config(config: dict, schema: dict, prefix: str = "") -> list:
+    """
+    按 schema 校验配置, 返回问题列表; 未知的键会给出最接近的合法键名, 例如 cache.enalbed -> cache.enabled.
+
+    schema 中每个键的值可以是:
+        类型或类型元组, 如 bool / (int, float), 空值总是合法
+        dict 实例, 表示嵌套的配置段, 继续校验其中的键
+        dict 类型本身, 表示键名不固定的配置段 (如 rate_limit.hosts), 只校验是否为字典
+    """
+    if not isinstance(config, dict):
+        return [f"{prefix.rstrip('.') or '配置'} 应为 dict, 实际为 {type(config).__name__}"]
+
+    problems = []
+    for key, value in config.items():
+        name = f"{prefix}{key}"
+        if key not in schema:
+            suggestion = difflib.get_close_matches(str(key), [str(k) for k in schema], n=1, cutoff=0.6)
+            hint = f", 是否应为 {prefix}{suggestion[0]}?" if suggestion else ""
+            problems.append(f"未知的配置项 {name}{hint}")
+            continue
 
-    if not os.path.exists(config_path):
-        raise FileNotFoundError(f"配置文件 {config_path} 不存在")
+        expected = schema[key]
+        if isinstance(expected, dict):
+            if value is not None:
+                problems += validate_config(value, expected, f"{name}.")
+        elif not _type_ok(value, expected):
+            problems.append(f"配置项 {name} 应为 {_type_names(expected)}, 实际为 {type(value).__name__}: {value!r}")
+    return problems
 
-    with open(config_path, "r", encoding="utf-8") as file:
-        config = yaml.safe_load(file)
 
-    return config
\ No newline at end of file
+def merge_config(config: dict, overrides: dict = None) -> dict:
+    """按配置段合并覆盖项, 例如命令行参数 {"output": {"format": "parquet"}} 只覆盖 output.format"""
+    merged = dict(config or {})
+    for section, values in (overrides or {}).items():
+        if isinstance(values, dict) and isinstance(merged.get(section), dict):
+            merged[section] = {**merged[section], **values}
+        else:
+            merged[section] = values
+    return merged
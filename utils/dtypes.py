@@ -0,0 +1,47 @@
+import numpy as np
+import pandas as pd
+
+try:
+    import pyarrow  # noqa: F401
+    _STRING_DTYPE = "string[pyarrow]"
+except ImportError:  # 未安装 pyarrow 时用 category 存放字符串列
+    _STRING_DTYPE = "category"
+
+
+def _compact_column(series: pd.Series, kind: str) -> pd.Series:
+    if kind == "category":
+        return series.astype("category")
+    if kind == "string":
+        # 股票代码等短字符串存为连续的 Arrow 字符串缓冲区, 保留前导 0
+        return series.astype(_STRING_DTYPE)
+    if kind == "float32":
+        return series.astype(np.float32)
+    if kind in ("int8", "int16", "int32"):
+        # 含缺失值时使用可空整数类型
+        return series.astype(kind.capitalize() if series.isna().any() else kind)
+    raise ValueError(f"不支持的压缩类型: {kind}")
+
+
+def frame_nbytes(df: pd.DataFrame) -> int:
+    """DataFrame 实际占用的内存字节数, 包含字符串对象本身"""
+    return int(df.memory_usage(deep=True).sum())
+
+
+def compact_frame(df: pd.DataFrame, dtypes: dict) -> tuple:
+    """按列压缩 DataFrame 的数据类型
+
+    Args:
+        df (pd.DataFrame): 待压缩的数据, 不会被原地修改.
+        dtypes (dict): 列名 -> 压缩类型, 支持 category / string / float32 / int8 / int16 / int32,
+            df 中不存在的列会被忽略.
+
+    Returns:
+        tuple: (压缩后的 DataFrame, {"before": 字节数, "after": 字节数, "saved": 字节数})
+    """
+    before = frame_nbytes(df)
+    compacted = df.copy()
+    for column, kind in dtypes.items():
+        if column in compacted.columns:
+            compacted[column] = _compact_column(compacted[column], kind)
+    after = frame_nbytes(compacted)
+    return compacted, {"before": before, "after": after, "saved": before - after}
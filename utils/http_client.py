@@ -0,0 +1,225 @@
+import threading
+import time
+from typing import Optional
+from urllib.parse import urlsplit, urlunsplit
+
+from utils.metrics import get_metrics
+from utils.rate_limit import HostRateLimiter
+from utils.retry import ThrottledError
+
+# requests 和 httpx 都在第一次发请求时才导入, 只读缓存的调用不需要承担它们的导入耗时
+
+
+def _record(host: str, start: float, status, nbytes: int = 0):
+    """记录单个请求的耗时、状态码和响应字节数"""
+    metrics = get_metrics()
+    metrics.observe("http_request_seconds", time.perf_counter() - start, host=host)
+    metrics.inc("http_requests_total", host=host, status=status)
+    if nbytes:
+        metrics.inc("http_response_bytes_total", nbytes, host=host)
+
+
+def _payload(r, url: str, bucket) -> dict:
+    """
+    解析 JSON 响应. 东方财富被限流时常返回 200 和非 JSON 的内容, 或 data 为空的 JSON,
+    两种情况都抛出 ThrottledError, 由 RetryPolicy 重试这一页, 同时让令牌桶降速.
+    """
+    try:
+        payload = r.json()
+    except ValueError:
+        reason = "响应不是 JSON"
+    else:
+        if not (isinstance(payload, dict) and "data" in payload and payload["data"] is None):
+            return payload
+        reason = "响应的 data 为空"
+
+    host = urlsplit(url).netloc
+    get_metrics().inc("http_soft_throttled_total", host=host)
+    if bucket is not None:
+        bucket.on_throttle()
+    raise ThrottledError(f"{host} {reason}, 视为限流")
+
+
+def _rewrite(url: str, base_url: Optional[str]) -> str:
+    """如果配置了 base_url, 将请求改写到 base_url 上, 路径和参数保持不变"""
+    if not base_url:
+        return url
+    base = urlsplit(base_url)
+    parts = urlsplit(url)
+    return urlunsplit((base.scheme, base.netloc, parts.path, parts.query, parts.fragment))
+
+
+class HttpClient:
+    """按 host 复用连接的 HTTP 客户端
+
+    每个 host 对应一个 requests.Session, 连接池内的连接保持 keep-alive,
+    多页拉取时不必每次重新建立 TCP/TLS 连接.
+    """
+
+    def __init__(
+        self,
+        pool_connections: int = 2,
+        pool_maxsize: int = 8,
+        timeout: float = 10,
+        connect_timeout: Optional[float] = None,
+        base_url: Optional[str] = None,
+        headers: Optional[dict] = None,
+        rate_limiter: Optional[HostRateLimiter] = None,
+    ):
+        """
+        Args:
+            pool_connections (int, optional): 每个 Session 缓存的连接池数量. Defaults to 2.
+            pool_maxsize (int, optional): 每个连接池的最大连接数, 应不小于并发线程数. Defaults to 8.
+            timeout (float, optional): 读取超时时间（秒）. Defaults to 10.
+            connect_timeout (float, optional): 建立连接的超时时间（秒）, 为空时与 timeout 相同. Defaults to None.
+            base_url (str, optional): 将所有请求的 scheme 和 host 替换为该地址, 用于指向本地替身服务. Defaults to None.
+            headers (dict, optional): 附加到每个请求上的请求头. Defaults to None.
+            rate_limiter (HostRateLimiter, optional): 按 host 限流, 请求前取令牌, 被限流或出错时自动降速. Defaults to None.
+        """
+        self.pool_connections = pool_connections
+        self.pool_maxsize = pool_maxsize
+        self.timeout = (connect_timeout or timeout, timeout)
+        self.base_url = base_url
+        self.headers = {"Accept-Encoding": "gzip, deflate", "Connection": "keep-alive"}
+        self.headers.update(headers or {})
+        self.rate_limiter = rate_limiter
+
+        self._sessions = {}
+        self._lock = threading.Lock()
+
+    def _resolve(self, url: str) -> str:
+        return _rewrite(url, self.base_url)
+
+    def session(self, url: str) -> "requests.Session":
+        """获取 url 所属 host 的 Session, 不存在时创建"""
+        import requests
+        from requests.adapters import HTTPAdapter
+
+        host = urlsplit(url).netloc
+        with self._lock:
+            session = self._sessions.get(host)
+            if session is None:
+                session = requests.Session()
+                adapter = HTTPAdapter(pool_connections=self.pool_connections, pool_maxsize=self.pool_maxsize)
+                session.mount("http://", adapter)
+                session.mount("https://", adapter)
+                session.headers.update(self.headers)
+                self._sessions[host] = session
+        return session
+
+    def get(self, url: str, params: Optional[dict] = None, **kwargs) -> "requests.Response":
+        import requests
+
+        # 按原始 host 限流和统计, 改写到 base_url 后仍使用同一组限流配置
+        host = urlsplit(url).netloc
+        bucket = self.rate_limiter.bucket(url) if self.rate_limiter else None
+        url = self._resolve(url)
+        kwargs.setdefault("timeout", self.timeout)
+        if bucket is not None:
+            with get_metrics().timer("rate_limit_wait_seconds", host=host):
+                bucket.acquire()
+
+        start = time.perf_counter()
+        try:
+            r = self.session(url).get(url, params=params, **kwargs)
+        except requests.RequestException:
+            _record(host, start, "error")
+            if bucket is not None:
+                bucket.on_throttle()
+            raise
+        _record(host, start, r.status_code, len(r.content))
+        if bucket is not None:
+            if r.status_code == 429 or r.status_code >= 500:
+                bucket.on_throttle()
+            else:
+                bucket.on_success()
+        return r
+
+    def get_json(self, url: str, params: Optional[dict] = None, **kwargs) -> dict:
+        """GET 请求并解析 JSON, 非 2xx 响应抛出 requests.HTTPError, 响应不是 JSON 或 data 为空时抛出 ThrottledError"""
+        r = self.get(url, params=params, **kwargs)
+        r.raise_for_status()
+        return _payload(r, url, self.rate_limiter.bucket(url) if self.rate_limiter else None)
+
+    def close(self):
+        with self._lock:
+            for session in self._sessions.values():
+                session.close()
+            self._sessions.clear()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+
+class AsyncHttpClient:
+    """HttpClient 的异步版本, 基于 httpx.AsyncClient
+
+    httpx 按 host 维护 keep-alive 连接池, 所有协程共用一个客户端.
+    参数与 HttpClient 相同, 限流时在事件循环中异步等待令牌, 不会阻塞其它协程.
+    """
+
+    def __init__(
+        self,
+        pool_connections: int = 2,
+        pool_maxsize: int = 8,
+        timeout: float = 10,
+        connect_timeout: Optional[float] = None,
+        base_url: Optional[str] = None,
+        headers: Optional[dict] = None,
+        rate_limiter: Optional[HostRateLimiter] = None,
+    ):
+        try:
+            import httpx
+        except ImportError:
+            raise ImportError("AsyncHttpClient 需要安装 httpx: pip install httpx") from None
+        self._transport_error = httpx.TransportError
+        self.base_url = base_url
+        self.rate_limiter = rate_limiter
+        # pool_connections 对应 requests 按 host 缓存的连接池数量, httpx 不需要单独配置
+        self.client = httpx.AsyncClient(
+            timeout=httpx.Timeout(timeout, connect=connect_timeout or timeout),
+            limits=httpx.Limits(max_connections=pool_maxsize, max_keepalive_connections=pool_maxsize),
+            headers={"Accept-Encoding": "gzip, deflate", **(headers or {})},
+        )
+
+    async def get(self, url: str, params: Optional[dict] = None, **kwargs) -> "httpx.Response":
+        host = urlsplit(url).netloc
+        bucket = self.rate_limiter.bucket(url) if self.rate_limiter else None
+        url = _rewrite(url, self.base_url)
+        if bucket is not None:
+            with get_metrics().timer("rate_limit_wait_seconds", host=host):
+                await bucket.acquire_async()
+
+        start = time.perf_counter()
+        try:
+            r = await self.client.get(url, params=params, **kwargs)
+        except self._transport_error:
+            _record(host, start, "error")
+            if bucket is not None:
+                bucket.on_throttle()
+            raise
+        _record(host, start, r.status_code, len(r.content))
+        if bucket is not None:
+            if r.status_code == 429 or r.status_code >= 500:
+                bucket.on_throttle()
+            else:
+                bucket.on_success()
+        return r
+
+    async def get_json(self, url: str, params: Optional[dict] = None, **kwargs) -> dict:
+        """GET 请求并解析 JSON, 非 2xx 响应抛出 httpx.HTTPStatusError, 响应不是 JSON 或 data 为空时抛出 ThrottledError"""
+        r = await self.get(url, params=params, **kwargs)
+        r.raise_for_status()
+        return _payload(r, url, self.rate_limiter.bucket(url) if self.rate_limiter else None)
+
+    async def close(self):
+        await self.client.aclose()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        await self.close()
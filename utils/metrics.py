@@ -0,0 +1,222 @@
+import bisect
+import functools
+import inspect
+import json
+import math
+import os
+import threading
+import time
+from typing import Optional
+
+from utils.atomic import write_text_atomic
+
+# 默认的耗时直方图分桶（秒）, 与 Prometheus 客户端的默认值一致
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+
+def _key(name: str, labels: dict) -> tuple:
+    return name, tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(labels: tuple, extra: Optional[tuple] = None) -> str:
+    pairs = list(labels) + ([extra] if extra else [])
+    if not pairs:
+        return ""
+    escaped = (f'{k}="{_escape(v)}"' for k, v in pairs)
+    return "{" + ",".join(escaped) + "}"
+
+
+class _Histogram:
+    def __init__(self, buckets: tuple):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)  # 最后一个为 +Inf
+        self.count = 0
+        self.sum = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+
+    def observe(self, value: float):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+        self.min = min(self.min, value)
+        self.max = max(self.max, value)
+
+
+class _Timer:
+    """既可以作为上下文管理器, 也可以作为装饰器 (支持协程函数) 的计时器"""
+
+    def __init__(self, registry: "MetricsRegistry", name: str, labels: dict):
+        self.registry = registry
+        self.name = name
+        self.labels = labels
+        self._starts = threading.local()
+
+    def __enter__(self):
+        self._starts.__dict__.setdefault("stack", []).append(time.perf_counter())
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        elapsed = time.perf_counter() - self._starts.stack.pop()
+        self.registry.observe(self.name, elapsed, **self.labels)
+
+    def __call__(self, func):
+        if inspect.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                start = time.perf_counter()
+                try:
+                    return await func(*args, **kwargs)
+                finally:
+                    self.registry.observe(self.name, time.perf_counter() - start, **self.labels)
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                self.registry.observe(self.name, time.perf_counter() - start, **self.labels)
+        return wrapper
+
+
+class MetricsRegistry:
+    """
+    线程安全的指标登记表, 包含计数器和直方图, 每个指标可以带 host / stage 等标签.
+
+        metrics = get_metrics()
+        metrics.inc("http_requests_total", host="79.push2.eastmoney.com", status=200)
+        with metrics.timer("stage_seconds", stage="parse"):
+            ...
+
+        @timed("stage_seconds", stage="fetch")
+        def fetch(): ...
+
+    可以导出为 JSON 或 Prometheus 文本格式.
+    """
+
+    def __init__(self, buckets: tuple = DEFAULT_BUCKETS):
+        self.buckets = tuple(buckets)
+        self._counters = {}
+        self._histograms = {}
+        self._lock = threading.Lock()
+
+    def inc(self, name: str, value: float = 1, **labels):
+        key = _key(name, labels)
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    def observe(self, name: str, value: float, **labels):
+        key = _key(name, labels)
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = _Histogram(self.buckets)
+            histogram.observe(value)
+
+    def timer(self, name: str, **labels) -> _Timer:
+        """把耗时（秒）记录到直方图 name 中"""
+        return _Timer(self, name, labels)
+
+    def counter_value(self, name: str, **labels) -> float:
+        with self._lock:
+            return self._counters.get(_key(name, labels), 0)
+
+    def reset(self):
+        with self._lock:
+            self._counters.clear()
+            self._histograms.clear()
+
+    # 导出
+
+    def snapshot(self) -> dict:
+        """返回当前所有指标, 形如 {"counters": [...], "histograms": [...]}"""
+        with self._lock:
+            counters = [{"name": name, "labels": dict(labels), "value": value}
+                        for (name, labels), value in sorted(self._counters.items())]
+            histograms = []
+            for (name, labels), h in sorted(self._histograms.items(), key=lambda item: item[0]):
+                histograms.append({
+                    "name": name,
+                    "labels": dict(labels),
+                    "count": h.count,
+                    "sum": h.sum,
+                    "min": h.min,
+                    "max": h.max,
+                    "buckets": dict(zip([str(b) for b in h.buckets] + ["+Inf"], h.counts)),
+                })
+        return {"timestamp": time.time(), "counters": counters, "histograms": histograms}
+
+    def to_prometheus(self) -> str:
+        """Prometheus 文本格式, 直方图的分桶计数为累计值"""
+        lines = []
+        with self._lock:
+            typed = set()
+            for (name, labels), value in sorted(self._counters.items()):
+                if name not in typed:
+                    lines.append(f"# TYPE {name} counter")
+                    typed.add(name)
+                lines.append(f"{name}{_format_labels(labels)} {value}")
+            for (name, labels), h in sorted(self._histograms.items(), key=lambda item: item[0]):
+                if name not in typed:
+                    lines.append(f"# TYPE {name} histogram")
+                    typed.add(name)
+                cumulative = 0
+                for bound, count in zip([str(b) for b in h.buckets] + ["+Inf"], h.counts):
+                    cumulative += count
+                    lines.append(f"{name}_bucket{_format_labels(labels, ('le', bound))} {cumulative}")
+                lines.append(f"{name}_sum{_format_labels(labels)} {h.sum}")
+                lines.append(f"{name}_count{_format_labels(labels)} {h.count}")
+        return "\n".join(lines) + "\n"
+
+    def export(self, path: str, fmt: Optional[str] = None) -> str:
+        """
+        写出指标文件, 返回路径.
+
+        Args:
+            path (str): 输出路径.
+            fmt (str, optional): json 或 prometheus, 为空时按扩展名判断, .json 以外都按 prometheus 写出. Defaults to None.
+        """
+        fmt = fmt or ("json" if path.endswith(".json") else "prometheus")
+        if fmt == "json":
+            content = json.dumps(self.snapshot(), ensure_ascii=False, indent=2, default=str)
+        elif fmt == "prometheus":
+            content = self.to_prometheus()
+        else:
+            raise ValueError(f"不支持的指标格式: {fmt}, 可选 json / prometheus")
+
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        write_text_atomic(path, content)
+        return path
+
+
+_metrics = MetricsRegistry()
+
+
+def get_metrics() -> MetricsRegistry:
+    """进程内共享的指标登记表"""
+    return _metrics
+
+
+def timed(name: str, **labels) -> _Timer:
+    """记录到共享登记表的计时器, 可用作装饰器或上下文管理器"""
+    return _metrics.timer(name, **labels)
+
+
+def export_metrics(config: Optional[dict], base_dir: str = ".") -> Optional[str]:
+    """
+    按配置导出共享登记表中的指标, 未配置 path 时不导出.
+
+    Args:
+        config (dict, optional): 形如 {"path": "metrics.prom", "format": "prometheus"} 的配置.
+        base_dir (str, optional): 相对路径的基准目录. Defaults to ".".
+    """
+    config = config or {}
+    if not config.get("path"):
+        return None
+    return _metrics.export(os.path.join(base_dir, config["path"]), config.get("format"))
@@ -0,0 +1,148 @@
+import os
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Optional
+
+import pandas as pd
+
+from utils.atomic import write_atomic
+from utils.metrics import get_metrics
+
+FORMATS = ("csv", "xlsx", "parquet", "feather")
+
+
+def write_frame(df: pd.DataFrame, path: str, fmt: str, append: bool = False):
+    """
+    按格式写入 DataFrame. 除 csv 追加外都通过临时文件原子替换.
+
+    Args:
+        df (pd.DataFrame): 需要写入的数据.
+        path (str): 目标文件路径.
+        fmt (str): csv / xlsx / parquet / feather.
+        append (bool, optional): 仅 csv 支持, 文件已存在时追加到末尾且不写表头. Defaults to False.
+    """
+    if fmt == "csv":
+        if append and os.path.exists(path):
+            df.to_csv(path, mode="a", header=False, index=False, encoding="utf-8")
+        else:
+            # 使用utf-8-sig编码确保中文正常显示
+            write_atomic(path, lambda p: df.to_csv(p, index=False, encoding="utf-8-sig"))
+    elif fmt == "xlsx":
+        write_atomic(path, lambda p: df.to_excel(p, index=False))
+    elif fmt == "parquet":
+        write_atomic(path, lambda p: df.to_parquet(p, index=False))
+    elif fmt == "feather":
+        write_atomic(path, lambda p: df.reset_index(drop=True).to_feather(p))
+    else:
+        raise ValueError(f"不支持的输出格式: {fmt}, 可选 {', '.join(FORMATS)}")
+
+
+class OutputWriter:
+    """
+    后台写文件的输出器, 获取数据和写文件可以同时进行.
+
+    submit 把写入任务放进线程池并立即返回 Future, flush / close 等待所有任务完成,
+    任一任务失败时抛出第一个异常. 开启 consolidate 后, submit 的数据不会逐个写文件,
+    而是加上 key_column 列后在 close 时合并写成一个文件.
+    """
+
+    def __init__(self, directory: str, fmt: str = "csv", max_workers: int = 2, consolidate: bool = False,
+                 consolidated_name: str = "概念板块成分股", key_column: str = "板块名称", logger=None):
+        """
+        Args:
+            directory (str): 输出目录.
+            fmt (str, optional): 输出格式, csv / xlsx / parquet / feather. Defaults to "csv".
+            max_workers (int, optional): 后台写文件的线程数. Defaults to 2.
+            consolidate (bool, optional): 是否把所有数据合并写入一个文件. Defaults to False.
+            consolidated_name (str, optional): 合并文件的文件名 (不含扩展名). Defaults to "概念板块成分股".
+            key_column (str, optional): 合并时用于区分来源的列名, 值为 submit 的 filename. Defaults to "板块名称".
+            logger (logging.Logger, optional): 写入完成后记录日志. Defaults to None.
+        """
+        if fmt not in FORMATS:
+            raise ValueError(f"不支持的输出格式: {fmt}, 可选 {', '.join(FORMATS)}")
+        self.directory = directory
+        self.fmt = fmt
+        self.max_workers = max_workers
+        self.consolidate = consolidate
+        self.consolidated_name = consolidated_name
+        self.key_column = key_column
+        self.logger = logger
+
+        self._executor = None
+        self._futures = []
+        self._collected = []
+        self._lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+
+    def path(self, filename: str) -> str:
+        return os.path.join(self.directory, f"{filename}.{self.fmt}")
+
+    def write(self, df: pd.DataFrame, filename: str, append: bool = False) -> str:
+        """在当前线程同步写入, 返回文件路径"""
+        path = self.path(filename)
+        with get_metrics().timer("stage_seconds", stage="save"):
+            write_frame(df, path, self.fmt, append=append)
+        get_metrics().inc("rows_saved_total", len(df), format=self.fmt)
+        if self.logger is not None:
+            self.logger.info(f"已保存至 {path}")
+        return path
+
+    def submit(self, df: pd.DataFrame, filename: str, append: bool = False) -> Future:
+        """提交后台写入任务; consolidate 模式下只收集数据, 返回已完成的 Future"""
+        if self.consolidate:
+            with self._lock:
+                self._collected.append(df.assign(**{self.key_column: filename}))
+            future = Future()
+            future.set_result(None)
+            return future
+
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="output")
+            future = self._executor.submit(self.write, df, filename, append)
+            self._futures.append(future)
+        return future
+
+    def prune(self) -> list:
+        """
+        移除已完成的写入任务, 返回其中失败任务的异常, 不等待未完成的任务.
+        常驻进程中定期调用, 已完成的 Future 不会无限累积, 写入失败也能及时发现.
+        """
+        with self._lock:
+            done, pending = [], []
+            for future in self._futures:
+                (done if future.done() else pending).append(future)
+            self._futures = pending
+        return [f.exception() for f in done if f.exception() is not None]
+
+    def flush(self):
+        """等待已提交的写入任务全部完成, 有任务失败时抛出第一个异常"""
+        with self._lock:
+            futures, self._futures = self._futures, []
+        errors = [f.exception() for f in futures if f.exception() is not None]
+        if errors:
+            raise errors[0]
+
+    def close(self) -> Optional[str]:
+        """完成所有写入; consolidate 模式下写出合并文件并返回其路径"""
+        try:
+            self.flush()
+        finally:
+            with self._lock:
+                executor, self._executor = self._executor, None
+            if executor is not None:
+                executor.shutdown(wait=True)
+
+        with self._lock:
+            collected, self._collected = self._collected, []
+        if not collected:
+            return None
+        df = pd.concat(collected, ignore_index=True)
+        df = df[[self.key_column] + [c for c in df.columns if c != self.key_column]]
+        return self.write(df, self.consolidated_name)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
@@ -0,0 +1,115 @@
+import asyncio
+import json
+import threading
+import time
+from typing import Optional
+from urllib.parse import urlsplit
+
+
+class TokenBucket:
+    """自适应令牌桶限流器, 线程和 asyncio 协程均可安全使用
+
+    - 令牌以 rate 个/秒的速度补充, 最多积攒 burst 个, 每个请求消耗 1 个
+    - 令牌不足时先预占令牌再等待, 多个等待者按到达顺序排队
+    - on_throttle 将速率乘以 decrease_factor, on_success 将速率加上 increase_step (AIMD),
+      速率始终在 [min_rate, max_rate] 之间
+    """
+
+    def __init__(
+        self,
+        rate: float,
+        burst: Optional[float] = None,
+        min_rate: Optional[float] = None,
+        max_rate: Optional[float] = None,
+        decrease_factor: float = 0.5,
+        increase_step: Optional[float] = None,
+    ):
+        """
+        Args:
+            rate (float): 初始速率（次/秒）.
+            burst (float, optional): 桶容量, 即允许的突发请求数. Defaults to rate.
+            min_rate (float, optional): 自动降速的下限. Defaults to rate / 10.
+            max_rate (float, optional): 自动提速的上限. Defaults to rate.
+            decrease_factor (float, optional): 被限流或出错时速率的缩放系数. Defaults to 0.5.
+            increase_step (float, optional): 每次成功后速率的增量. Defaults to max_rate / 20.
+        """
+        self.rate = rate
+        self.burst = burst if burst is not None else max(rate, 1)
+        self.min_rate = min_rate if min_rate is not None else rate / 10
+        self.max_rate = max_rate if max_rate is not None else rate
+        self.decrease_factor = decrease_factor
+        self.increase_step = increase_step if increase_step is not None else self.max_rate / 20
+
+        self._tokens = self.burst
+        self._updated_at = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _reserve(self) -> float:
+        """预占一个令牌, 返回需要等待的秒数"""
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.burst, self._tokens + (now - self._updated_at) * self.rate)
+            self._updated_at = now
+            self._tokens -= 1
+            return 0.0 if self._tokens >= 0 else -self._tokens / self.rate
+
+    def acquire(self):
+        wait = self._reserve()
+        if wait > 0:
+            time.sleep(wait)
+
+    async def acquire_async(self):
+        wait = self._reserve()
+        if wait > 0:
+            await asyncio.sleep(wait)
+
+    def on_success(self):
+        with self._lock:
+            self.rate = min(self.max_rate, self.rate + self.increase_step)
+
+    def on_throttle(self):
+        with self._lock:
+            self.rate = max(self.min_rate, self.rate * self.decrease_factor)
+
+
+class HostRateLimiter:
+    """按 host 分配令牌桶, 同一 host 的所有请求共用一个桶"""
+
+    def __init__(self, config: Optional[dict] = None):
+        """
+        Args:
+            config (dict, optional): 形如 {"default": {...}, "hosts": {host: {...}}} 的配置,
+                每个 host 的配置会覆盖 default 中的同名项, 可用项见 TokenBucket 的参数. Defaults to None.
+        """
+        config = config or {}
+        self.default = {"rate": 2, **(config.get("default") or {})}
+        self.hosts = config.get("hosts") or {}
+        self._buckets = {}
+        self._lock = threading.Lock()
+
+    def bucket(self, url: str) -> TokenBucket:
+        host = urlsplit(url).hostname or url
+        with self._lock:
+            bucket = self._buckets.get(host)
+            if bucket is None:
+                bucket = TokenBucket(**{**self.default, **(self.hosts.get(host) or {})})
+                self._buckets[host] = bucket
+        return bucket
+
+
+# {规范化后的配置: HostRateLimiter}
+_limiters = {}
+_limiters_lock = threading.Lock()
+
+
+def get_rate_limiter(config: Optional[dict] = None) -> HostRateLimiter:
+    """
+    进程内共享的 HostRateLimiter, 按配置区分: 配置相同的调用方共用同一组令牌桶,
+    配置不同 (例如 overrides 覆盖了 rate_limit) 时使用各自的令牌桶, 不会沿用第一次调用的配置.
+    """
+    key = json.dumps(config or {}, sort_keys=True, default=str)
+    with _limiters_lock:
+        limiter = _limiters.get(key)
+        if limiter is None:
+            limiter = _limiters[key] = HostRateLimiter(config)
+        return limiter
@@ -1,6 +1,11 @@
+import asyncio
 import time
 import functools
 import logging
+import random
+import sys
+
+from utils.metrics import get_metrics
 
 def retry(max_attempts=3, delay=5, exceptions=(Exception,)):
     """重试装饰器
@@ -26,3 +31,97 @@ def retry(max_attempts=3, delay=5, exceptions=(Exception,)):
             raise last_exception
         return wrapper
     return decorator
+
+
+class ThrottledError(Exception):
+    """服务端限流时抛出, 总是可以重试"""
+
+
+def _retryable_types() -> tuple:
+    """临时性错误的异常类型. 只检查已经导入的 HTTP 库, 未导入的库不可能抛出异常, 也不必为此导入"""
+    types = [TimeoutError, ConnectionError, ThrottledError]
+    requests = sys.modules.get("requests")
+    if requests is not None:
+        types += [requests.Timeout, requests.ConnectionError]
+    httpx = sys.modules.get("httpx")
+    if httpx is not None:
+        types += [httpx.TimeoutException, httpx.NetworkError, httpx.RemoteProtocolError]
+    return tuple(types)
+
+
+class RetryPolicy:
+    """带指数退避和随机抖动的重试策略
+
+    每次失败后等待 random(0, min(max_delay, base_delay * 2^n)) 秒 (full jitter),
+    所有尝试加上等待的总耗时不超过 max_elapsed. 只有 is_retryable 判定为临时性的错误
+    (超时、连接错误、限流、5xx/429 响应) 才会重试, 其它异常直接抛出.
+    适合包在单个请求外面, 失败时只重试这一页, 已经拉到的页面不受影响.
+    """
+
+    RETRYABLE_STATUS = {429, 500, 502, 503, 504}
+
+    def __init__(self, max_attempts=5, base_delay=0.5, max_delay=10, max_elapsed=60, jitter=True):
+        """
+        Args:
+            max_attempts (int, optional): 最大尝试次数. Defaults to 5.
+            base_delay (float, optional): 第一次重试前的基础等待时间（秒）. Defaults to 0.5.
+            max_delay (float, optional): 单次等待的上限（秒）. Defaults to 10.
+            max_elapsed (float, optional): 总耗时上限（秒）, 超过后不再重试. Defaults to 60.
+            jitter (bool, optional): 是否在 [0, 退避时间] 内随机等待, 避免多个请求同时重试. Defaults to True.
+        """
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.max_elapsed = max_elapsed
+        self.jitter = jitter
+
+    def is_retryable(self, exc: BaseException) -> bool:
+        if isinstance(exc, _retryable_types()):
+            return True
+        status = getattr(getattr(exc, "response", None), "status_code", None)
+        return status in self.RETRYABLE_STATUS
+
+    def backoff(self, attempt: int) -> float:
+        """第 attempt 次失败后的等待时间"""
+        delay = min(self.max_delay, self.base_delay * 2 ** (attempt - 1))
+        return random.uniform(0, delay) if self.jitter else delay
+
+    def _next_delay(self, exc: BaseException, attempt: int, start: float):
+        """返回下一次重试前的等待时间, 不应再重试时返回 None"""
+        if not self.is_retryable(exc):
+            return None
+        error = type(exc).__name__
+        delay = self.backoff(attempt)
+        if attempt >= self.max_attempts or time.monotonic() - start + delay > self.max_elapsed:
+            get_metrics().inc("retries_exhausted_total", error=error)
+            return None
+        get_metrics().inc("retries_total", error=error)
+        logging.warning(f"尝试 {attempt}/{self.max_attempts} 失败: {exc}, {delay:.2f} 秒后重试")
+        return delay
+
+    def call(self, func, *args, **kwargs):
+        start = time.monotonic()
+        attempt = 0
+        while True:
+            attempt += 1
+            try:
+                return func(*args, **kwargs)
+            except Exception as e:
+                delay = self._next_delay(e, attempt, start)
+                if delay is None:
+                    raise
+                time.sleep(delay)
+
+    async def call_async(self, func, *args, **kwargs):
+        """call 的异步版本, func 为返回 awaitable 的函数"""
+        start = time.monotonic()
+        attempt = 0
+        while True:
+            attempt += 1
+            try:
+                return await func(*args, **kwargs)
+            except Exception as e:
+                delay = self._next_delay(e, attempt, start)
+                if delay is None:
+                    raise
+                await asyncio.sleep(delay)
@@ -0,0 +1,218 @@
+import asyncio
+import hashlib
+import os
+import threading
+import time
+from concurrent.futures import Future
+from contextlib import asynccontextmanager, contextmanager
+from typing import Optional
+
+from utils.cache import TieredCache, get_cache
+
+try:
+    import fcntl
+except ImportError:  # Windows 下没有 fcntl, 文件锁退化为只在进程内去重
+    fcntl = None
+
+
+class FileSingleFlight:
+    """
+    同一台机器上多个进程之间的请求去重, 基于 utils.cache 目录下的文件锁.
+
+    同一个 key 同时只有一个进程真正执行 fn, 结果写入共享的缓存目录;
+    其余进程拿到锁后发现缓存中已有在等待期间 (或 window 秒内) 写入的结果, 直接读取, 不再请求.
+    """
+
+    def __init__(self, cache: TieredCache, window: float = 0):
+        """
+        Args:
+            cache (TieredCache): 存放结果的缓存, 各进程需使用同一个目录.
+            window (float, optional): 开始等待前 window 秒内写入的结果也可以直接使用. Defaults to 0.
+        """
+        self.cache = cache
+        self.window = window
+        self.lock_dir = os.path.join(str(cache.directory), ".locks")
+
+    @staticmethod
+    def _digest(key) -> str:
+        return hashlib.sha1(repr(key).encode("utf-8")).hexdigest()[:16]
+
+    def _cache_key(self, key) -> str:
+        return f"singleflight_{self._digest(key)}.pkl"
+
+    def _open_lock(self, key):
+        if fcntl is None:
+            return None
+        os.makedirs(self.lock_dir, exist_ok=True)
+        return open(os.path.join(self.lock_dir, f"{self._digest(key)}.lock"), "a+")
+
+    @contextmanager
+    def _locked(self, key):
+        lock_file = self._open_lock(key)
+        if lock_file is None:
+            yield
+            return
+        with lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    @asynccontextmanager
+    async def _locked_async(self, key, poll_seconds: float = 0.05):
+        """非阻塞地轮询文件锁, 等待期间不占用线程, 任务被取消时不会遗留锁"""
+        lock_file = self._open_lock(key)
+        if lock_file is None:
+            yield
+            return
+        with lock_file:
+            while True:
+                try:
+                    fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                    break
+                except BlockingIOError:
+                    await asyncio.sleep(poll_seconds)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def _recent(self, key, started: float):
+        """等待期间其它进程写入的结果, 没有时返回 None"""
+        return self.cache.get(self._cache_key(key), ttl_seconds=time.time() - started + self.window)
+
+    def do(self, key, fn, *args, **kwargs) -> tuple:
+        """执行 fn 或复用其它进程的结果, 返回 (结果, 是否复用)"""
+        started = time.time()
+        with self._locked(key):
+            value = self._recent(key, started)
+            if value is not None:
+                return value, True
+            value = fn(*args, **kwargs)
+            self.cache.set(self._cache_key(key), value)
+            return value, False
+
+    async def do_async(self, key, fn, *args, **kwargs) -> tuple:
+        """do 的异步版本, fn 为返回 awaitable 的函数, 读写缓存在线程中进行"""
+        started = time.time()
+        async with self._locked_async(key):
+            value = await asyncio.to_thread(self._recent, key, started)
+            if value is not None:
+                return value, True
+            value = await fn(*args, **kwargs)
+            await asyncio.to_thread(self.cache.set, self._cache_key(key), value)
+            return value, False
+
+
+class _LeaderCancelled(Exception):
+    """执行方的 asyncio 任务被取消, 等待方应重新发起调用"""
+
+
+class SingleFlight:
+    """
+    进程内的请求去重: 同一个 key 同时只执行一次, 并发的调用方等待并共享同一个结果 (或异常).
+    线程 (do) 和 asyncio 任务 (do_async) 共用同一张表, 两者之间也会互相复用.
+    配置 file_flight 后, 真正执行前再通过文件锁与其它进程去重.
+
+        flight = get_single_flight()
+        df, shared = flight.do(("concept_stocks", board_code, fields), fetch, concept_name)
+
+    复用的结果是同一个对象, 调用方不应原地修改. 执行方的任务被取消时, 其中一个等待方接替执行.
+    """
+
+    def __init__(self, file_flight: Optional[FileSingleFlight] = None):
+        self.file_flight = file_flight
+        self._calls = {}
+        self._lock = threading.Lock()
+
+    def _join(self, key) -> tuple:
+        """返回 (Future, 是否由当前调用方执行)"""
+        with self._lock:
+            future = self._calls.get(key)
+            if future is not None:
+                return future, False
+            future = self._calls[key] = Future()
+            return future, True
+
+    def _finish(self, key, future: Future, result: tuple = None, error: BaseException = None):
+        with self._lock:
+            self._calls.pop(key, None)
+        if error is not None:
+            future.set_exception(error)
+        else:
+            future.set_result(result)
+
+    def in_flight(self) -> int:
+        """正在执行的 key 数量"""
+        with self._lock:
+            return len(self._calls)
+
+    def do(self, key, fn, *args, **kwargs) -> tuple:
+        """执行 fn 或等待正在执行的同一个 key, 返回 (结果, 是否复用)"""
+        while True:
+            future, leader = self._join(key)
+            if leader:
+                break
+            try:
+                return future.result()[0], True
+            except _LeaderCancelled:
+                continue
+
+        try:
+            if self.file_flight is not None:
+                result = self.file_flight.do(key, fn, *args, **kwargs)
+            else:
+                result = (fn(*args, **kwargs), False)
+        except BaseException as e:
+            self._finish(key, future, error=e)
+            raise
+        self._finish(key, future, result)
+        return result
+
+    async def do_async(self, key, fn, *args, **kwargs) -> tuple:
+        """do 的异步版本, fn 为返回 awaitable 的函数"""
+        while True:
+            future, leader = self._join(key)
+            if leader:
+                break
+            try:
+                return (await asyncio.wrap_future(future))[0], True
+            except _LeaderCancelled:
+                continue
+
+        try:
+            if self.file_flight is not None:
+                result = await self.file_flight.do_async(key, fn, *args, **kwargs)
+            else:
+                result = (await fn(*args, **kwargs), False)
+        except asyncio.CancelledError:
+            # 取消只针对执行方自己, 不传给等待方
+            self._finish(key, future, error=_LeaderCancelled())
+            raise
+        except BaseException as e:
+            self._finish(key, future, error=e)
+            raise
+        self._finish(key, future, result)
+        return result
+
+
+_flights = {}
+_flights_lock = threading.Lock()
+
+
+def get_single_flight(directory: Optional[str] = None, window: float = 0) -> SingleFlight:
+    """
+    进程内共享的 SingleFlight, 同一进程中的所有 fetcher 共用, 才能合并彼此的请求.
+
+    Args:
+        directory (str, optional): 缓存目录, 传入时启用跨进程的文件锁去重, 结果存放在该目录的 TieredCache 中. Defaults to None.
+        window (float, optional): 跨进程去重时, 可直接复用多少秒内写入的结果. Defaults to 0.
+    """
+    key = (os.path.abspath(directory) if directory else None, window)
+    with _flights_lock:
+        flight = _flights.get(key)
+        if flight is None:
+            file_flight = FileSingleFlight(get_cache(directory), window) if directory else None
+            flight = _flights[key] = SingleFlight(file_flight)
+        return flight